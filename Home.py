@@ -61,7 +61,9 @@ st.success("⚡ **Tối ưu tốc độ:** Trang load nhanh <1s! Data được l
 st.markdown("---")
 
 # Hiển thị thông tin phiên giao dịch
-from components.session_cache import render_session_info
+from components.session_cache import render_session_info, invalidate_cache
+from components.cache_warmer import start_cache_warmer
+start_cache_warmer()
 render_session_info()
 
 st.markdown("---")
@@ -283,7 +285,8 @@ with st.sidebar:
     
     # Clear cache button
     if st.button("🔄 Xóa cache & tải lại"):
-        st.cache_data.clear()
+        # Dữ liệu thị trường; nhận định AI và Bold.Report (tốn quota) được giữ lại
+        invalidate_cache("prices", "news", "derivs")
         st.success("✅ Đã xóa cache!")
         st.rerun()
     
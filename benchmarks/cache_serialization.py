@@ -0,0 +1,121 @@
+"""
+Benchmark chi phí mỗi lần cache hit của DataFrame: st.cache_data (pickle + copy)
+so với arrow_cache_data (Arrow IPC, view read-only)
+
+Chạy từ thư mục gốc của repo:
+    python -m benchmarks.cache_serialization [--hits 200]
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from components.arrow_frames import arrow_cache_data
+
+FIELDS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+
+def _close_panel(rows: int, tickers: int) -> pd.DataFrame:
+    index = pd.bdate_range(end="2026-01-30", periods=rows, name="Date")
+    rng = np.random.default_rng(0)
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (rows, tickers)), axis=0))
+    values[:3, 0] = np.nan  # ticker thiếu lịch sử đầu kỳ
+    return pd.DataFrame(values, index=index, columns=[f"T{i:03d}" for i in range(tickers)])
+
+
+def _ohlcv_panel(rows: int, tickers: int) -> pd.DataFrame:
+    close = _close_panel(rows, tickers)
+    frames = {}
+    for field in FIELDS:
+        frame = close * (1.0 + 0.001 * FIELDS.index(field))
+        frames[field] = frame.round(0).fillna(0).astype("int64") if field == "Volume" else frame
+    panel = pd.concat(frames, axis=1)
+    panel.columns.names = ["Price", "Ticker"]
+    return panel
+
+
+def _ohlcv_frame(rows: int) -> pd.DataFrame:
+    return _ohlcv_panel(rows, 1).xs("T000", axis=1, level="Ticker")
+
+
+# Các payload điển hình của app
+PAYLOADS: Dict[str, Callable[[], pd.DataFrame]] = {
+    "close panel (3mo Close x 9)": lambda: _close_panel(63, 9),
+    "fetch_ohlc (6mo OHLCV x 1)": lambda: _ohlcv_frame(126),
+    "price panel (6mo OHLCV x 26)": lambda: _ohlcv_panel(126, 26),
+    "top10 panel (1mo OHLCV x 100)": lambda: _ohlcv_panel(22, 100),
+}
+
+
+def _per_hit(func: Callable[[], pd.DataFrame], hits: int) -> Tuple[float, int]:
+    """(µs mỗi hit, byte cấp phát tối đa trong một hit)"""
+    func()  # miss: ghi cache
+    started = time.perf_counter()
+    for _ in range(hits):
+        func()
+    elapsed = (time.perf_counter() - started) / hits * 1e6
+
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, peak
+
+
+def run(hits: int) -> List[Dict]:
+    """
+    Đo từng payload qua hai decorator
+
+    Args:
+        hits: Số lần hit mỗi phép đo
+
+    Returns:
+        List dict {payload, cache_data_us, arrow_us, cache_data_bytes, arrow_bytes}
+    """
+    results = []
+    for name, build in PAYLOADS.items():
+        frame = build()
+
+        @st.cache_data(show_spinner=False)
+        def pickled(_name=name):
+            return frame
+
+        @arrow_cache_data()
+        def arrow(_name=name):
+            return frame
+
+        assert arrow().equals(pickled())
+        pickled_us, pickled_bytes = _per_hit(pickled, hits)
+        arrow_us, arrow_bytes = _per_hit(arrow, hits)
+        results.append({
+            "payload": f"{name} [{frame.memory_usage(index=True).sum() / 1024:.0f} KB]",
+            "cache_data_us": pickled_us,
+            "arrow_us": arrow_us,
+            "cache_data_bytes": pickled_bytes,
+            "arrow_bytes": arrow_bytes,
+        })
+        pickled.clear()
+        arrow.clear()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hits", type=int, default=200, help="Số lần hit mỗi phép đo")
+    args = parser.parse_args()
+
+    print(f"{'payload':<46} {'st.cache_data':>16} {'arrow view':>16} {'copied/hit':>22}")
+    for row in run(args.hits):
+        print(
+            f"{row['payload']:<46} {row['cache_data_us']:>13.1f} µs {row['arrow_us']:>13.1f} µs "
+            f"{row['cache_data_bytes'] / 1024:>9.1f} → {row['arrow_bytes'] / 1024:.1f} KB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Arrow IPC cho DataFrame trong cache của Streamlit
+st.cache_data pickle khi ghi và unpickle (= deep copy) DataFrame ở MỖI lần hit.
+arrow_cache_data lưu DataFrame một lần dưới dạng buffer Arrow IPC trong
+st.cache_resource (không copy), decode một lần thành DataFrame mà các cột số là
+view read-only trên buffer; mỗi lần hit chỉ trả về shallow copy của view đó
+"""
+import functools
+import logging
+import pickle
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Metadata trong schema IPC mô tả cách ghép các cột Arrow thành DataFrame
+_LAYOUT_KEY = b"ada.layout"
+
+
+def _is_block_dtype(dtype) -> bool:
+    """Cột numpy số (float/int/uint): lưu chung một khối 2D, decode zero-copy"""
+    return isinstance(dtype, np.dtype) and dtype.kind in "fiu"
+
+
+class ArrowFrame:
+    """
+    DataFrame đóng gói trong một buffer Arrow IPC (bất biến)
+
+    Layout: các cột index (pandas metadata), rồi mỗi dãy cột số liên tiếp cùng
+    dtype là MỘT cột FixedSizeList (giá trị theo hàng) → decode thành mảng 2D
+    view trên buffer, zero-copy và read-only, ít block nhất có thể; cột khác
+    (string, datetime, extension) là cột Arrow thường, decode một lần lúc tạo.
+    view() trả về shallow copy của DataFrame đã decode.
+    """
+    __slots__ = ("buffer", "_view")
+
+    def __init__(self, buffer: pa.Buffer):
+        self.buffer = buffer
+        self._view = self._decode(buffer)
+
+    @classmethod
+    def from_pandas(cls, df: pd.DataFrame) -> "ArrowFrame":
+        """
+        Đóng gói DataFrame
+
+        Args:
+            df: DataFrame (index và columns - kể cả MultiIndex - được giữ nguyên)
+
+        Returns:
+            ArrowFrame
+
+        Raises:
+            pa.ArrowException: Nếu có cột Arrow không biểu diễn được (VD: object lẫn kiểu)
+        """
+        index_table = pa.Table.from_pandas(pd.DataFrame(index=df.index), preserve_index=True)
+        arrays, names = list(index_table.columns), list(index_table.column_names)
+        dtypes = list(df.dtypes)
+        runs = []
+        start = 0
+        while start < len(dtypes):
+            stop = start + 1
+            if _is_block_dtype(dtypes[start]):
+                while stop < len(dtypes) and dtypes[stop] == dtypes[start]:
+                    stop += 1
+                # Giữ NaN là giá trị float (không đổi thành null) để decode không phải copy
+                values = np.ascontiguousarray(df.iloc[:, start:stop].to_numpy())
+                array = pa.FixedSizeListArray.from_arrays(
+                    pa.array(values.ravel(), from_pandas=False), stop - start
+                )
+            else:
+                array = pa.array(df.iloc[:, start], from_pandas=True)
+            arrays.append(array)
+            names.append(f"__run_{len(runs)}__")
+            runs.append((start, stop, dtypes[start]))
+            start = stop
+
+        metadata = dict(index_table.schema.metadata)
+        metadata[_LAYOUT_KEY] = pickle.dumps((df.columns, runs, index_table.column_names))
+        table = pa.Table.from_arrays(arrays, names=names).replace_schema_metadata(metadata)
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return cls(sink.getvalue())
+
+    @staticmethod
+    def _decode(buffer: pa.Buffer) -> pd.DataFrame:
+        table = pa.ipc.open_stream(buffer).read_all()
+        metadata = table.schema.metadata
+        columns, runs, index_names = pickle.loads(metadata[_LAYOUT_KEY])
+        index = (
+            table.select(index_names)
+            .replace_schema_metadata({b"pandas": metadata[b"pandas"]})
+            .to_pandas()
+            .index
+        )
+
+        pieces = []
+        for n, (start, stop, dtype) in enumerate(runs):
+            column = table.column(len(index_names) + n)
+            # combine_chunks() luôn copy: chỉ dùng khi stream có nhiều batch
+            array = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+            if _is_block_dtype(dtype):
+                values = array.flatten().to_numpy(zero_copy_only=True).reshape(len(index), stop - start)
+                pieces.append(pd.DataFrame(values, index=index, columns=columns[start:stop], copy=False))
+            else:
+                series = array.to_pandas()
+                if series.dtype != dtype:
+                    series = series.astype(dtype)
+                pieces.append(pd.DataFrame({0: series.to_numpy()}, index=index).set_axis(columns[start:stop], axis=1))
+
+        if not pieces:
+            return pd.DataFrame(index=index, columns=columns)
+        return pieces[0] if len(pieces) == 1 else pd.concat(pieces, axis=1)
+
+    @property
+    def nbytes(self) -> int:
+        """Kích thước buffer IPC (byte)"""
+        return self.buffer.size
+
+    def view(self) -> pd.DataFrame:
+        """
+        DataFrame trên buffer (shallow copy - không copy dữ liệu)
+
+        Returns:
+            DataFrame; ghi vào nó sẽ copy-on-write (pandas >= 3) hoặc báo lỗi
+            read-only, không bao giờ sửa dữ liệu trong cache
+        """
+        return self._view.copy(deep=False)
+
+    def __getstate__(self):
+        return {"buffer": self.buffer}
+
+    def __setstate__(self, state):
+        self.__init__(state["buffer"])
+
+
+def arrow_cache_data(
+    ttl: Optional[float] = None,
+    max_entries: Optional[int] = None
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Thay thế @st.cache_data cho hàm trả về DataFrame
+
+    Kết quả DataFrame được lưu dạng ArrowFrame trong st.cache_resource, mỗi lần
+    hit trả về view (không pickle, không deep copy). DataFrame không đóng gói
+    được sang Arrow được giữ nguyên và trả về bản copy như st.cache_data.
+
+    Args:
+        ttl: TTL (giây) của entry
+        max_entries: Số entry tối đa
+
+    Returns:
+        Decorator; hàm đã decorate có .clear() như st.cache_data
+    """
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @st.cache_resource(ttl=ttl, max_entries=max_entries, show_spinner=False)
+        @functools.wraps(func)
+        def cached(*args, **kwargs):
+            value = func(*args, **kwargs)
+            if isinstance(value, pd.DataFrame):
+                try:
+                    return ArrowFrame.from_pandas(value)
+                except (pa.ArrowException, TypeError, ValueError) as e:
+                    logger.warning(f"{func.__qualname__}: cannot store result as Arrow ({e}), keeping DataFrame")
+            return value
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            value = cached(*args, **kwargs)
+            if isinstance(value, ArrowFrame):
+                return value.view()
+            if isinstance(value, pd.DataFrame):
+                return value.copy()
+            return value
+
+        wrapper.clear = cached.clear
+        return wrapper
+
+    return decorator
@@ -0,0 +1,417 @@
+"""
+Persistent OHLCV bar store (SQLite)
+Lưu bars theo (ticker, interval) trên disk, mỗi lần refresh chỉ fetch phần còn thiếu
+Khi restart app, dữ liệu được warm từ disk thay vì tải lại từ network
+"""
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from components.session_cache import CACHE_DIR
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BAR_STORE_PATH = os.getenv("ADA_BAR_STORE", os.path.join(CACHE_DIR, "bars.sqlite"))
+
+# Series được coi là "mới" trong khoảng này → đọc thẳng từ disk, không gọi network
+BAR_REFRESH_SECONDS = int(os.getenv("ADA_BAR_REFRESH_SECONDS", "900"))
+
+# Sai lệch cho phép giữa bar đầu tiên và đầu period (cuối tuần, ngày lễ)
+COVERAGE_TOLERANCE = pd.Timedelta(days=7)
+
+# Close của bar đã đóng lệch quá mức này so với disk → nguồn đã điều chỉnh lại
+# lịch sử (split...) → tải lại toàn bộ series
+ADJUSTMENT_TOLERANCE = float(os.getenv("ADA_BAR_ADJUST_TOLERANCE", "0.005"))
+
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+_SQL_COLUMNS = ["open", "high", "low", "close", "adj_close", "volume"]
+
+# Downloader: (tickers, period, interval, start) -> Dict[ticker, DataFrame OHLCV]
+# (DataFrame rỗng = không có bar mới, thiếu key = không tải được)
+Downloader = Callable[[List[str], str, str, Optional[pd.Timestamp]], Dict[str, pd.DataFrame]]
+
+_PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+
+def period_start(period: str, now: Optional[pd.Timestamp] = None) -> Optional[pd.Timestamp]:
+    """
+    Quy đổi period kiểu yfinance sang thời điểm bắt đầu
+
+    Args:
+        period: Khoảng thời gian (1d, 5d, 1mo, 3mo, 6mo, 1y, ..., ytd, max)
+        now: Thời điểm hiện tại (naive UTC, None = bây giờ)
+
+    Returns:
+        Timestamp bắt đầu (None nếu period = max)
+    """
+    if now is None:
+        now = pd.Timestamp.now(tz="UTC").tz_localize(None)
+    if period == "ytd":
+        return pd.Timestamp(year=now.year, month=1, day=1)
+    offset = _PERIOD_OFFSETS.get(period)
+    if offset is None:
+        return None
+    return (now - offset).normalize()
+
+
+class BarStore:
+    """
+    Kho bars OHLCV trên SQLite, khóa chính (ticker, interval, ts)
+
+    Bảng series_meta ghi lại bar đầu/cuối, đầu period đã tải đầy đủ (coverage_start)
+    và thời điểm sync gần nhất cho mỗi series, để lần refresh sau chỉ request đoạn
+    còn thiếu. Series tải về rỗng (mã hủy niêm yết / sai mã) vẫn có dòng meta với
+    first_ts / last_ts NULL để cũng chỉ thử lại sau max_age.
+    """
+
+    def __init__(self, path: str = BAR_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS bars (
+                ticker TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, adj_close REAL, volume REAL,
+                PRIMARY KEY (ticker, interval, ts)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS series_meta (
+                ticker TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                first_ts INTEGER,
+                last_ts INTEGER,
+                synced_at REAL,
+                coverage_start INTEGER,
+                PRIMARY KEY (ticker, interval)
+            );
+        """)
+        # Store tạo trước khi có coverage_start
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(series_meta)")}
+        if "coverage_start" not in columns:
+            self._conn.execute("ALTER TABLE series_meta ADD COLUMN coverage_start INTEGER")
+        self._conn.commit()
+
+    def series_info(self, ticker: str, interval: str) -> Optional[Dict]:
+        """
+        Lấy metadata của một series
+
+        Returns:
+            Dict {first_ts, last_ts, synced_at, coverage_start} hoặc None nếu chưa có
+            (first_ts / last_ts None = lần sync trước không có bar nào,
+            coverage_start None = chưa rõ)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT first_ts, last_ts, synced_at, coverage_start FROM series_meta WHERE ticker=? AND interval=?",
+                (ticker, interval)
+            ).fetchone()
+        if row is None:
+            return None
+        to_ts = lambda v: None if v is None else pd.Timestamp(v, unit="s")
+        return {
+            "first_ts": to_ts(row[0]),
+            "last_ts": to_ts(row[1]),
+            "synced_at": row[2] or 0.0,
+            "coverage_start": to_ts(row[3]),
+        }
+
+    def load(self, ticker: str, interval: str, start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Đọc bars của một series từ disk
+
+        Args:
+            ticker: Mã tài sản
+            interval: Khoảng cách dữ liệu
+            start: Chỉ lấy bars từ thời điểm này (None = tất cả)
+
+        Returns:
+            DataFrame OHLCV, index naive datetime
+        """
+        start_s = int(start.timestamp()) if start is not None else -(2 ** 62)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT ts, {', '.join(_SQL_COLUMNS)} FROM bars "
+                "WHERE ticker=? AND interval=? AND ts>=? ORDER BY ts",
+                (ticker, interval, start_s)
+            ).fetchall()
+        if not rows:
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        df = pd.DataFrame(rows, columns=["ts"] + BAR_COLUMNS)
+        df.index = pd.to_datetime(df.pop("ts"), unit="s")
+        df.index.name = "Date"
+        return df
+
+    def save(self, ticker: str, interval: str, df: pd.DataFrame):
+        """
+        Ghi (upsert) bars cho một series và cập nhật metadata
+
+        Args:
+            ticker: Mã tài sản
+            interval: Khoảng cách dữ liệu
+            df: DataFrame OHLCV (index naive datetime)
+        """
+        if df is None or df.empty:
+            return
+        frame = df.reindex(columns=BAR_COLUMNS).astype(float)
+        ts = pd.DatetimeIndex(frame.index).as_unit("s").asi8.tolist()
+        values = frame.to_numpy()
+        records = [
+            (ticker, interval, t, *[None if v != v else float(v) for v in row])
+            for t, row in zip(ts, values)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO bars (ticker, interval, ts, {', '.join(_SQL_COLUMNS)}) "
+                f"VALUES (?, ?, ?, {', '.join('?' * len(_SQL_COLUMNS))})",
+                records
+            )
+            self._conn.execute(
+                """
+                INSERT INTO series_meta (ticker, interval, first_ts, last_ts, synced_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(ticker, interval) DO UPDATE SET
+                    first_ts = MIN(COALESCE(series_meta.first_ts, excluded.first_ts), excluded.first_ts),
+                    last_ts = MAX(COALESCE(series_meta.last_ts, excluded.last_ts), excluded.last_ts),
+                    synced_at = excluded.synced_at
+                """,
+                (ticker, interval, min(ts), max(ts), time.time())
+            )
+            self._conn.commit()
+
+    def reference_bar(self, ticker: str, interval: str) -> Optional[Tuple[pd.Timestamp, float]]:
+        """
+        Bar kế cuối của series (bar đã đóng chắc chắn), dùng để đối chiếu khi delta sync
+
+        Returns:
+            (ts, close) hoặc None nếu series có ít hơn 2 bars
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ts, close FROM bars WHERE ticker=? AND interval=? ORDER BY ts DESC LIMIT 1 OFFSET 1",
+                (ticker, interval)
+            ).fetchone()
+        if row is None or row[1] is None:
+            return None
+        return pd.Timestamp(row[0], unit="s"), float(row[1])
+
+    def drop(self, ticker: str, interval: str):
+        """Xóa toàn bộ bars và metadata của một series"""
+        with self._lock:
+            self._conn.execute("DELETE FROM bars WHERE ticker=? AND interval=?", (ticker, interval))
+            self._conn.execute("DELETE FROM series_meta WHERE ticker=? AND interval=?", (ticker, interval))
+            self._conn.commit()
+
+    def expire(self, tickers: Optional[List[str]] = None):
+        """
+        Đánh dấu các series cần sync lại ở lần đọc tiếp theo (giữ nguyên bars)
+
+        Args:
+            tickers: Các mã cần sync lại (None = tất cả)
+        """
+        with self._lock:
+            if tickers is None:
+                self._conn.execute("UPDATE series_meta SET synced_at=0")
+            else:
+                self._conn.executemany(
+                    "UPDATE series_meta SET synced_at=0 WHERE ticker=?", [(t,) for t in tickers]
+                )
+            self._conn.commit()
+
+    def touch(self, ticker: str, interval: str, coverage_start: Optional[pd.Timestamp] = None):
+        """
+        Đánh dấu series vừa được sync (tạo dòng meta nếu chưa có, kể cả khi không có bar nào)
+
+        Args:
+            ticker: Mã tài sản
+            interval: Khoảng cách dữ liệu
+            coverage_start: Đầu period vừa tải đầy đủ (None = delta, giữ nguyên)
+        """
+        coverage = None if coverage_start is None else int(coverage_start.timestamp())
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO series_meta (ticker, interval, first_ts, last_ts, synced_at, coverage_start)
+                VALUES (?, ?, NULL, NULL, ?, ?)
+                ON CONFLICT(ticker, interval) DO UPDATE SET
+                    synced_at = excluded.synced_at,
+                    coverage_start = CASE
+                        WHEN excluded.coverage_start IS NULL THEN series_meta.coverage_start
+                        WHEN series_meta.coverage_start IS NULL THEN excluded.coverage_start
+                        ELSE MIN(series_meta.coverage_start, excluded.coverage_start)
+                    END
+                """,
+                (ticker, interval, time.time(), coverage)
+            )
+            self._conn.commit()
+
+    def sync(
+        self,
+        tickers: List[str],
+        period: str,
+        interval: str,
+        downloader: Downloader,
+        max_age: int = BAR_REFRESH_SECONDS
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Đồng bộ các series với network (chỉ phần thiếu) và trả về bars trong period
+
+        Cơ chế:
+        - Series chưa có / period rộng hơn lần tải đầy đủ trước (coverage_start) → tải cả period
+        - Lần sync trước không có bar nào → sau max_age giây tải lại cả period
+        - Series đã có → tải từ bar kế cuối (bar cuối có thể chưa đóng) đến hiện tại;
+          close của bar kế cuối lệch quá ADJUSTMENT_TOLERANCE (split...) → tải lại
+          cả period và thay toàn bộ bars cũ của series
+        - Series vừa sync trong max_age giây → đọc thẳng từ disk
+
+        Args:
+            tickers: Danh sách mã tài sản
+            period: Khoảng thời gian cần trả về
+            interval: Khoảng cách dữ liệu
+            downloader: Hàm tải dữ liệu (tickers, period, interval, start)
+            max_age: Số giây một series được coi là còn mới
+
+        Returns:
+            Dict ticker -> DataFrame OHLCV trong period
+        """
+        start = period_start(period)
+        now = time.time()
+        full: List[str] = []
+        delta: Dict[pd.Timestamp, List[str]] = {}
+        references: Dict[str, Tuple[pd.Timestamp, float]] = {}
+
+        for ticker in tickers:
+            info = self.series_info(ticker, interval)
+            if info is None or not _covers(info, start):
+                full.append(ticker)
+            elif now - info["synced_at"] <= max_age:
+                continue
+            elif info["last_ts"] is None:
+                full.append(ticker)
+            else:
+                reference = self.reference_bar(ticker, interval)
+                if reference is not None:
+                    references[ticker] = reference
+                since = info["last_ts"] if reference is None else reference[0]
+                delta.setdefault(since, []).append(ticker)
+
+        if full:
+            logger.info(f"Bar store: full download for {len(full)} series ({period}, {interval})")
+            self._store_download(full, interval, downloader(full, period, interval, None), start)
+        for since, group in delta.items():
+            logger.info(f"Bar store: delta download for {len(group)} series from {since}")
+            frames = downloader(group, period, interval, since)
+            adjusted = [t for t in group if _is_adjusted(frames.get(t), references.get(t))]
+            if adjusted:
+                logger.warning(f"Bar store: history adjusted upstream for {adjusted}, full re-download")
+                refetched = downloader(adjusted, period, interval, None)
+                for ticker in adjusted:
+                    frames.pop(ticker, None)
+                    if ticker in refetched and not refetched[ticker].empty:
+                        self.drop(ticker, interval)
+                self._store_download(adjusted, interval, refetched, start)
+            self._store_download(group, interval, frames)
+
+        hits = len(tickers) - len(full) - sum(len(g) for g in delta.values())
+        if hits:
+            logger.info(f"Bar store: {hits} series served from disk")
+
+        frames = {}
+        for ticker in tickers:
+            df = self.load(ticker, interval, start)
+            if not df.empty:
+                frames[ticker] = df
+        return frames
+
+    def _store_download(
+        self,
+        tickers: List[str],
+        interval: str,
+        frames: Dict[str, pd.DataFrame],
+        coverage_start: Optional[pd.Timestamp] = None
+    ):
+        for ticker in tickers:
+            df = frames.get(ticker)
+            if df is None:
+                # Không tải được (lỗi / hết deadline) → lần sau thử lại
+                continue
+            if not df.empty:
+                self.save(ticker, interval, df)
+            self.touch(ticker, interval, coverage_start)
+
+
+def _covers(info: Dict, start: Optional[pd.Timestamp]) -> bool:
+    """
+    Series đã được tải đầy đủ từ `start` chưa
+
+    Dùng đầu period đã request (coverage_start), không dùng bar đầu tiên: mã mới
+    niêm yết có ít lịch sử hơn period sẽ không bị tải lại cả period mỗi lần sync.
+    Store cũ chưa có coverage_start → so với bar đầu tiên.
+
+    Args:
+        info: Metadata từ series_info()
+        start: Đầu period cần trả về (None = max, coi như đã phủ)
+
+    Returns:
+        True nếu không cần tải lại cả period
+    """
+    if start is None:
+        return True
+    covered_from = info["coverage_start"] if info["coverage_start"] is not None else info["first_ts"]
+    return covered_from is not None and covered_from <= start + COVERAGE_TOLERANCE
+
+
+def _is_adjusted(df: Optional[pd.DataFrame], reference: Optional[Tuple[pd.Timestamp, float]]) -> bool:
+    """
+    Bar tham chiếu trên disk có bị nguồn điều chỉnh lại không
+
+    Args:
+        df: Bars vừa tải (delta)
+        reference: (ts, close) của bar tham chiếu trên disk
+
+    Returns:
+        True nếu close mới của bar tham chiếu lệch quá ADJUSTMENT_TOLERANCE
+    """
+    if df is None or df.empty or reference is None or "Close" not in df.columns:
+        return False
+    ts, close = reference
+    if ts not in df.index or not close:
+        return False
+    fresh = df["Close"].loc[ts]
+    if isinstance(fresh, pd.Series):
+        fresh = fresh.iloc[-1]
+    if pd.isna(fresh):
+        return False
+    return abs(float(fresh) / close - 1) > ADJUSTMENT_TOLERANCE
+
+
+_bar_store: Optional[BarStore] = None
+_bar_store_lock = threading.Lock()
+
+
+def get_bar_store() -> BarStore:
+    """Get singleton instance of BarStore"""
+    global _bar_store
+    with _bar_store_lock:
+        if _bar_store is None:
+            _bar_store = BarStore()
+    return _bar_store
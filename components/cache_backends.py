@@ -0,0 +1,420 @@
+"""
+Backend lưu trữ cho shared session cache (tầng L2)
+- DiskCacheBackend: mỗi entry một file pickle, ghi atomic, dung lượng có giới hạn
+- SQLiteCacheBackend: một file SQLite (WAL) dùng chung cho nhiều replica trên cùng host
+Cả hai đều có lock liên process để chỉ một replica refresh một key trong mỗi phiên
+"""
+import io
+import os
+import glob
+import time
+import uuid
+import pickle
+import sqlite3
+import hashlib
+import tempfile
+import threading
+import logging
+from typing import Any, BinaryIO, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Giới hạn dung lượng disk cache (MB)
+DISK_CACHE_MAX_MB = float(os.getenv("ADA_DISK_CACHE_MAX_MB", "256"))
+
+# Khi vượt giới hạn, xóa file cũ nhất cho tới khi còn tỷ lệ này
+_PRUNE_TARGET = 0.8
+
+# Backend: "disk" (mặc định), "sqlite" (nhiều replica), "memory" (tắt L2)
+CACHE_BACKEND = os.getenv("ADA_CACHE_BACKEND", "disk").lower()
+
+# Thời gian giữ lock refresh tối đa (replica giữ lock bị crash → lock tự hết hạn)
+LOCK_TTL_SECONDS = float(os.getenv("ADA_CACHE_LOCK_TTL", "120"))
+
+
+class CacheBackend:
+    """
+    Interface cho tầng L2 của shared session cache
+
+    Payload là object Python bất kỳ (backend tự serialize). Lock trả về token,
+    chỉ người giữ token mới release được.
+    """
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Đọc entry → Tuple (found, payload)"""
+        raise NotImplementedError
+
+    def set(self, key: str, payload: Any) -> bool:
+        """Ghi entry → True nếu thành công"""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        """Xóa entry"""
+        raise NotImplementedError
+
+    def clear(self):
+        """Xóa toàn bộ entries"""
+        raise NotImplementedError
+
+    def keys(self, prefix: str = "") -> List[str]:
+        """Các key đang lưu bắt đầu bằng prefix (dùng cho invalidation có chọn lọc)"""
+        raise NotImplementedError
+
+    def acquire_lock(self, key: str, ttl: float = LOCK_TTL_SECONDS) -> Optional[str]:
+        """
+        Giành lock refresh cho key (không chờ)
+
+        Returns:
+            Token nếu giành được, None nếu process khác đang giữ
+        """
+        raise NotImplementedError
+
+    def release_lock(self, key: str, token: str):
+        """Trả lock (chỉ khi token khớp)"""
+        raise NotImplementedError
+
+    @property
+    def total_bytes(self) -> int:
+        raise NotImplementedError
+
+
+def _serialize(key: str, payload: Any) -> Optional[bytes]:
+    """Key và payload là hai pickle liên tiếp → đọc được key mà không cần load payload"""
+    try:
+        return (pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)
+                + pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception as e:
+        logger.debug(f"Cache backend: payload for {key} is not picklable: {e}")
+        return None
+
+
+def _deserialize(f: BinaryIO, key_only: bool = False) -> Tuple[str, Any]:
+    """Đọc (key, payload) ghi bởi _serialize (key_only → payload = None, không load)"""
+    key = pickle.load(f)
+    return key, None if key_only else pickle.load(f)
+
+
+class DiskCacheBackend(CacheBackend):
+    """
+    Cache trên disk, mỗi key một file pickle
+
+    - Ghi atomic: ghi ra file tạm cùng thư mục rồi os.replace
+    - Giới hạn dung lượng: vượt max_bytes → xóa các file ít được dùng nhất (mtime)
+    - Lock: file .lock tạo bằng O_EXCL, hết hạn theo mtime
+    """
+
+    SUFFIX = ".pkl"
+
+    def __init__(self, directory: str, max_bytes: int = int(DISK_CACHE_MAX_MB * 1024 * 1024)):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._total_bytes = sum(size for _, size, _ in self._scan())
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest + self.SUFFIX)
+
+    def _scan(self):
+        for path in glob.glob(os.path.join(self.directory, "*" + self.SUFFIX)):
+            try:
+                stat = os.stat(path)
+                yield path, stat.st_size, stat.st_mtime
+            except OSError:
+                continue
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Đọc entry
+
+        Returns:
+            Tuple (found, payload)
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                stored_key, payload = _deserialize(f)
+        except FileNotFoundError:
+            return False, None
+        except Exception as e:
+            logger.warning(f"Disk cache: unreadable entry {path}: {e}")
+            self.delete(key)
+            return False, None
+
+        if stored_key != key:  # trùng hash (gần như không xảy ra)
+            return False, None
+        try:
+            os.utime(path)  # đánh dấu vừa dùng cho việc prune
+        except OSError:
+            pass
+        return True, payload
+
+    def set(self, key: str, payload: Any) -> bool:
+        """
+        Ghi entry (atomic)
+
+        Returns:
+            True nếu ghi thành công (payload không pickle được → False)
+        """
+        data = _serialize(key, payload)
+        if data is None or len(data) > self.max_bytes:
+            return False
+
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Disk cache: write failed for {path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+
+        with self._lock:
+            self._total_bytes += len(data) - old_size
+            over_budget = self._total_bytes > self.max_bytes
+        if over_budget:
+            self.prune()
+        return True
+
+    def delete(self, key: str):
+        """Xóa entry"""
+        path = self._path(key)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self._total_bytes -= size
+
+    def clear(self):
+        """Xóa toàn bộ entries"""
+        for path, _, _ in list(self._scan()):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._total_bytes = 0
+
+    def keys(self, prefix: str = "") -> List[str]:
+        """Các key đang lưu bắt đầu bằng prefix (chỉ đọc phần key của mỗi file)"""
+        result = []
+        for path, _, _ in list(self._scan()):
+            try:
+                with open(path, "rb") as f:
+                    key, _ = _deserialize(f, key_only=True)
+            except Exception:
+                continue
+            if key.startswith(prefix):
+                result.append(key)
+        return result
+
+    def prune(self):
+        """Xóa các file ít được dùng nhất cho tới khi dưới giới hạn dung lượng"""
+        files = sorted(self._scan(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in files)
+        target = self.max_bytes * _PRUNE_TARGET
+        removed = 0
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                continue
+        with self._lock:
+            self._total_bytes = total
+        if removed:
+            logger.info(f"Disk cache: pruned {removed} entries ({total / 1024 / 1024:.1f} MB left)")
+
+    def acquire_lock(self, key: str, ttl: float = LOCK_TTL_SECONDS) -> Optional[str]:
+        lock_path = self._path(key)[:-len(self.SUFFIX)] + ".lock"
+        token = uuid.uuid4().hex
+        for _ in range(2):
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    expired = time.time() - os.path.getmtime(lock_path) > ttl
+                except OSError:
+                    continue  # lock vừa được trả
+                if not expired:
+                    return None
+                try:
+                    os.remove(lock_path)
+                except OSError:
+                    pass
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(token)
+            return token
+        return None
+
+    def release_lock(self, key: str, token: str):
+        lock_path = self._path(key)[:-len(self.SUFFIX)] + ".lock"
+        try:
+            with open(lock_path) as f:
+                if f.read() != token:
+                    return
+            os.remove(lock_path)
+        except OSError:
+            pass
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cache trong một file SQLite (WAL) - nhiều process/replica cùng host dùng chung
+
+    Bảng entries giữ payload pickle, bảng locks giữ lock refresh (owner token +
+    thời điểm hết hạn). Mọi thao tác lock chạy trong BEGIN IMMEDIATE nên atomic
+    giữa các process.
+    """
+
+    def __init__(self, path: str, max_bytes: int = int(DISK_CACHE_MAX_MB * 1024 * 1024)):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at);
+            CREATE TABLE IF NOT EXISTS locks (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+        """)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM entries WHERE key=?", (key,)).fetchone()
+            if row is None:
+                return False, None
+            self._conn.execute("UPDATE entries SET accessed_at=? WHERE key=?", (time.time(), key))
+        try:
+            stored_key, payload = _deserialize(io.BytesIO(row[0]))
+        except Exception as e:
+            logger.warning(f"SQLite cache: unreadable entry {key}: {e}")
+            self.delete(key)
+            return False, None
+        return stored_key == key, payload
+
+    def set(self, key: str, payload: Any) -> bool:
+        data = _serialize(key, payload)
+        if data is None or len(data) > self.max_bytes:
+            return False
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, payload, size, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, sqlite3.Binary(data), len(data), time.time())
+            )
+        if self.total_bytes > self.max_bytes:
+            self.prune()
+        return True
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key=?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+
+    def keys(self, prefix: str = "") -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def prune(self):
+        """Xóa các entry ít được dùng nhất cho tới khi dưới giới hạn dung lượng"""
+        target = self.max_bytes * _PRUNE_TARGET
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall()
+                total = sum(size for _, size in rows)
+                doomed = []
+                for key, size in rows:
+                    if total <= target:
+                        break
+                    doomed.append((key,))
+                    total -= size
+                self._conn.executemany("DELETE FROM entries WHERE key=?", doomed)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if doomed:
+            logger.info(f"SQLite cache: pruned {len(doomed)} entries ({total / 1024 / 1024:.1f} MB left)")
+
+    def acquire_lock(self, key: str, ttl: float = LOCK_TTL_SECONDS) -> Optional[str]:
+        token = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM locks WHERE key=? AND expires_at<?", (key, now))
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO locks (key, owner, expires_at) VALUES (?, ?, ?)",
+                    (key, token, now + ttl)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return token if cursor.rowcount == 1 else None
+
+    def release_lock(self, key: str, token: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM locks WHERE key=? AND owner=?", (key, token))
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return int(row[0])
+
+
+def create_backend(cache_dir: str, kind: str = CACHE_BACKEND) -> Optional[CacheBackend]:
+    """
+    Tạo backend L2 theo cấu hình
+
+    Args:
+        cache_dir: Thư mục dữ liệu cache
+        kind: "disk", "sqlite" hoặc "memory" (không có L2)
+
+    Returns:
+        CacheBackend hoặc None
+    """
+    if kind in ("memory", "none") or DISK_CACHE_MAX_MB <= 0:
+        return None
+    if kind == "sqlite":
+        return SQLiteCacheBackend(os.path.join(cache_dir, "session_cache.sqlite"))
+    if kind != "disk":
+        logger.warning(f"Unknown cache backend '{kind}', using disk")
+    return DiskCacheBackend(os.path.join(cache_dir, "session"))
@@ -0,0 +1,205 @@
+"""
+Cache bundle - đóng gói shared session cache thành một file để warm start
+Export: entry mới nhất (còn hạn) của mỗi dữ liệu - prices, snapshot, Top 10,
+derivatives, tin tức, Bold.Report, nhận định AI - vào một file zip nén kèm
+manifest (key, kích thước, thời điểm fetch, nguồn). Import: replica / máy
+staging mới nạp bundle lúc khởi động (ADA_CACHE_BUNDLE) và phục vụ ngay.
+
+Payload là pickle: chỉ import bundle do chính hệ thống tạo ra.
+
+CLI (chạy từ thư mục gốc của repo):
+    python -m components.cache_bundle export bundle.zip [--warm] [--namespace prices ...]
+    python -m components.cache_bundle import bundle.zip
+    python -m components.cache_bundle inspect bundle.zip
+"""
+import argparse
+import json
+import logging
+import os
+import pickle
+import socket
+import zipfile
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from components.session_cache import (
+    CacheEntry,
+    SessionCache,
+    get_session_cache,
+    session_label,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BUNDLE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return None if timestamp is None else datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def export_bundle(
+    path: str,
+    namespaces: Optional[Iterable[str]] = None,
+    cache: Optional[SessionCache] = None
+) -> Dict:
+    """
+    Ghi entry mới nhất của mỗi dữ liệu trong shared cache ra một bundle
+
+    Args:
+        path: File bundle (zip, nén deflate)
+        namespaces: Chỉ export các namespace này (None = tất cả)
+        cache: SessionCache nguồn (None = singleton; gồm cả L2 trên disk)
+
+    Returns:
+        Manifest đã ghi
+    """
+    cache = cache or get_session_cache()
+    entries = cache.latest_entries(namespaces)
+
+    records = []
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+        for n, (key, entry) in enumerate(sorted(entries.items())):
+            try:
+                payload = pickle.dumps(
+                    (key, CacheEntry(entry.value, entry.namespace, entry.created_at, entry.expires_at)),
+                    protocol=pickle.HIGHEST_PROTOCOL
+                )
+            except Exception as e:
+                logger.warning(f"Cache bundle: skipping {key} (not picklable: {e})")
+                continue
+            name = f"entries/{n:05d}.pkl"
+            bundle.writestr(name, payload)
+            parts = key.split("|")
+            records.append({
+                "file": name,
+                "key": key,
+                "namespace": entry.namespace,
+                "source": parts[2] if len(parts) > 2 else None,
+                "bytes": len(payload),
+                "memory_bytes": entry.size,
+                "fetched_at": _iso(entry.created_at),
+                "expires_at": _iso(entry.expires_at),
+                "assets": cache.assets_of(key),
+            })
+
+        manifest = {
+            "version": BUNDLE_VERSION,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "session": session_label(),
+            "host": socket.gethostname(),
+            "namespaces": {
+                ns: sum(1 for r in records if r["namespace"] == ns)
+                for ns in sorted({r["namespace"] for r in records})
+            },
+            "entries": records,
+        }
+        bundle.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2, ensure_ascii=False))
+    os.replace(tmp_path, path)
+
+    logger.info(f"Cache bundle: exported {len(records)} entries to {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    return manifest
+
+
+def read_manifest(path: str) -> Dict:
+    """
+    Đọc manifest của bundle (không load payload)
+
+    Args:
+        path: File bundle
+
+    Returns:
+        Manifest
+    """
+    with zipfile.ZipFile(path) as bundle:
+        return json.loads(bundle.read(MANIFEST_NAME))
+
+
+def import_bundle(
+    path: str,
+    namespaces: Optional[Iterable[str]] = None,
+    cache: Optional[SessionCache] = None
+) -> int:
+    """
+    Nạp bundle vào shared cache (L1 và L2)
+
+    Entry hết hạn hoặc cũ hơn dữ liệu đang có được bỏ qua. Entry thuộc phiên đã
+    qua vẫn được nạp: stale-while-revalidate phục vụ nó trong lúc refresh nền.
+
+    Args:
+        path: File bundle
+        namespaces: Chỉ nạp các namespace này (None = tất cả)
+        cache: SessionCache đích (None = singleton)
+
+    Returns:
+        Số entry đã nạp
+
+    Raises:
+        ValueError: Nếu bundle khác version
+    """
+    cache = cache or get_session_cache()
+    wanted = None if namespaces is None else set(namespaces)
+    loaded = 0
+    with zipfile.ZipFile(path) as bundle:
+        manifest = json.loads(bundle.read(MANIFEST_NAME))
+        if manifest.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"Unsupported cache bundle version {manifest.get('version')}")
+
+        for record in manifest["entries"]:
+            if wanted is not None and record["namespace"] not in wanted:
+                continue
+            try:
+                key, entry = pickle.loads(bundle.read(record["file"]))
+            except Exception as e:
+                logger.warning(f"Cache bundle: skipping {record['key']} ({e})")
+                continue
+            if cache.restore(key, entry, record.get("assets", ())):
+                loaded += 1
+
+    logger.info(f"Cache bundle: loaded {loaded}/{len(manifest['entries'])} entries from {path} "
+                f"(exported {manifest['created_at']} by {manifest['host']}, session {manifest['session']})")
+    return loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export / import shared session cache bundles")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Ghi cache hiện tại ra bundle")
+    export.add_argument("path")
+    export.add_argument("--namespace", action="append", help="Chỉ export namespace này (lặp lại được)")
+    export.add_argument("--warm", action="store_true", help="Fetch toàn bộ dữ liệu của phiên hiện tại trước khi export")
+
+    load = commands.add_parser("import", help="Nạp bundle vào cache (L2 dùng chung với các replica)")
+    load.add_argument("path")
+    load.add_argument("--namespace", action="append", help="Chỉ nạp namespace này (lặp lại được)")
+
+    inspect = commands.add_parser("inspect", help="In manifest của bundle")
+    inspect.add_argument("path")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        if args.warm:
+            from components.cache_warmer import warm_session
+            from components.session_cache import current_time
+
+            warm_session(current_time())
+        manifest = export_bundle(args.path, args.namespace)
+        print(f"{len(manifest['entries'])} entries → {args.path}: {manifest['namespaces']}")
+    elif args.command == "import":
+        print(f"{import_bundle(args.path, args.namespace)} entries loaded")
+    else:
+        manifest = read_manifest(args.path)
+        print(f"Bundle v{manifest['version']} - {manifest['created_at']} - {manifest['host']} - session {manifest['session']}")
+        for record in manifest["entries"]:
+            print(f"  {record['namespace']:<8} {record['bytes'] / 1024:>9.1f} KB  "
+                  f"{record['fetched_at']}  {record['source']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Cache warmer - tính trước dữ liệu trước mỗi lần refresh
+Chạy nền, mỗi dataset được warm theo refresh policy của nó: dữ liệu theo phiên
+trước mỗi lần mở phiên (Asia / Europe / US), crypto và derivatives mỗi chu kỳ
+24/7, Top 10 mỗi 30 phút trong giờ US. Task được fetch dưới cache key của bucket
+mới một khoảng lead time trước boundary → user đầu tiên nhận ngay warm hit
+"""
+import os
+import threading
+import time
+import logging
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from components.refresh_policy import RefreshPolicy
+from components.session_cache import policy_for, session_override
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tính trước bao nhiêu giây trước khi sang bucket mới (policy chu kỳ ngắn tự rút ngắn)
+WARM_LEAD_SECONDS = float(os.getenv("ADA_CACHE_WARM_LEAD", "300"))
+
+# Bật/tắt warmer (VD: tắt khi chạy nhiều replica chỉ cần một replica warm)
+WARMER_ENABLED = os.getenv("ADA_CACHE_WARMER", "on").lower() not in ("0", "off", "false", "no")
+
+WarmTask = Tuple[str, Callable[[], Any], RefreshPolicy]
+
+
+def warm_tasks() -> List[WarmTask]:
+    """
+    Danh sách dữ liệu cần tính trước, theo thứ tự phụ thuộc (panel trước, các
+    bảng suy ra từ panel sau, AI cuối cùng vì dùng snapshot + tin tức)
+
+    Mỗi task gọi đúng hàm public mà các trang dùng, với cùng arguments, để cache
+    key trùng với key của request thật; policy phải trùng với policy mà hàm đó
+    truyền cho get_cached_data.
+
+    Returns:
+        List (tên task, callable không tham số, refresh policy)
+    """
+    # Import tại chỗ để tránh circular import (data providers import session_cache)
+    from data_providers.price_panel import get_price_panel, get_indicator_table, PANEL_POLICY
+    from data_providers.overview import get_cross_asset_returns, get_market_snapshot
+    from data_providers.market_details import build_top10_equities, DEFAULT_EQUITY_UNIVERSE, TOP10_POLICY
+    from data_providers.crypto_derivs import get_derivs_snapshot
+    from data_providers.news_provider import NewsProvider
+    from data_providers.bold_report import get_bold_provider
+    from data_providers.ai_analyst import get_overview_commentary
+
+    news = NewsProvider()
+    bold = get_bold_provider()
+    return [
+        ("price_panel", get_price_panel, PANEL_POLICY),
+        ("indicator_table", get_indicator_table, PANEL_POLICY),
+        ("cross_asset_returns", get_cross_asset_returns, PANEL_POLICY),
+        ("market_snapshot", get_market_snapshot, PANEL_POLICY),
+        ("top10_equities", partial(build_top10_equities, universe=DEFAULT_EQUITY_UNIVERSE), TOP10_POLICY),
+        ("derivs", get_derivs_snapshot, policy_for("derivs")),
+        ("news_24h", partial(news.get_news, hours_back=24, max_items=10), policy_for("news")),
+        ("news_24h_brief", partial(news.get_news, hours_back=24, max_items=5), policy_for("news")),
+        ("news_12h", partial(news.get_news, hours_back=12, max_items=5), policy_for("news")),
+        ("etf_flows", bold.get_latest_fund_flows, policy_for("bold")),
+        ("etf_gold_history", bold.get_gold_flows_history, policy_for("bold")),
+        ("etf_bitcoin_history", bold.get_bitcoin_flows_history, policy_for("bold")),
+        ("etf_performance", bold.get_performance_gold_bitcoin, policy_for("bold")),
+        ("ai_overview", get_overview_commentary, policy_for("ai")),
+    ]
+
+
+def next_warm(
+    now_utc: datetime,
+    tasks: List[WarmTask],
+    lead_seconds: float = WARM_LEAD_SECONDS
+) -> Tuple[datetime, List[WarmTask], float]:
+    """
+    Boundary refresh gần nhất sau now_utc và các task cần warm cho boundary đó
+
+    Args:
+        now_utc: Thời điểm hiện tại (UTC)
+        tasks: Danh sách task (xem warm_tasks)
+        lead_seconds: Lead time tối đa
+
+    Returns:
+        Tuple (boundary, task cần warm theo thứ tự gốc, lead time giây) - list
+        rỗng nếu không task nào đổi bucket tại boundary cần prefetch
+    """
+    boundaries = {}
+    for task in tasks:
+        policy = task[2]
+        if policy not in boundaries:
+            boundaries[policy] = policy.next_refresh(now_utc)
+    boundary = min(boundaries.values())
+
+    due = [
+        task for task in tasks
+        if boundaries[task[2]] == boundary and task[2].should_prefetch(boundary)
+    ]
+    lead = min((task[2].prefetch_lead(lead_seconds) for task in due), default=lead_seconds)
+    return boundary, due, lead
+
+
+def warm_session(boundary_utc: datetime, tasks: Optional[List[WarmTask]] = None) -> Dict[str, bool]:
+    """
+    Tính trước dữ liệu cho bucket bắt đầu tại boundary_utc
+
+    Args:
+        boundary_utc: Thời điểm bắt đầu bucket mới (UTC)
+        tasks: Các task cần warm (None = toàn bộ warm_tasks())
+
+    Returns:
+        Dict tên task -> thành công hay không
+    """
+    if tasks is None:
+        tasks = warm_tasks()
+    results = {}
+    with session_override(boundary_utc + timedelta(seconds=1)):
+        for name, task, _ in tasks:
+            started = time.monotonic()
+            try:
+                task()
+                results[name] = True
+                logger.info(f"Cache warm {name}: ok ({time.monotonic() - started:.1f}s)")
+            except Exception as e:
+                results[name] = False
+                logger.warning(f"Cache warm {name} failed: {e}")
+    return results
+
+
+class CacheWarmer:
+    """
+    Thread nền warm cache trước mỗi boundary refresh của các dataset
+
+    Boundary mà policy không cần prefetch (VD: sang "Off-Market" với dữ liệu theo
+    phiên) được bỏ qua: chỉ warm khi sắp có traffic vào bucket mới.
+    """
+
+    def __init__(self, lead_seconds: float = WARM_LEAD_SECONDS):
+        self.lead_seconds = lead_seconds
+        self.last_run: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Khởi động thread nền (không làm gì nếu đang chạy)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-warmer", daemon=True)
+        self._thread.start()
+        logger.info(f"Cache warmer started (lead {self.lead_seconds:.0f}s)")
+
+    def stop(self):
+        """Dừng thread nền"""
+        self._stop.set()
+
+    def _run(self):
+        tasks = warm_tasks()
+        while not self._stop.is_set():
+            now = datetime.now(timezone.utc)
+            boundary, due, lead = next_warm(now, tasks, self.lead_seconds)
+
+            if due:
+                wait = (boundary - timedelta(seconds=lead) - now).total_seconds()
+                if wait > 0 and self._stop.wait(wait):
+                    return
+
+                logger.info(f"Warming {len(due)} datasets for refresh at {boundary:%Y-%m-%d %H:%M} UTC")
+                results = warm_session(boundary, due)
+                self.last_run = {
+                    "boundary": boundary,
+                    "finished": datetime.now(timezone.utc),
+                    "results": results,
+                }
+                failed = [name for name, ok in results.items() if not ok]
+                logger.info(f"Cache warm at {boundary:%H:%M} done, {len(results) - len(failed)}/{len(results)} ok"
+                            + (f" (failed: {', '.join(failed)})" if failed else ""))
+
+            # Chờ qua boundary để không warm lại cùng một bucket
+            remaining = (boundary - datetime.now(timezone.utc)).total_seconds() + 1
+            if remaining > 0 and self._stop.wait(remaining):
+                return
+
+
+_cache_warmer: Optional[CacheWarmer] = None
+_cache_warmer_lock = threading.Lock()
+
+
+def start_cache_warmer() -> Optional[CacheWarmer]:
+    """
+    Khởi động cache warmer một lần cho cả process (gọi lại nhiều lần an toàn)
+
+    Returns:
+        CacheWarmer, hoặc None nếu bị tắt bởi ADA_CACHE_WARMER
+    """
+    global _cache_warmer
+    if not WARMER_ENABLED:
+        return None
+    with _cache_warmer_lock:
+        if _cache_warmer is None:
+            _cache_warmer = CacheWarmer()
+        _cache_warmer.start()
+    return _cache_warmer
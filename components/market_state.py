@@ -0,0 +1,156 @@
+"""
+Market state - mức biến động hiện tại của thị trường và từng tài sản
+Cập nhật từ price panel (VIX, z-score, realized volatility) thành hệ số biến động,
+dùng để co giãn TTL cache và chu kỳ của VolatilityAdaptive: thị trường biến động
+→ refresh dày hơn, yên tĩnh → thưa hơn, dồn API budget vào nơi giá đang chạy
+"""
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Mapping, Optional
+
+from components.refresh_policy import get_volatility_factor, set_volatility_factor
+
+# VIX "bình thường": VIX = baseline → hệ số 1.0
+VIX_BASELINE = float(os.getenv("ADA_VIX_BASELINE", "20"))
+
+# Giới hạn hệ số biến động: TTL co giãn trong [base / FACTOR_MAX, base / FACTOR_MIN]
+FACTOR_MIN = 0.5
+FACTOR_MAX = 4.0
+
+# TTL tối thiểu (giây) dù thị trường biến động mạnh đến đâu
+MIN_TTL_SECONDS = 60
+
+_lock = threading.Lock()
+_state: Dict = {"vix": None, "market_factor": 1.0, "assets": 0, "updated_at": None}
+_effective_ttls: Dict[str, Dict] = {}
+
+
+def _clip(factor: float) -> float:
+    return min(max(factor, FACTOR_MIN), FACTOR_MAX)
+
+
+def vix_factor(vix: float) -> float:
+    """Hệ số biến động toàn thị trường từ mức VIX"""
+    return _clip(vix / VIX_BASELINE)
+
+
+def asset_factor(zscore: Optional[float] = None, vol_ratio: Optional[float] = None) -> float:
+    """
+    Hệ số biến động của một tài sản
+
+    Args:
+        zscore: Z-score của giá (|z| = 1 → 1.0, |z| = 3 → 2.0, z = 0 → 0.5)
+        vol_ratio: Realized vol ngắn hạn / dài hạn
+
+    Returns:
+        Hệ số trong [FACTOR_MIN, FACTOR_MAX] (thiếu cả hai → 1.0)
+    """
+    signals = []
+    if zscore is not None and not math.isnan(zscore):
+        signals.append(0.5 + abs(zscore) / 2)
+    if vol_ratio is not None and not math.isnan(vol_ratio):
+        signals.append(vol_ratio)
+    return _clip(max(signals)) if signals else 1.0
+
+
+def update_market_state(
+    zscores: Mapping[str, float],
+    vol_ratios: Mapping[str, float],
+    vix: Optional[float] = None
+) -> float:
+    """
+    Cập nhật hệ số biến động từ dữ liệu giá mới nhất
+
+    Hệ số của một tài sản = max(hệ số thị trường, hệ số riêng): tài sản yên tĩnh
+    trong thị trường hoảng loạn vẫn được refresh dày.
+
+    Args:
+        zscores: Ticker -> z-score giá
+        vol_ratios: Ticker -> realized vol ngắn hạn / dài hạn
+        vix: Mức VIX hiện tại (None = không có, dùng trung vị hệ số các tài sản)
+
+    Returns:
+        Hệ số biến động toàn thị trường
+    """
+    assets = set(zscores) | set(vol_ratios)
+    factors = {a: asset_factor(zscores.get(a), vol_ratios.get(a)) for a in assets}
+
+    if vix is not None and not math.isnan(vix):
+        market = vix_factor(vix)
+    elif factors:
+        market = sorted(factors.values())[len(factors) // 2]
+    else:
+        market = 1.0
+
+    set_volatility_factor(market)
+    for asset, factor in factors.items():
+        set_volatility_factor(max(market, factor), asset)
+
+    with _lock:
+        _state.update(
+            vix=vix, market_factor=market, assets=len(factors),
+            updated_at=datetime.now(timezone.utc)
+        )
+    return market
+
+
+def volatility_factor(*assets: str) -> float:
+    """Hệ số biến động lớn nhất của các tài sản (không truyền = toàn thị trường)"""
+    if not assets:
+        return get_volatility_factor()
+    return max(get_volatility_factor(asset) for asset in assets)
+
+
+def adaptive_ttl(base_seconds: int, *assets: str, key: Optional[str] = None) -> int:
+    """
+    TTL co giãn theo mức biến động: base_seconds / hệ số biến động
+
+    Args:
+        base_seconds: TTL khi thị trường bình thường
+        *assets: Các tài sản của dữ liệu (không truyền = hệ số toàn thị trường)
+        key: Tên hiển thị trong effective_ttls() (None = danh sách tài sản)
+
+    Returns:
+        TTL (giây), không nhỏ hơn MIN_TTL_SECONDS
+    """
+    factor = volatility_factor(*assets)
+    ttl = max(MIN_TTL_SECONDS, int(round(base_seconds / factor)))
+    label = key or ",".join(assets) or "market"
+    with _lock:
+        _effective_ttls[label] = {"ttl": ttl, "base": base_seconds, "factor": factor, "at": time.time()}
+    return ttl
+
+
+def ttl_window(ttl: int) -> str:
+    """
+    Nhãn cửa sổ thời gian dài `ttl` giây chứa thời điểm hiện tại
+
+    Truyền vào hàm @st.cache_data / @arrow_cache_data (TTL cố định lúc decorate)
+    như một argument: nhãn đổi → cache key đổi → TTL hiệu lực bằng `ttl`.
+    """
+    return f"{ttl}s_{int(time.time() // ttl)}"
+
+
+def effective_ttls() -> Dict[str, Dict]:
+    """
+    TTL hiệu lực gần nhất của từng key đã gọi adaptive_ttl()
+
+    Returns:
+        Dict key -> {ttl, base, factor, at}
+    """
+    with _lock:
+        return {label: dict(info) for label, info in _effective_ttls.items()}
+
+
+def market_state() -> Dict:
+    """
+    Trạng thái hiện tại
+
+    Returns:
+        Dict {vix, market_factor, assets, updated_at}
+    """
+    with _lock:
+        return dict(_state)
@@ -0,0 +1,187 @@
+"""
+Refresh policy cho từng dataset của shared session cache
+Mỗi policy chia thời gian thành các "bucket": bucket đổi → cache key đổi → dữ
+liệu được refresh. Cache warmer dùng next_refresh() để tính trước bucket kế tiếp.
+
+- SessionBound: theo phiên giao dịch (mặc định, như trước)
+- FixedInterval: mỗi N giây, kể cả ngoài giờ (crypto 24/7, funding, OI)
+- MarketHoursOnly: mỗi N giây khi một phiên đang mở, giữ nguyên khi phiên đóng
+- VolatilityAdaptive: chu kỳ co giãn theo mức biến động thị trường
+"""
+import math
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class RefreshPolicy:
+    """
+    Interface: bucket(now) là phần "phiên" của cache key, next_refresh(now) là
+    thời điểm bucket đổi tiếp theo
+    """
+
+    def bucket(self, now_utc: datetime) -> str:
+        """Nhãn bucket chứa now_utc"""
+        raise NotImplementedError
+
+    def next_refresh(self, now_utc: datetime) -> datetime:
+        """Thời điểm (UTC) bucket kế tiếp bắt đầu"""
+        raise NotImplementedError
+
+    def should_prefetch(self, boundary_utc: datetime) -> bool:
+        """Có nên tính trước dữ liệu cho bucket bắt đầu tại boundary_utc không"""
+        return True
+
+    def prefetch_lead(self, lead_seconds: float) -> float:
+        """Tính trước bao nhiêu giây trước boundary (policy chu kỳ ngắn rút ngắn lead)"""
+        return lead_seconds
+
+
+def _interval_start(now_utc: datetime, seconds: int) -> datetime:
+    """Đầu khoảng `seconds` giây (tính từ epoch) chứa now_utc"""
+    elapsed = (now_utc - _EPOCH).total_seconds()
+    return _EPOCH + timedelta(seconds=math.floor(elapsed / seconds) * seconds)
+
+
+@dataclass(frozen=True)
+class SessionBound(RefreshPolicy):
+    """Refresh khi sang phiên giao dịch mới (bucket = nhãn phiên "YYYY-MM-DD_Tên")"""
+
+    def bucket(self, now_utc: datetime) -> str:
+        # Import tại chỗ để tránh circular import (session_cache import module này)
+        from components.session_cache import get_current_session
+
+        session_name, session_start = get_current_session(now_utc)
+        return f"{session_start.strftime('%Y-%m-%d')}_{session_name}"
+
+    def next_refresh(self, now_utc: datetime) -> datetime:
+        from components.session_cache import next_session_boundary
+
+        return next_session_boundary(now_utc)[0]
+
+    def should_prefetch(self, boundary_utc: datetime) -> bool:
+        # Chỉ warm các phiên có traffic lúc mở cửa, không warm "Off-Market"
+        from components.session_cache import get_current_session
+
+        return get_current_session(boundary_utc)[0] != "Off-Market"
+
+
+@dataclass(frozen=True)
+class FixedInterval(RefreshPolicy):
+    """Refresh mỗi `seconds` giây, 24/7"""
+    seconds: int
+
+    def bucket(self, now_utc: datetime) -> str:
+        return f"every{self.seconds}s_{_interval_start(now_utc, self.seconds):%Y-%m-%dT%H:%M:%S}"
+
+    def next_refresh(self, now_utc: datetime) -> datetime:
+        return _interval_start(now_utc, self.seconds) + timedelta(seconds=self.seconds)
+
+    def prefetch_lead(self, lead_seconds: float) -> float:
+        return min(lead_seconds, self.seconds / 4)
+
+
+@dataclass(frozen=True)
+class MarketHoursOnly(RefreshPolicy):
+    """
+    Refresh mỗi `seconds` giây khi phiên `session` (tên trong TRADING_SESSIONS)
+    đang mở; khi phiên đóng, bucket giữ nguyên tới lần mở kế tiếp
+    """
+    session: str
+    seconds: int = 1800
+
+    def _bounds(self, now_utc: datetime):
+        from components.session_cache import get_trading_calendar
+
+        return get_trading_calendar().bounds(self.session, now_utc)
+
+    def bucket(self, now_utc: datetime) -> str:
+        is_open, previous, _ = self._bounds(now_utc)
+        if is_open:
+            return f"{self.session}-open_{_interval_start(now_utc, self.seconds):%Y-%m-%dT%H:%M:%S}"
+        closed_at = previous.strftime("%Y-%m-%dT%H:%M") if previous is not None else "unknown"
+        return f"{self.session}-closed_{closed_at}"
+
+    def next_refresh(self, now_utc: datetime) -> datetime:
+        is_open, _, following = self._bounds(now_utc)
+        if not is_open:
+            return following if following is not None else now_utc + timedelta(days=1)
+        tick = _interval_start(now_utc, self.seconds) + timedelta(seconds=self.seconds)
+        return min(tick, following) if following is not None else tick
+
+    def prefetch_lead(self, lead_seconds: float) -> float:
+        return min(lead_seconds, self.seconds / 4)
+
+
+# Hệ số biến động hiện tại (1.0 = bình thường, > 1 = biến động mạnh), cập nhật
+# bởi components.market_state: key None = toàn thị trường, còn lại theo ticker
+_volatility_factors: Dict[Optional[str], float] = {None: 1.0}
+_volatility_lock = threading.Lock()
+
+
+def set_volatility_factor(factor: float, asset: Optional[str] = None):
+    """Cập nhật hệ số biến động của thị trường (asset=None) hoặc của một tài sản"""
+    with _volatility_lock:
+        _volatility_factors[asset] = max(float(factor), 1e-6)
+
+
+def get_volatility_factor(asset: Optional[str] = None) -> float:
+    """Hệ số biến động của tài sản (chưa có → hệ số toàn thị trường)"""
+    with _volatility_lock:
+        return _volatility_factors.get(asset, _volatility_factors[None])
+
+
+@dataclass(frozen=True)
+class VolatilityAdaptive(RefreshPolicy):
+    """
+    Refresh mỗi base_seconds / hệ số biến động, giới hạn trong [min_seconds, max_seconds]
+    Thị trường biến động mạnh → refresh dày hơn; yên tĩnh → thưa hơn
+    asset: dùng hệ số của tài sản này thay vì hệ số toàn thị trường
+    """
+    base_seconds: int = 900
+    min_seconds: int = 120
+    max_seconds: int = 3600
+    asset: Optional[str] = None
+
+    def interval(self) -> int:
+        """Chu kỳ refresh hiện tại (giây), làm tròn về bội của min_seconds"""
+        raw = self.base_seconds / get_volatility_factor(self.asset)
+        steps = max(1, round(raw / self.min_seconds))
+        return int(min(max(steps * self.min_seconds, self.min_seconds), self.max_seconds))
+
+    def bucket(self, now_utc: datetime) -> str:
+        return FixedInterval(self.interval()).bucket(now_utc)
+
+    def next_refresh(self, now_utc: datetime) -> datetime:
+        return FixedInterval(self.interval()).next_refresh(now_utc)
+
+    def prefetch_lead(self, lead_seconds: float) -> float:
+        return min(lead_seconds, self.interval() / 4)
+
+
+@dataclass(frozen=True)
+class Composite(RefreshPolicy):
+    """
+    Dataset suy ra từ nhiều nguồn có policy khác nhau (VD: panel gộp crypto +
+    chỉ số): refresh khi BẤT KỲ policy thành phần nào đổi bucket
+    """
+    policies: Tuple[RefreshPolicy, ...]
+
+    def bucket(self, now_utc: datetime) -> str:
+        return "+".join(policy.bucket(now_utc) for policy in self.policies)
+
+    def next_refresh(self, now_utc: datetime) -> datetime:
+        return min(policy.next_refresh(now_utc) for policy in self.policies)
+
+    def should_prefetch(self, boundary_utc: datetime) -> bool:
+        return any(
+            policy.should_prefetch(boundary_utc)
+            for policy in self.policies
+            if policy.next_refresh(boundary_utc - timedelta(seconds=1)) == boundary_utc
+        )
+
+    def prefetch_lead(self, lead_seconds: float) -> float:
+        return min(policy.prefetch_lead(lead_seconds) for policy in self.policies)
@@ -2,9 +2,11 @@
 Component quản lý và hiển thị phiên giao dịch
 """
 from datetime import datetime, time, timezone
-import pytz
 import streamlit as st
 
+from components.market_state import adaptive_ttl
+from components.session_calendar import SessionCalendar
+
 
 # Định nghĩa 5 phiên giao dịch chính
 SESSIONS = [
@@ -51,9 +53,16 @@ SESSIONS = [
 ]
 
 
+# Timeline biên dịch của SESSIONS (DST, cuối tuần, ngày nghỉ) - tra cứu bằng bisect
+_session_calendar = SessionCalendar([
+    {"name": s["name"], "timezone": s["city"], "start": s["open"], "end": s["close"]}
+    for s in SESSIONS
+])
+
+
 def is_session_open(session: dict, now_utc: datetime) -> bool:
     """
-    Kiểm tra phiên có đang mở không
+    Kiểm tra phiên có đang mở không (đóng vào cuối tuần và ngày nghỉ của sàn)
     
     Args:
         session: Dict thông tin phiên
@@ -63,25 +72,7 @@ def is_session_open(session: dict, now_utc: datetime) -> bool:
         True nếu phiên đang mở
     """
     try:
-        tz = pytz.timezone(session["city"])
-        local_now = now_utc.astimezone(tz)
-        
-        # Tạo datetime cho open và close trong ngày hiện tại
-        open_dt = local_now.replace(
-            hour=session["open"].hour,
-            minute=session["open"].minute,
-            second=0,
-            microsecond=0
-        )
-        close_dt = local_now.replace(
-            hour=session["close"].hour,
-            minute=session["close"].minute,
-            second=0,
-            microsecond=0
-        )
-        
-        # Kiểm tra nằm trong khoảng
-        return open_dt <= local_now <= close_dt
+        return _session_calendar.is_open(session["name"], now_utc)
     except Exception as e:
         st.error(f"Lỗi kiểm tra phiên {session['name']}: {e}")
         return False
@@ -126,17 +117,21 @@ def session_status(now_utc: datetime = None):
     return badges, active_session
 
 
-def session_ttl(is_open: bool) -> int:
+def session_ttl(is_open: bool, *assets: str) -> int:
     """
-    Xác định TTL cache theo trạng thái phiên
+    Xác định TTL cache theo trạng thái phiên và mức biến động hiện tại
     
     Args:
         is_open: Phiên có đang mở không
+        *assets: Tài sản của dữ liệu (không truyền = theo biến động toàn thị trường)
         
     Returns:
-        TTL tính bằng giây
+        TTL tính bằng giây (gốc 5 phút nếu mở, 30 phút nếu đóng; ngắn lại khi
+        VIX / z-score cao, dài ra khi thị trường yên tĩnh)
     """
-    return 300 if is_open else 1800  # 5 phút nếu mở, 30 phút nếu đóng
+    base = 300 if is_open else 1800
+    key = f"session:{'open' if is_open else 'closed'}" + (f":{','.join(assets)}" if assets else "")
+    return adaptive_ttl(base, *assets, key=key)
 
 
 def render_session_bar(now_utc: datetime = None):
@@ -3,12 +3,73 @@ Session-based caching system
 Chỉ refresh data khi phiên giao dịch mới bắt đầu (4 lần/ngày)
 Cache được share giữa tất cả users để tiết kiệm API calls
 """
-from datetime import datetime, time, timezone
+from datetime import datetime, time, timedelta, timezone
+from contextlib import contextmanager
+import os
+import threading
+import time as _time
+import logging
 import pytz
 import streamlit as st
-from typing import Optional, Tuple, Any
+import sys
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FuturesTimeout
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Any
 import hashlib
+import numpy as np
+import pandas as pd
 
+from components.session_calendar import SessionCalendar
+from components.refresh_policy import RefreshPolicy, SessionBound, VolatilityAdaptive
+from components.market_state import effective_ttls, market_state
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Thư mục lưu dữ liệu persistent (bar store, disk cache)
+CACHE_DIR = os.getenv("ADA_CACHE_DIR", ".cache")
+
+# TTL (giây) trong phạm vi một phiên cho từng namespace, None = giữ cả phiên
+NAMESPACE_TTL: Dict[str, Optional[int]] = {
+    "prices": None,
+    "news": None,
+    "bold": None,
+    "ai": None,
+    "derivs": None,
+}
+DEFAULT_NAMESPACE = "default"
+
+# Refresh policy mặc định theo namespace (provider có thể truyền _policy riêng)
+# Funding / OI chạy 24/7 nên refresh theo chu kỳ (co giãn theo biến động của BTC),
+# không theo phiên
+DEFAULT_POLICY: RefreshPolicy = SessionBound()
+NAMESPACE_POLICY: Dict[str, RefreshPolicy] = {
+    "derivs": VolatilityAdaptive(base_seconds=900, asset="BTC-USD"),
+}
+
+# Thời gian tối đa chờ replica khác refresh xong một key trước khi tự fetch
+PEER_WAIT_SECONDS = float(os.getenv("ADA_CACHE_PEER_WAIT", "30"))
+_PEER_POLL_SECONDS = 0.25
+
+# Thời gian tối đa chờ fetch đang chạy (cùng key, cùng process) trước khi tự fetch
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("ADA_CACHE_SINGLE_FLIGHT_TIMEOUT", "60"))
+
+# Namespace được phép trả dữ liệu phiên trước trong lúc refresh nền (stale-while-revalidate)
+STALE_WHILE_REVALIDATE = {"prices", "news", "bold"}
+
+# Ngân sách bộ nhớ của tầng L1 (MB): vượt quá → bỏ entry ít dùng nhất (LRU),
+# entry vẫn còn ở L2 nên lần đọc sau chỉ là disk hit
+MEMORY_BUDGET_MB = float(os.getenv("ADA_CACHE_MEMORY_MB", "512"))
+
+_STAT_FIELDS = ("hits", "disk_hits", "misses", "coalesced", "stale", "evicted")
+
+# State theo thread:
+# - revalidating: thread refresh nền, không trả dữ liệu cũ (VD: bảng chỉ báo phải
+#   được tính trên panel mới, không phải panel phiên trước)
+# - now_override: thời điểm "hiện tại" giả lập (cache warmer tính trước phiên sau)
+_local = threading.local()
 
 # 4 phiên giao dịch chính trong ngày
 TRADING_SESSIONS = [
@@ -39,10 +100,32 @@ TRADING_SESSIONS = [
 ]
 
 
+# Timeline biên dịch của TRADING_SESSIONS (DST, cuối tuần, ngày nghỉ) - tra cứu bằng bisect
+_trading_calendar = SessionCalendar(TRADING_SESSIONS, idle_name="Off-Market")
+
+
+def get_trading_calendar() -> SessionCalendar:
+    """Timeline biên dịch của TRADING_SESSIONS"""
+    return _trading_calendar
+
+
+def current_time() -> datetime:
+    """Thời điểm hiện tại (UTC) - hoặc thời điểm giả lập trong session_override"""
+    return getattr(_local, "now_override", None) or datetime.now(timezone.utc)
+
+
+def policy_for(namespace: str) -> RefreshPolicy:
+    """Refresh policy mặc định của namespace"""
+    return NAMESPACE_POLICY.get(namespace, DEFAULT_POLICY)
+
+
 def get_current_session(now_utc: Optional[datetime] = None) -> Tuple[str, datetime]:
     """
     Xác định phiên giao dịch hiện tại
     
+    Phiên chồng nhau → phiên đứng trước trong TRADING_SESSIONS được ưu tiên.
+    Cuối tuần và ngày nghỉ của sàn (EXCHANGE_HOLIDAY_RULES) → "Off-Market".
+    
     Args:
         now_utc: Thời gian UTC (None = lấy thời gian hiện tại)
         
@@ -50,32 +133,11 @@ def get_current_session(now_utc: Optional[datetime] = None) -> Tuple[str, dateti
         Tuple (session_name, session_start_utc)
     """
     if now_utc is None:
-        now_utc = datetime.now(timezone.utc)
+        now_utc = current_time()
     
-    # Kiểm tra từng phiên
-    for session in TRADING_SESSIONS:
-        tz = pytz.timezone(session["timezone"])
-        local_now = now_utc.astimezone(tz)
-        
-        # Tạo datetime cho start và end trong ngày hiện tại
-        start_dt = local_now.replace(
-            hour=session["start"].hour,
-            minute=session["start"].minute,
-            second=0,
-            microsecond=0
-        )
-        end_dt = local_now.replace(
-            hour=session["end"].hour,
-            minute=session["end"].minute,
-            second=0,
-            microsecond=0
-        )
-        
-        # Kiểm tra nằm trong phiên
-        if start_dt <= local_now <= end_dt:
-            # Convert start_dt sang UTC
-            session_start_utc = start_dt.astimezone(timezone.utc)
-            return session["name"], session_start_utc
+    active = _trading_calendar.lookup(now_utc)
+    if active is not None:
+        return active
     
     # Nếu không phiên nào active, trả về "Off-Market"
     # Session start = đầu ngày UTC
@@ -83,6 +145,41 @@ def get_current_session(now_utc: Optional[datetime] = None) -> Tuple[str, dateti
     return "Off-Market", session_start_utc
 
 
+def next_session_boundary(now_utc: Optional[datetime] = None) -> Tuple[datetime, str]:
+    """
+    Thời điểm gần nhất mà phiên (và do đó cache key) sẽ đổi
+
+    Args:
+        now_utc: Thời gian UTC (None = lấy thời gian hiện tại)
+
+    Returns:
+        Tuple (boundary_utc, tên phiên bắt đầu từ boundary)
+    """
+    if now_utc is None:
+        now_utc = datetime.now(timezone.utc)
+
+    # Mốc kế tiếp của timeline (Off-Market đã được chia theo ngày UTC)
+    edge = _trading_calendar.next_edge(now_utc)
+    if edge is None:
+        edge = now_utc.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    return edge, get_current_session(edge)[0]
+
+
+@contextmanager
+def session_override(now_utc: datetime) -> Iterator[None]:
+    """
+    Trong block này (chỉ thread hiện tại), phiên và cache key được tính như thể
+    thời gian là now_utc - dùng để tính trước dữ liệu của phiên sắp tới.
+    Dữ liệu cũ không được trả trong block (luôn fetch cho key mới).
+    """
+    previous = (getattr(_local, "now_override", None), getattr(_local, "revalidating", False))
+    _local.now_override, _local.revalidating = now_utc, True
+    try:
+        yield
+    finally:
+        _local.now_override, _local.revalidating = previous
+
+
 def get_session_cache_key(cache_type: str = "market_data") -> str:
     """
     Tạo cache key dựa trên phiên hiện tại
@@ -94,30 +191,672 @@ def get_session_cache_key(cache_type: str = "market_data") -> str:
     Returns:
         Cache key string (VD: "market_data_2025-11-19_Asia")
     """
+    return f"{cache_type}_{session_label()}"
+
+
+def session_label() -> str:
+    """
+    Nhãn của phiên hiện tại, phần chung của mọi session cache key
+
+    Returns:
+        Nhãn "YYYY-MM-DD_Tên" (VD: "2025-11-19_Asia")
+    """
     session_name, session_start = get_current_session()
-    date_str = session_start.strftime("%Y-%m-%d")
-    
-    return f"{cache_type}_{date_str}_{session_name}"
+    return f"{session_start.strftime('%Y-%m-%d')}_{session_name}"
 
 
-# Wrapper functions để cache data với session-based key
-# Cache này được SHARE giữa tất cả users
-@st.cache_data(ttl=None, show_spinner=False)
-def _cached_fetch(_cache_key: str, _fetch_func, *args, **kwargs) -> Any:
+def _stable_repr(obj: Any) -> str:
     """
-    Internal cache wrapper - SHARED giữa tất cả users
-    
+    Biểu diễn ổn định (giữa các lần chạy / process) của argument để hash
+
+    Kiểu cơ bản và container được biểu diễn theo giá trị; object khác (VD: self
+    của provider) chỉ theo tên kiểu, vì cùng loại provider trả về cùng dữ liệu.
+    """
+    if obj is None or isinstance(obj, (bool, int, float, str, bytes)):
+        return repr(obj)
+    if isinstance(obj, (list, tuple)):
+        return f"{type(obj).__name__}({','.join(_stable_repr(o) for o in obj)})"
+    if isinstance(obj, (set, frozenset)):
+        return f"set({','.join(sorted(_stable_repr(o) for o in obj))})"
+    if isinstance(obj, dict):
+        items = sorted((_stable_repr(k), _stable_repr(v)) for k, v in obj.items())
+        return f"dict({','.join(f'{k}:{v}' for k, v in items)})"
+    if isinstance(obj, (datetime, time)):
+        return obj.isoformat()
+    return f"<{type(obj).__module__}.{type(obj).__qualname__}>"
+
+
+def _function_identity(func: Callable) -> str:
+    """Định danh đầy đủ của function: module.qualname (closure phân biệt theo hàm chứa nó)"""
+    module = getattr(func, "__module__", None) or "?"
+    qualname = getattr(func, "__qualname__", None) or getattr(func, "__name__", None) or type(func).__qualname__
+    return f"{module}.{qualname}"
+
+
+def make_cache_key(namespace: str, session_key: str, func: Callable, args: tuple, kwargs: dict) -> str:
+    """
+    Tạo cache key: namespace | session key | function identity | hash(arguments)
+
+    Giá trị closure (VD: tickers, hours_back được capture bởi `_fetch`) cũng được
+    đưa vào hash, nên cùng một closure với argument khác không bị dùng chung entry.
+
     Args:
-        _cache_key: Cache key (unused, chỉ để force invalidate)
-        _fetch_func: Function để fetch data
-        *args, **kwargs: Arguments cho fetch_func
-        
+        namespace: Namespace của dữ liệu (prices, news, bold, ai...)
+        session_key: Session cache key hiện tại
+        func: Function fetch
+        args, kwargs: Arguments của function
+
+    Returns:
+        Cache key string
+    """
+    closure = getattr(func, "__closure__", None) or ()
+    cells = []
+    for cell in closure:
+        try:
+            cells.append(cell.cell_contents)
+        except ValueError:  # cell chưa được gán
+            cells.append(None)
+
+    payload = _stable_repr((args, kwargs, cells))
+    digest = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+    return f"{namespace}|{session_key}|{_function_identity(func)}|{digest}"
+
+
+def _series_id(cache_key: str) -> str:
+    """Cache key bỏ phần session: cùng dữ liệu qua các phiên khác nhau"""
+    namespace, _, rest = cache_key.partition("|")
+    return f"{namespace}|{rest.partition('|')[2]}"
+
+
+def estimate_size(obj: Any, _seen: Optional[set] = None) -> int:
+    """
+    Ước lượng số byte bộ nhớ của một giá trị cache
+
+    DataFrame/Series/Index tính theo memory_usage(deep=True) (gồm cả string
+    object), numpy theo nbytes, container và object (pydantic, dataclass) cộng
+    dồn các phần tử; mỗi object chỉ được tính một lần.
+
+    Args:
+        obj: Giá trị cần ước lượng
+
     Returns:
-        Cached data
+        Số byte
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum()) + int(obj.columns.memory_usage(deep=True))
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _seen) for item in obj)
+    elif not isinstance(obj, type):
+        if hasattr(obj, "__dict__"):
+            size += estimate_size(vars(obj), _seen)
+        slots = getattr(type(obj), "__slots__", ())
+        for slot in (slots,) if isinstance(slots, str) else slots:
+            size += estimate_size(getattr(obj, slot, None), _seen)
+    return size
+
+
+@dataclass
+class CacheEntry:
+    """Một entry trong shared cache"""
+    value: Any
+    namespace: str
+    created_at: float
+    expires_at: Optional[float] = None
+    size: int = 0
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        return self.expires_at is not None and (now or _time.time()) >= self.expires_at
+
+
+class SessionCache:
+    """
+    Shared cache theo phiên - SHARE giữa tất cả users
+
+    Hai tầng: L1 trong memory của process, L2 (tùy chọn, CacheBackend) trên disk
+    để worker khởi động lại - hoặc replica khác cùng host - đọc được ngay dữ liệu
+    của phiên hiện tại.
+    Entry được định danh bởi make_cache_key, mỗi namespace có TTL riêng và
+    bộ đếm hit/miss riêng.
+    L1 là LRU giới hạn theo byte (max_bytes): entry của các phiên đã qua được
+    dọn ngay khi có dữ liệu phiên mới, phần còn lại bị bỏ theo thứ tự ít dùng nhất.
     """
-    # Khi cache_key thay đổi (sang phiên mới), Streamlit sẽ tự động
-    # invalidate cache và gọi lại function này
-    return _fetch_func(*args, **kwargs)
+
+    def __init__(
+        self,
+        namespace_ttl: Optional[Dict[str, Optional[int]]] = None,
+        l2=None,
+        max_bytes: Optional[int] = None
+    ):
+        self.namespace_ttl = dict(NAMESPACE_TTL if namespace_ttl is None else namespace_ttl)
+        self.l2 = l2
+        self.max_bytes = int(MEMORY_BUDGET_MB * 1024 * 1024) if max_bytes is None else max_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._latest: Dict[str, str] = {}
+        self._revalidating: Dict[str, str] = {}
+        self._asset_series: Dict[str, set] = {}
+        self._policies: Dict[str, RefreshPolicy] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, namespace: str, field: str):
+        stats = self._stats.setdefault(namespace, dict.fromkeys(_STAT_FIELDS, 0))
+        stats[field] += 1
+
+    def _store_l1(self, key: str, entry: CacheEntry):
+        """Ghi entry vào L1 (gọi khi đang giữ lock) rồi bỏ LRU cho tới khi vừa ngân sách"""
+        self._drop_l1(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        # Không bao giờ bỏ chính entry vừa ghi (cuối OrderedDict)
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            old_key, old = self._entries.popitem(last=False)
+            self._bytes -= old.size
+            self._count(old.namespace, "evicted")
+            logger.info(f"Cache: evicted {old_key} ({old.size / 1e6:.1f} MB)")
+
+    def _drop_l1(self, key: str):
+        """Xóa entry khỏi L1 (gọi khi đang giữ lock)"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def get(self, key: str, namespace: str) -> Tuple[bool, Any]:
+        """
+        Đọc entry: L1 → L2 (hit ở L2 được đưa lên L1)
+
+        Returns:
+            Tuple (found, value) - entry hết hạn được coi là miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not entry.is_expired():
+                self._entries.move_to_end(key)
+                self._count(namespace, "hits")
+                return True, entry.value
+            if entry is not None:
+                self._drop_l1(key)
+
+        found, value = self._get_l2(key)
+        with self._lock:
+            self._count(namespace, "disk_hits" if found else "misses")
+        return found, value
+
+    def _get_l2(self, key: str) -> Tuple[bool, Any]:
+        """Đọc entry từ L2 và đưa lên L1"""
+        if self.l2 is None:
+            return False, None
+        found, entry = self.l2.get(key)
+        if found and isinstance(entry, CacheEntry) and not entry.is_expired():
+            if not entry.size:
+                entry.size = estimate_size(entry.value)
+            with self._lock:
+                self._store_l1(key, entry)
+            return True, entry.value
+        if found:
+            self.l2.delete(key)
+        return False, None
+
+    def get_or_fetch(
+        self,
+        key: str,
+        namespace: str,
+        fetch: Callable[[], Any],
+        ttl: Optional[int] = None,
+        stale_ok: bool = False
+    ) -> Any:
+        """
+        Đọc entry, nếu miss thì fetch và ghi lại
+
+        Single-flight: trong một process, mỗi key chỉ có một fetch đang chạy; các
+        caller khác chờ kết quả của nó (tối đa SINGLE_FLIGHT_TIMEOUT) và được đếm
+        vào "coalesced".
+        Với L2 dùng chung (nhiều replica): replica giành được lock của key sẽ fetch,
+        các replica khác chờ entry xuất hiện trong L2 (tối đa PEER_WAIT_SECONDS)
+        rồi mới tự fetch.
+        Stale-while-revalidate (stale_ok): khi sang phiên mới, trả ngay dữ liệu của
+        phiên trước và refresh trong thread nền; entry mới được thay vào khi xong.
+
+        Args:
+            key: Cache key
+            namespace: Namespace
+            fetch: Hàm lấy dữ liệu khi miss
+            ttl: TTL (giây), None = dùng TTL của namespace
+            stale_ok: Cho phép trả dữ liệu phiên trước trong lúc refresh
+
+        Returns:
+            Dữ liệu
+        """
+        found, value = self.get(key, namespace)
+        if found:
+            return value
+
+        if stale_ok and not getattr(_local, "revalidating", False):
+            found, value = self._get_stale(key)
+            if found:
+                with self._lock:
+                    self._count(namespace, "stale")
+                self._revalidate(key, namespace, fetch, ttl)
+                return value
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            try:
+                value = future.result(timeout=SINGLE_FLIGHT_TIMEOUT)
+            except FuturesTimeout:
+                logger.warning(f"Cache: in-flight fetch of {key} timed out, fetching again")
+                return self._fetch_and_store(key, namespace, fetch, ttl)
+            with self._lock:
+                self._count(namespace, "coalesced")
+            return value
+
+        return self._lead(key, namespace, fetch, ttl, future)
+
+    def _lead(self, key: str, namespace: str, fetch: Callable[[], Any], ttl: Optional[int], future: Future) -> Any:
+        """Fetch với tư cách leader của key, công bố kết quả cho các caller đang chờ"""
+        try:
+            value = self._fetch_and_store(key, namespace, fetch, ttl)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self._revalidating.pop(key, None)
+
+    def _get_stale(self, key: str) -> Tuple[bool, Any]:
+        """Tìm entry gần nhất (phiên trước) của cùng dữ liệu, bỏ qua TTL"""
+        series = _series_id(key)
+        with self._lock:
+            previous = self._latest.get(series)
+        if previous is None and self.l2 is not None:
+            found, previous = self.l2.get("latest|" + series)
+            previous = previous if found else None
+        if previous is None or previous == key:
+            return False, None
+
+        with self._lock:
+            entry = self._entries.get(previous)
+        if entry is None and self.l2 is not None:
+            found, entry = self.l2.get(previous)
+            entry = entry if found else None
+        if not isinstance(entry, CacheEntry):
+            return False, None
+        return True, entry.value
+
+    def _revalidate(self, key: str, namespace: str, fetch: Callable[[], Any], ttl: Optional[int]):
+        """Refresh key trong thread nền (bỏ qua nếu đang có fetch cho key này)"""
+        with self._lock:
+            if key in self._inflight:
+                return
+            future = Future()
+            self._inflight[key] = future
+            self._revalidating[key] = namespace
+
+        def run():
+            _local.revalidating = True
+            try:
+                self._lead(key, namespace, fetch, ttl, future)
+                logger.info(f"Cache: revalidated {key}")
+            except Exception as e:
+                logger.error(f"Cache: background refresh of {key} failed: {e}")
+
+        threading.Thread(target=run, name="cache-revalidate", daemon=True).start()
+
+    def is_revalidating(self, namespace: str) -> bool:
+        """True nếu namespace đang được refresh nền (dữ liệu đang phục vụ là của phiên trước)"""
+        with self._lock:
+            return namespace in self._revalidating.values()
+
+    def _fetch_and_store(self, key: str, namespace: str, fetch: Callable[[], Any], ttl: Optional[int]) -> Any:
+        """Fetch và ghi entry (qua lock L2 nếu có)"""
+        token = None
+        if self.l2 is not None:
+            token = self.l2.acquire_lock(key)
+            if token is None:
+                found, value = self._wait_for_peer(key)
+                if found:
+                    return value
+                logger.warning(f"Cache: peer refresh of {key} timed out, fetching locally")
+
+        try:
+            value = fetch()
+            self.set(key, value, namespace, ttl)
+        finally:
+            if token is not None:
+                self.l2.release_lock(key, token)
+        return value
+
+    def _wait_for_peer(self, key: str) -> Tuple[bool, Any]:
+        """Chờ replica đang giữ lock ghi entry vào L2"""
+        deadline = _time.monotonic() + PEER_WAIT_SECONDS
+        while _time.monotonic() < deadline:
+            _time.sleep(_PEER_POLL_SECONDS)
+            found, value = self._get_l2(key)
+            if found:
+                return True, value
+            token = self.l2.acquire_lock(key)
+            if token is not None:
+                # Replica kia đã trả lock mà không ghi (lỗi) → tự fetch
+                self.l2.release_lock(key, token)
+                return False, None
+        return False, None
+
+    def set(self, key: str, value: Any, namespace: str, ttl: Optional[int] = None):
+        """
+        Ghi entry
+
+        Args:
+            key: Cache key
+            value: Dữ liệu
+            namespace: Namespace
+            ttl: TTL (giây), None = dùng TTL của namespace
+        """
+        if ttl is None:
+            ttl = self.namespace_ttl.get(namespace)
+        now = _time.time()
+        entry = CacheEntry(value, namespace, now, now + ttl if ttl else None, estimate_size(value))
+        series = _series_id(key)
+        with self._lock:
+            self._store_l1(key, entry)
+            self._latest[series] = key
+        if self.l2 is not None:
+            self.l2.set(key, entry)
+            self.l2.set("latest|" + series, key)
+        # Cache warmer ghi trước key phiên sau: chưa phải lúc dọn phiên hiện tại
+        if getattr(_local, "now_override", None) is None:
+            self.purge_past_sessions()
+
+    def purge_past_sessions(self) -> int:
+        """
+        Bỏ khỏi L1 các entry của phiên (bucket của refresh policy) đã qua
+
+        Entry vẫn là bản mới nhất của dữ liệu đó (_latest) được giữ lại để
+        stale-while-revalidate còn dùng được cho tới khi phiên mới có dữ liệu.
+
+        Returns:
+            Số entry đã bỏ
+        """
+        now = current_time()
+        current: Dict[Tuple[str, RefreshPolicy], str] = {}
+        purged = 0
+        with self._lock:
+            latest = set(self._latest.values())
+            for key in list(self._entries):
+                if key in latest:
+                    continue
+                namespace, session_key = key.split("|", 2)[:2]
+                policy = self._policies.get(_series_id(key)) or policy_for(namespace)
+                if (namespace, policy) not in current:
+                    current[namespace, policy] = f"{namespace}_{policy.bucket(now)}"
+                if session_key != current[namespace, policy]:
+                    self._drop_l1(key)
+                    purged += 1
+        if purged:
+            logger.info(f"Cache: purged {purged} entries from past sessions")
+        return purged
+
+    def bind_policy(self, key: str, policy: RefreshPolicy) -> None:
+        """Ghi nhận refresh policy riêng của dữ liệu (khác mặc định của namespace)"""
+        series = _series_id(key)
+        if self._policies.get(series) != policy:
+            with self._lock:
+                self._policies[series] = policy
+
+    def tag_assets(self, key: str, assets) -> None:
+        """Ghi nhận các tài sản mà dữ liệu của key bao gồm (cho invalidate theo asset)"""
+        series = _series_id(key)
+        with self._lock:
+            for asset in assets:
+                self._asset_series.setdefault(asset, set()).add(series)
+
+    def invalidate(
+        self,
+        namespace: Optional[str] = None,
+        asset: Optional[str] = None,
+        session: Optional[str] = None
+    ) -> int:
+        """
+        Bỏ các entry khớp TẤT CẢ điều kiện (None = không lọc) ở cả hai tầng
+
+        Con trỏ "latest" của dữ liệu bị bỏ cũng bị xóa, nên lần đọc sau fetch mới
+        thay vì trả dữ liệu phiên trước.
+
+        Args:
+            namespace: Namespace (prices, news, ai, bold, derivs...)
+            asset: Tài sản (theo tag_assets)
+            session: Nhãn phiên "YYYY-MM-DD_Tên" (xem session_label). Nhãn phiên
+                hiện tại khớp cả bucket hiện tại của refresh policy riêng của
+                từng dữ liệu (VD: "every960s_..." của derivs, Composite của panel)
+
+        Returns:
+            Số entry đã bỏ
+        """
+        with self._lock:
+            series_filter = None if asset is None else set(self._asset_series.get(asset, ()))
+            policies = dict(self._policies)
+        now = current_time()
+        is_current = session is not None and session == session_label()
+        current_buckets: Dict[Tuple[str, RefreshPolicy], str] = {}
+
+        def in_session(ns: str, session_key: str, series: str) -> bool:
+            if session is None or session_key == f"{ns}_{session}":
+                return True
+            if not is_current:
+                return False
+            policy = policies.get(series) or policy_for(ns)
+            if (ns, policy) not in current_buckets:
+                current_buckets[ns, policy] = f"{ns}_{policy.bucket(now)}"
+            return session_key == current_buckets[ns, policy]
+
+        def matches(key: str) -> bool:
+            parts = key.split("|", 2)
+            if len(parts) < 3:
+                return False
+            ns, session_key, rest = parts
+            series = f"{ns}|{rest}"
+            return ((namespace is None or ns == namespace)
+                    and (series_filter is None or series in series_filter)
+                    and in_session(ns, session_key, series))
+
+        with self._lock:
+            doomed = [key for key in self._entries if matches(key)]
+            for key in doomed:
+                self._drop_l1(key)
+            for series, key in list(self._latest.items()):
+                if matches(key):
+                    del self._latest[series]
+        removed = set(doomed)
+
+        if self.l2 is not None:
+            prefixes = [""] if namespace is None else [f"{namespace}|", f"latest|{namespace}|"]
+            for prefix in prefixes:
+                for key in self.l2.keys(prefix):
+                    if key.startswith("latest|"):
+                        found, target = self.l2.get(key)
+                        if found and isinstance(target, str) and matches(target):
+                            self.l2.delete(key)
+                    elif matches(key):
+                        self.l2.delete(key)
+                        removed.add(key)
+
+        logger.info(f"Cache: invalidated {len(removed)} entries "
+                    f"(namespace={namespace}, asset={asset}, session={session})")
+        return len(removed)
+
+    def latest_entries(self, namespaces: Optional[Iterable[str]] = None) -> Dict[str, CacheEntry]:
+        """
+        Entry mới nhất (còn hạn) của mỗi dữ liệu ở cả hai tầng - dữ liệu mà
+        request kế tiếp sẽ được phục vụ
+
+        Args:
+            namespaces: Chỉ lấy các namespace này (None = tất cả)
+
+        Returns:
+            Dict cache key -> CacheEntry
+        """
+        wanted = None if namespaces is None else set(namespaces)
+        with self._lock:
+            latest = dict(self._latest)
+        if self.l2 is not None:
+            for pointer in self.l2.keys("latest|"):
+                series = pointer[len("latest|"):]
+                if series not in latest:
+                    found, key = self.l2.get(pointer)
+                    if found and isinstance(key, str):
+                        latest[series] = key
+
+        result = {}
+        for key in latest.values():
+            if wanted is not None and key.split("|", 1)[0] not in wanted:
+                continue
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None and self.l2 is not None:
+                found, entry = self.l2.get(key)
+                entry = entry if found else None
+            if isinstance(entry, CacheEntry) and not entry.is_expired():
+                result[key] = entry
+        return result
+
+    def assets_of(self, key: str) -> List[str]:
+        """Các tài sản đã tag cho dữ liệu của key"""
+        series = _series_id(key)
+        with self._lock:
+            return sorted(asset for asset, tagged in self._asset_series.items() if series in tagged)
+
+    def restore(self, key: str, entry: CacheEntry, assets: Iterable[str] = ()) -> bool:
+        """
+        Nạp entry từ nguồn ngoài (cache bundle) vào cả hai tầng
+
+        Entry hết hạn, hoặc cũ hơn bản đang có của cùng dữ liệu, bị bỏ qua.
+
+        Args:
+            key: Cache key
+            entry: CacheEntry (created_at giữ nguyên thời điểm fetch gốc)
+            assets: Tài sản của dữ liệu (cho invalidate theo asset)
+
+        Returns:
+            True nếu đã nạp
+        """
+        if entry.is_expired():
+            return False
+        series = _series_id(key)
+        with self._lock:
+            current = self._entries.get(self._latest.get(series, ""))
+            if current is not None and current.created_at >= entry.created_at:
+                return False
+            if not entry.size:
+                entry.size = estimate_size(entry.value)
+            self._store_l1(key, entry)
+            self._latest[series] = key
+            for asset in assets:
+                self._asset_series.setdefault(asset, set()).add(series)
+        if self.l2 is not None:
+            self.l2.set(key, entry)
+            self.l2.set("latest|" + series, key)
+        return True
+
+    def clear(self):
+        """Xóa toàn bộ entries ở cả hai tầng (giữ lại stats)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._latest.clear()
+        if self.l2 is not None:
+            self.l2.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Thống kê hit/miss theo namespace
+
+        Returns:
+            Dict namespace -> {hits, disk_hits, misses, coalesced, stale, evicted, entries, bytes}
+        """
+        with self._lock:
+            result = {ns: dict(counts, entries=0, bytes=0) for ns, counts in self._stats.items()}
+            for entry in self._entries.values():
+                result.setdefault(entry.namespace, dict.fromkeys(_STAT_FIELDS + ("entries", "bytes"), 0))
+                result[entry.namespace]["entries"] += 1
+                result[entry.namespace]["bytes"] += entry.size
+        return result
+
+    def memory_usage(self) -> Tuple[int, int]:
+        """
+        Bộ nhớ L1 đang dùng
+
+        Returns:
+            Tuple (số byte đang dùng, ngân sách byte)
+        """
+        with self._lock:
+            return self._bytes, self.max_bytes
+
+
+def _create_l2():
+    """Tạo tầng L2 theo ADA_CACHE_BACKEND (None nếu tắt hoặc không khởi tạo được)"""
+    from components.cache_backends import create_backend
+
+    try:
+        return create_backend(CACHE_DIR)
+    except Exception as e:
+        logger.warning(f"Cache L2 disabled: {e}")
+        return None
+
+
+_session_cache: Optional[SessionCache] = None
+_session_cache_lock = threading.Lock()
+
+
+def get_session_cache() -> SessionCache:
+    """
+    Get singleton instance of SessionCache
+
+    Lần tạo đầu tiên nạp cache bundle ở ADA_CACHE_BUNDLE (nếu có) để worker mới
+    phục vụ ngay mà không phải gọi lại các nguồn dữ liệu.
+    """
+    global _session_cache
+    with _session_cache_lock:
+        if _session_cache is None:
+            _session_cache = SessionCache(l2=_create_l2())
+            _load_startup_bundle(_session_cache)
+    return _session_cache
+
+
+def _load_startup_bundle(cache: SessionCache):
+    """Nạp bundle ở ADA_CACHE_BUNDLE vào cache (lỗi chỉ ghi log)"""
+    path = os.getenv("ADA_CACHE_BUNDLE")
+    if not path:
+        return
+    from components.cache_bundle import import_bundle
+
+    try:
+        import_bundle(path, cache=cache)
+    except Exception as e:
+        logger.warning(f"Cache bundle {path} not loaded: {e}")
 
 
 def should_refresh_cache(last_update: Optional[datetime] = None) -> bool:
@@ -140,31 +879,129 @@ def should_refresh_cache(last_update: Optional[datetime] = None) -> bool:
     return last_update < current_start
 
 
-def get_cached_data(_fetch_func, *args, **kwargs) -> Any:
+def get_cached_data(
+    _fetch_func,
+    *args,
+    _namespace: str = DEFAULT_NAMESPACE,
+    _ttl: Optional[int] = None,
+    _stale_ok: Optional[bool] = None,
+    _assets: Optional[Iterable[str]] = None,
+    _policy: Optional[RefreshPolicy] = None,
+    **kwargs
+) -> Any:
     """
     Lấy data từ shared cache hoặc fetch mới nếu cần
     
     Cơ chế:
-    - Cache key dựa trên phiên hiện tại
-    - Khi sang phiên mới → cache key thay đổi → auto refresh
+    - Cache key = namespace + bucket của refresh policy (mặc định: phiên hiện tại)
+      + function (module.qualname) + hash arguments
+    - Khi sang bucket mới (phiên mới, hết chu kỳ...) → cache key thay đổi → auto refresh
     - Cache được SHARE giữa tất cả users → chỉ user đầu tiên fetch
+    - Namespace trong STALE_WHILE_REVALIDATE: sang phiên mới vẫn trả ngay dữ liệu
+      phiên trước, refresh chạy nền
     
     Args:
-        _fetch_func: Function để fetch data (VD: lambda: fetch_prices(...))
+        _fetch_func: Function để fetch data (VD: _load_price_panel)
         *args, **kwargs: Arguments cho fetch_func
+        _namespace: Namespace của dữ liệu (prices, news, bold, ai...)
+        _ttl: TTL (giây) trong phiên, None = theo NAMESPACE_TTL
+        _stale_ok: Cho phép stale-while-revalidate, None = theo STALE_WHILE_REVALIDATE
+        _assets: Các tài sản có trong dữ liệu (để invalidate_cache(asset=...) tìm được)
+        _policy: Refresh policy của dữ liệu, None = NAMESPACE_POLICY / SessionBound
         
     Returns:
         Cached hoặc fresh data
     """
-    # Tạo cache key dựa trên function name
-    func_name = _fetch_func.__name__ if hasattr(_fetch_func, '__name__') else 'data'
-    cache_key = get_session_cache_key(func_name)
+    default_policy = policy_for(_namespace)
+    policy = default_policy if _policy is None else _policy
+    session_key = f"{_namespace}_{policy.bucket(current_time())}"
+    cache_key = make_cache_key(_namespace, session_key, _fetch_func, args, kwargs)
+    
+    if _stale_ok is None:
+        _stale_ok = _namespace in STALE_WHILE_REVALIDATE
     
-    # Gọi cached function - Streamlit sẽ tự động:
-    # 1. Check cache dựa trên cache_key
-    # 2. Nếu cache_key khác (phiên mới) → invalidate và fetch mới
-    # 3. Nếu cache_key giống → return cached data (SHARED cho tất cả users)
-    return _cached_fetch(cache_key, _fetch_func, *args, **kwargs)
+    cache = get_session_cache()
+    if policy != default_policy:
+        cache.bind_policy(cache_key, policy)
+    if _assets:
+        cache.tag_assets(cache_key, _assets)
+    return cache.get_or_fetch(
+        cache_key, _namespace, lambda: _fetch_func(*args, **kwargs), _ttl, _stale_ok
+    )
+
+
+def is_data_fresh(*namespaces: str) -> bool:
+    """
+    Dữ liệu của các namespace có thuộc phiên hiện tại không
+
+    Returns:
+        False nếu có namespace đang phục vụ dữ liệu phiên trước (đang refresh nền)
+    """
+    cache = get_session_cache()
+    return not any(cache.is_revalidating(ns) for ns in namespaces)
+
+
+# Cache nằm ngoài SessionCache (st.cache_data, bar store...) cần bỏ cùng namespace
+# hook(asset): asset = None → bỏ toàn bộ
+_invalidation_hooks: Dict[str, List[Callable[[Optional[str]], None]]] = {}
+
+
+def on_invalidate(namespace: str, hook: Callable[[Optional[str]], None]):
+    """
+    Đăng ký hook chạy khi namespace bị invalidate (VD: xóa st.cache_data của provider)
+
+    Args:
+        namespace: Namespace
+        hook: Hàm nhận asset (None = toàn bộ namespace)
+    """
+    hooks = _invalidation_hooks.setdefault(namespace, [])
+    if hook not in hooks:
+        hooks.append(hook)
+
+
+def invalidate_cache(*namespaces: str, asset: Optional[str] = None, session: Optional[str] = None) -> int:
+    """
+    Bỏ có chọn lọc dữ liệu trong shared cache - dữ liệu khác (VD: nhận định AI,
+    Bold.Report) của mọi user được giữ nguyên
+
+    Args:
+        *namespaces: Các namespace cần bỏ (không truyền = mọi namespace)
+        asset: Chỉ bỏ dữ liệu có chứa tài sản này
+        session: Chỉ bỏ dữ liệu của phiên này (nhãn session_label())
+
+    Returns:
+        Số entry đã bỏ
+    """
+    cache = get_session_cache()
+    targets = namespaces or (None,)
+    removed = 0
+    for namespace in targets:
+        removed += cache.invalidate(namespace, asset=asset, session=session)
+        for ns, hooks in _invalidation_hooks.items():
+            if namespace is not None and ns != namespace:
+                continue
+            for hook in hooks:
+                try:
+                    hook(asset)
+                except Exception as e:
+                    logger.warning(f"Cache: invalidation hook for {ns} failed: {e}")
+    return removed
+
+
+def clear_shared_cache():
+    """Xóa TOÀN BỘ shared cache theo phiên và cache của Streamlit"""
+    get_session_cache().clear()
+    st.cache_data.clear()
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Thống kê hit/miss của shared cache theo namespace"""
+    return get_session_cache().stats()
+
+
+def cache_memory_usage() -> Tuple[int, int]:
+    """Bộ nhớ L1 của shared cache: (số byte đang dùng, ngân sách byte)"""
+    return get_session_cache().memory_usage()
 
 
 def set_cached_data(cache_key: str, data: any):
@@ -208,6 +1045,27 @@ def render_session_info():
         """)
     else:
         st.info(f"📊 **Trạng thái:** {session_name} - Ngoài giờ giao dịch")
+    
+    stats = cache_stats()
+    if stats:
+        st.caption(" | ".join(
+            f"{ns}: {s['hits']} hit / {s['disk_hits']} disk / {s['misses']} miss / "
+            f"{s['coalesced']} coalesced / {s['stale']} stale / {s['evicted']} evicted "
+            f"({s['entries']} entries, {s['bytes'] / 1e6:.1f} MB)"
+            for ns, s in sorted(stats.items())
+        ))
+    
+    used, budget = cache_memory_usage()
+    st.caption(f"🧠 Cache memory: {used / 1024 ** 2:.1f} / {budget / 1024 ** 2:.0f} MB")
+    
+    state = market_state()
+    ttls = effective_ttls()
+    if ttls:
+        vix = f", VIX {state['vix']:.1f}" if state["vix"] is not None else ""
+        st.caption(f"⏱️ TTL hiệu lực (hệ số biến động {state['market_factor']:.2f}{vix}): " + " | ".join(
+            f"{key}: {info['ttl']}s (gốc {info['base']}s, x{info['factor']:.2f})"
+            for key, info in sorted(ttls.items())
+        ))
 
 
 # Helper functions cho việc sử dụng
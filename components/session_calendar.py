@@ -0,0 +1,244 @@
+"""
+Lịch phiên giao dịch đã biên dịch (compiled session timeline)
+Mở rộng danh sách phiên (giờ địa phương) thành các khoảng UTC cho một cửa sổ
+ngày trượt - đã xử lý DST (pytz localize theo từng ngày), cuối tuần và ngày nghỉ
+của sàn - để tra cứu phiên chỉ còn một lần bisect thay vì chuyển timezone cho
+từng phiên ở mỗi lần gọi
+"""
+import threading
+from bisect import bisect_right
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import holidays
+import pytz
+
+# Ngày nghỉ toàn phiên của các sàn (theo ngày địa phương), key = timezone của phiên
+# Sinh theo quy tắc (package holidays: Good Friday, ngày nghỉ bù, âm lịch...) cho
+# mọi năm; nửa phiên (early close) được coi như ngày giao dịch bình thường
+EXCHANGE_HOLIDAY_RULES: Dict[str, Callable[[List[int]], Iterable[date]]] = {
+    "America/New_York": lambda years: holidays.financial_holidays("NYSE", years=years),
+    # LSE đóng cửa theo bank holiday của England & Wales
+    "Europe/London": lambda years: holidays.UnitedKingdom(subdiv="ENG", years=years),
+    # SGX đóng cửa theo ngày nghỉ lễ Singapore (kể cả ngày nghỉ bù)
+    "Asia/Singapore": lambda years: holidays.Singapore(years=years),
+}
+
+
+@lru_cache(maxsize=None)
+def exchange_holidays(tz_name: str, year: int) -> FrozenSet[date]:
+    """
+    Ngày nghỉ toàn phiên của sàn theo timezone trong một năm
+
+    Args:
+        tz_name: Timezone của phiên (key trong EXCHANGE_HOLIDAY_RULES)
+        year: Năm
+
+    Returns:
+        Tập ngày nghỉ (rỗng nếu timezone không có quy tắc)
+    """
+    rule = EXCHANGE_HOLIDAY_RULES.get(tz_name)
+    return frozenset() if rule is None else frozenset(rule([year]))
+
+
+# Cửa sổ biên dịch quanh thời điểm tra cứu (ngày)
+DAYS_BACK = 3
+DAYS_AHEAD = 14
+
+# Giờ kết thúc phiên được tính vào phiên (start <= now <= end): khoảng UTC lưu
+# dạng [start, end + 1µs) để bisect trên mốc nửa mở
+_END_INCLUSIVE = timedelta(microseconds=1)
+
+
+class SessionCalendar:
+    """
+    Timeline các phiên giao dịch trong cửa sổ [now - DAYS_BACK, now + DAYS_AHEAD]
+
+    - lookup(): phiên đang active theo thứ tự ưu tiên của danh sách (phiên đứng
+      trước thắng khi các phiên chồng lên nhau), giống vòng lặp trên danh sách gốc
+    - is_open(): một phiên cụ thể có đang mở không (bỏ qua ưu tiên)
+    - idle_name: nếu có, khoảng không phiên nào mở được gán (idle_name, nửa đêm UTC)
+      theo từng ngày UTC, nên lookup() luôn trả về một phiên
+    Thời điểm nằm ngoài cửa sổ → biên dịch lại quanh thời điểm đó.
+    """
+
+    def __init__(
+        self,
+        sessions: List[Dict],
+        holidays: Optional[Dict[str, FrozenSet[date]]] = None,
+        idle_name: Optional[str] = None,
+        days_back: int = DAYS_BACK,
+        days_ahead: int = DAYS_AHEAD
+    ):
+        """
+        Args:
+            sessions: List dict với keys name, timezone, start, end (giờ địa phương)
+            holidays: Dict timezone -> tập ngày nghỉ cố định (None = theo quy tắc, exchange_holidays)
+            idle_name: Tên gán cho khoảng ngoài mọi phiên (None = không gán)
+            days_back: Số ngày biên dịch trước thời điểm tra cứu
+            days_ahead: Số ngày biên dịch sau thời điểm tra cứu
+        """
+        self.sessions = sessions
+        self.holidays = holidays
+        self.idle_name = idle_name
+        self.days_back = days_back
+        self.days_ahead = days_ahead
+        self._lock = threading.Lock()
+        self._compiled = None
+
+    def _closed_days(self, tz_name: str, first: date, last: date) -> FrozenSet[date]:
+        """Ngày nghỉ của sàn theo timezone trong các năm chứa [first, last]"""
+        if self.holidays is not None:
+            return self.holidays.get(tz_name, frozenset())
+        return frozenset().union(*(exchange_holidays(tz_name, year) for year in range(first.year, last.year + 1)))
+
+    def _session_intervals(self, session: Dict, first: date, last: date) -> List[Tuple[datetime, datetime]]:
+        """Các khoảng UTC [start, end) của một phiên, bỏ cuối tuần và ngày nghỉ"""
+        tz = pytz.timezone(session["timezone"])
+        closed = self._closed_days(session["timezone"], first, last)
+        intervals = []
+        day = first
+        while day <= last:
+            if day.weekday() < 5 and day not in closed:
+                start = tz.localize(datetime.combine(day, session["start"])).astimezone(timezone.utc)
+                end = tz.localize(datetime.combine(day, session["end"])).astimezone(timezone.utc)
+                intervals.append((start, end + _END_INCLUSIVE))
+            day += timedelta(days=1)
+        return intervals
+
+    def _compile(self, center: datetime):
+        """
+        Biên dịch timeline quanh `center`
+
+        Returns:
+            Tuple (lo, hi, edges, slots, per_session):
+            - edges[i] .. edges[i+1]: segment gán cho slots[i] = (name, session_start_utc) hoặc None
+            - per_session: name -> (starts, ends) theo timestamp
+        """
+        center_day = center.astimezone(timezone.utc).date()
+        # Dư một ngày mỗi đầu vì ngày địa phương lệch ngày UTC
+        first = center_day - timedelta(days=self.days_back + 1)
+        last = center_day + timedelta(days=self.days_ahead + 1)
+
+        per_session = {}
+        prioritized = []
+        for session in self.sessions:
+            intervals = self._session_intervals(session, first, last)
+            per_session[session["name"]] = (
+                [s.timestamp() for s, _ in intervals],
+                [e.timestamp() for _, e in intervals],
+            )
+            prioritized.append((session["name"], intervals))
+
+        # Các segment không chồng nhau: mỗi khoảng giữa hai mốc liên tiếp thuộc
+        # phiên đầu tiên (theo thứ tự ưu tiên) bao phủ nó
+        points = {t for _, intervals in prioritized for interval in intervals for t in interval}
+        if self.idle_name is not None:
+            points.update(
+                datetime.combine(first + timedelta(days=n), datetime.min.time(), timezone.utc)
+                for n in range((last - first).days + 2)
+            )
+        points = sorted(points)
+        edges, slots = [], []
+        for left, right in zip(points, points[1:]):
+            owner = None
+            for name, intervals in prioritized:
+                hit = next((s for s, e in intervals if s <= left and right <= e), None)
+                if hit is not None:
+                    owner = (name, hit)
+                    break
+            if owner is None and self.idle_name is not None:
+                owner = (self.idle_name, left.replace(hour=0, minute=0, second=0, microsecond=0))
+            if slots and slots[-1] == owner:
+                continue
+            edges.append(left.timestamp())
+            slots.append(owner)
+        if points:
+            edges.append(points[-1].timestamp())
+            slots.append(None)
+
+        window_start = datetime.combine(center_day - timedelta(days=self.days_back), datetime.min.time(), timezone.utc)
+        window_end = datetime.combine(center_day + timedelta(days=self.days_ahead), datetime.min.time(), timezone.utc)
+        return window_start.timestamp(), window_end.timestamp(), edges, slots, per_session
+
+    def _timeline(self, ts: float, now_utc: datetime):
+        compiled = self._compiled
+        if compiled is None or not compiled[0] <= ts < compiled[1]:
+            with self._lock:
+                compiled = self._compiled
+                if compiled is None or not compiled[0] <= ts < compiled[1]:
+                    compiled = self._compile(now_utc)
+                    self._compiled = compiled
+        return compiled
+
+    def lookup(self, now_utc: datetime) -> Optional[Tuple[str, datetime]]:
+        """
+        Phiên đang active tại now_utc
+
+        Args:
+            now_utc: Thời điểm (timezone-aware)
+
+        Returns:
+            Tuple (session_name, session_start_utc), None nếu không phiên nào mở
+        """
+        ts = now_utc.timestamp()
+        _, _, edges, slots, _ = self._timeline(ts, now_utc)
+        i = bisect_right(edges, ts) - 1
+        return slots[i] if i >= 0 else None
+
+    def is_open(self, name: str, now_utc: datetime) -> bool:
+        """
+        Phiên `name` có đang mở tại now_utc không
+
+        Args:
+            name: Tên phiên
+            now_utc: Thời điểm (timezone-aware)
+
+        Returns:
+            True nếu đang mở
+        """
+        ts = now_utc.timestamp()
+        starts, ends = self._timeline(ts, now_utc)[4].get(name, ((), ()))
+        i = bisect_right(starts, ts) - 1
+        return i >= 0 and ts < ends[i]
+
+    def next_edge(self, now_utc: datetime) -> Optional[datetime]:
+        """
+        Mốc gần nhất sau now_utc mà kết quả lookup() thay đổi
+
+        Args:
+            now_utc: Thời điểm (timezone-aware)
+
+        Returns:
+            Thời điểm UTC, None nếu không có mốc nào trong cửa sổ
+        """
+        ts = now_utc.timestamp()
+        edges = self._timeline(ts, now_utc)[2]
+        i = bisect_right(edges, ts)
+        return datetime.fromtimestamp(edges[i], timezone.utc) if i < len(edges) else None
+
+    def bounds(self, name: str, now_utc: datetime) -> Tuple[bool, Optional[datetime], Optional[datetime]]:
+        """
+        Trạng thái của phiên `name` và hai mốc mở/đóng gần nhất quanh now_utc
+
+        Args:
+            name: Tên phiên
+            now_utc: Thời điểm (timezone-aware)
+
+        Returns:
+            Tuple (is_open, mốc trước, mốc sau):
+            - đang mở: (True, giờ mở, giờ đóng)
+            - đang đóng: (False, lần đóng gần nhất, lần mở kế tiếp)
+            Mốc nằm ngoài cửa sổ biên dịch → None
+        """
+        ts = now_utc.timestamp()
+        starts, ends = self._timeline(ts, now_utc)[4].get(name, ((), ()))
+        i = bisect_right(starts, ts) - 1
+
+        def at(values, j):
+            return datetime.fromtimestamp(values[j], timezone.utc) if 0 <= j < len(values) else None
+
+        if i >= 0 and ts < ends[i]:
+            return True, at(starts, i), at(ends, i)
+        return False, at(ends, i), at(starts, i + 1)
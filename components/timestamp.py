@@ -2,6 +2,7 @@
 Component hiển thị timestamp với timezone
 """
 from datetime import datetime
+from typing import Optional
 import pytz
 import streamlit as st
 
@@ -10,7 +11,8 @@ def render_timestamp(
     last_updated: datetime, 
     tz_name: str = "Asia/Ho_Chi_Minh", 
     session_name: str = None,
-    show_icon: bool = True
+    show_icon: bool = True,
+    is_fresh: Optional[bool] = None
 ):
     """
     Hiển thị timestamp với múi giờ và phiên
@@ -20,6 +22,8 @@ def render_timestamp(
         tz_name: Tên timezone (pytz)
         session_name: Tên phiên giao dịch
         show_icon: Có hiển thị icon không
+        is_fresh: Cờ độ mới của dữ liệu (False = dữ liệu phiên trước, đang cập nhật nền;
+            None = không hiển thị)
     """
     try:
         tz = pytz.timezone(tz_name)
@@ -33,6 +37,11 @@ def render_timestamp(
         else:
             caption = f"{icon}Cập nhật: **{timestamp_str}** ({tz_name})"
         
+        if is_fresh is False:
+            caption += " | ⏳ Dữ liệu phiên trước - đang cập nhật"
+        elif is_fresh:
+            caption += " | ✅ Dữ liệu phiên hiện tại"
+        
         st.caption(caption)
     except Exception as e:
         st.caption(f"⚠️ Lỗi hiển thị timestamp: {e}")
@@ -6,6 +6,7 @@ import logging
 import streamlit as st
 from typing import Dict, List, Optional
 import google.generativeai as genai
+from components.session_cache import get_cached_data
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -284,3 +285,37 @@ def get_ada_analyst() -> AdaAIAnalyst:
     if _ada_analyst is None:
         _ada_analyst = AdaAIAnalyst()
     return _ada_analyst
+
+
+def _generate_overview_commentary() -> str:
+    """
+    Tạo nhận định đầu ngày (Trang 1) từ snapshot và tin tức của phiên hiện tại
+    
+    Returns:
+        Vietnamese analysis text
+    """
+    # Import tại chỗ để module AI không kéo theo data layer khi chỉ dùng analyst
+    from data_providers.overview import get_market_snapshot
+    from data_providers.news_provider import NewsProvider
+    
+    snapshot = get_market_snapshot()
+    news_items = NewsProvider().get_news(hours_back=24, max_items=10)
+    
+    return get_ada_analyst().generate_market_overview_analysis(
+        snapshot=snapshot,
+        news=news_items,
+        vix_level=snapshot.get("^VIX", {}).get("last", 20),
+        spx_change=snapshot.get("^GSPC", {}).get("d1", 0),
+        dxy_level=snapshot.get("DXY", {}).get("last", 100)
+    )
+
+
+def get_overview_commentary() -> str:
+    """
+    Nhận định đầu ngày của Ada với SHARED session cache (namespace "ai")
+    Gemini chỉ được gọi một lần mỗi phiên cho tất cả users
+    
+    Returns:
+        Vietnamese analysis text
+    """
+    return get_cached_data(_generate_overview_commentary, _namespace="ai")
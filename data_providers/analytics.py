@@ -0,0 +1,269 @@
+"""
+Analytics engine vectorized cho panel nhiều tài sản
+Tính returns D1/WTD/MTD, z-score, realized volatility và chỉ báo kỹ thuật (ATR,
+SMA/EMA, RSI, Bollinger, vị trí MA) cho tất cả cột trong một lượt, không có
+vòng lặp Python theo từng ticker
+"""
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Lookback (số phiên) cho các khung thời gian
+RETURN_LOOKBACKS = {"d1": 1, "wtd": 5, "mtd": 22}
+
+# Cửa sổ z-score
+ZSCORE_WINDOW = 20
+
+# Cửa sổ realized volatility ngắn / dài hạn (số phiên)
+VOL_SHORT_WINDOW = 5
+VOL_LONG_WINDOW = 60
+
+
+def compact_valid(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Dồn các giá trị hợp lệ (không NaN) của từng cột lên đầu, giữ thứ tự thời gian
+
+    Tương đương series.dropna() cho từng cột, nhưng chạy một lần cho cả panel
+    (các tài sản có lịch giao dịch khác nhau: crypto 24/7, chỉ số nghỉ lễ...)
+
+    Args:
+        values: Mảng 2D (thời gian x tài sản)
+
+    Returns:
+        Tuple (mảng đã dồn, số giá trị hợp lệ mỗi cột)
+    """
+    valid = ~np.isnan(values)
+    order = np.argsort(~valid, axis=0, kind="stable")
+    return np.take_along_axis(values, order, axis=0), valid.sum(axis=0)
+
+
+def compute_return_matrix(
+    close: pd.DataFrame,
+    lookbacks: Dict[str, int] = RETURN_LOOKBACKS,
+    z_window: int = ZSCORE_WINDOW
+) -> pd.DataFrame:
+    """
+    Tính returns và z-score cho tất cả tài sản trong panel giá Close
+
+    Quy ước giống calculate_period_return / calculate_zscore:
+    - Return = last / giá cách `days` phiên - 1 (thiếu lịch sử → dùng giá đầu tiên)
+    - Z-score trên `z_window` giá trị cuối (thiếu lịch sử → NaN, std = 0 → 0)
+
+    Args:
+        close: DataFrame giá Close (index = thời gian, columns = tài sản)
+        lookbacks: Dict tên cột -> số phiên lookback
+        z_window: Cửa sổ z-score
+
+    Returns:
+        DataFrame index=tài sản, columns:
+        - last, <tên lookback> (%), zscore
+        - <tên lookback>_valid, zscore_valid: True nếu đủ lịch sử (NaN mask)
+        Chỉ gồm các tài sản có >= 2 giá trị
+    """
+    if close.empty:
+        return pd.DataFrame()
+
+    compact, counts = compact_valid(close.to_numpy(dtype=float))
+    cols = np.arange(compact.shape[1])
+    has_data = counts >= 2
+    last = compact[np.maximum(counts - 1, 0), cols]
+
+    result = {"last": last}
+    masks = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for name, days in lookbacks.items():
+            base = compact[np.maximum(counts - 1 - days, 0), cols]
+            result[name] = (last / base - 1.0) * 100.0
+            masks[f"{name}_valid"] = counts > days
+
+        # Z-score: gom `z_window` giá trị cuối của mỗi cột thành mảng (window x tài sản)
+        rows = np.clip(counts[None, :] - z_window + np.arange(z_window)[:, None], 0, None)
+        window = np.take_along_axis(compact, rows, axis=0)
+        std = window.std(axis=0, ddof=1)
+        zscore = np.where(std == 0, 0.0, (last - window.mean(axis=0)) / std)
+    enough = counts >= z_window
+    result["zscore"] = np.where(enough, zscore, np.nan)
+    masks["zscore_valid"] = enough
+
+    matrix = pd.DataFrame({**result, **masks}, index=close.columns)
+    return matrix[has_data]
+
+
+def compute_vol_ratio(
+    close: pd.DataFrame,
+    short_window: int = VOL_SHORT_WINDOW,
+    long_window: int = VOL_LONG_WINDOW
+) -> pd.Series:
+    """
+    Tỷ lệ realized volatility ngắn hạn / dài hạn (độ lệch chuẩn log returns)
+
+    > 1: tài sản đang biến động mạnh hơn bình thường, < 1: yên tĩnh hơn
+
+    Args:
+        close: DataFrame giá Close (index = thời gian, columns = tài sản)
+        short_window: Số returns của cửa sổ ngắn
+        long_window: Số returns của cửa sổ dài
+
+    Returns:
+        Series index=tài sản (NaN nếu thiếu lịch sử hoặc vol dài hạn = 0)
+    """
+    if close.empty or len(close) < 2:
+        return pd.Series(dtype=float, index=close.columns)
+
+    compact, counts = compact_valid(close.to_numpy(dtype=float))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.diff(np.log(compact), axis=0)
+    n_returns = counts - 1
+
+    def window_std(window: int) -> np.ndarray:
+        rows = np.clip(n_returns[None, :] - window + np.arange(window)[:, None], 0, None)
+        return np.take_along_axis(returns, rows, axis=0).std(axis=0, ddof=1)
+
+    short_vol, long_vol = window_std(short_window), window_std(long_window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where((n_returns >= long_window) & (long_vol > 0), short_vol / long_vol, np.nan)
+    return pd.Series(ratio, index=close.columns)
+
+
+def compute_indicator_table(
+    panel: pd.DataFrame,
+    atr_period: int = 14,
+    ma_windows: Tuple[int, ...] = (20, 50),
+    ema_span: int = 20,
+    rsi_period: int = 14,
+    bb_window: int = 20,
+    bb_k: float = 2.0
+) -> pd.DataFrame:
+    """
+    Tính chỉ báo kỹ thuật cho tất cả tài sản trong panel OHLC cùng lúc
+
+    Rolling windows chạy trên toàn bộ ma trận (thời gian x tài sản), mỗi tài sản
+    được dồn theo các phiên có giá Close nên không bị lệch lịch giao dịch.
+    ATR/MA giữ đúng quy ước của calculate_atr / build_snapshot.
+
+    Args:
+        panel: DataFrame với MultiIndex columns (Price, Ticker)
+        atr_period: Chu kỳ ATR
+        ma_windows: Các cửa sổ SMA
+        ema_span: Span EMA
+        rsi_period: Chu kỳ RSI (Wilder)
+        bb_window: Cửa sổ Bollinger
+        bb_k: Số độ lệch chuẩn của Bollinger bands
+
+    Returns:
+        DataFrame index=tài sản, columns: last, pct_d1, day_low, day_high,
+        atr{n}, ma{n}, ema{n}, rsi{n}, bb_mid, bb_upper, bb_lower, above_ma{n}
+        Chỉ gồm các tài sản có >= 2 giá Close
+    """
+    if panel.empty or "Close" not in panel.columns.get_level_values(0):
+        return pd.DataFrame()
+
+    close_frame = panel["Close"]
+    tickers = close_frame.columns
+    raw_close = close_frame.to_numpy(dtype=float)
+    valid = ~np.isnan(raw_close)
+    order = np.argsort(~valid, axis=0, kind="stable")
+    counts = valid.sum(axis=0)
+
+    def field(name: str) -> np.ndarray:
+        if name in panel.columns.get_level_values(0):
+            raw = panel[name].reindex(columns=tickers).to_numpy(dtype=float)
+        else:
+            raw = raw_close
+        return np.take_along_axis(raw, order, axis=0)
+
+    close, high, low = field("Close"), field("High"), field("Low")
+    cols = np.arange(len(tickers))
+    last_row = np.maximum(counts - 1, 0)
+
+    def at_last(values) -> np.ndarray:
+        return np.asarray(values, dtype=float)[last_row, cols]
+
+    c = pd.DataFrame(close)
+    last = at_last(close)
+    prev = close[np.maximum(counts - 2, 0), cols]
+
+    # ATR: true range = max(H-L, |H-C_prev|, |L-C_prev|), SMA(atr_period)
+    prev_close = np.vstack([np.full((1, len(cols)), np.nan), close[:-1]])
+    with np.errstate(invalid="ignore"):
+        tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+    # RSI (Wilder smoothing)
+    delta = c.diff()
+    avg_gain = delta.clip(lower=0).ewm(alpha=1 / rsi_period, adjust=False, min_periods=rsi_period).mean()
+    avg_loss = (-delta.clip(upper=0)).ewm(alpha=1 / rsi_period, adjust=False, min_periods=rsi_period).mean()
+
+    bb_mid = c.rolling(bb_window).mean()
+    bb_std = c.rolling(bb_window).std(ddof=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        table = {
+            "last": last,
+            "pct_d1": (last / prev - 1.0) * 100.0,
+            "day_low": at_last(low),
+            "day_high": at_last(high),
+            f"atr{atr_period}": at_last(pd.DataFrame(tr).rolling(atr_period).mean()),
+        }
+        for window in ma_windows:
+            table[f"ma{window}"] = at_last(c.rolling(window).mean())
+        table[f"ema{ema_span}"] = at_last(c.ewm(span=ema_span, adjust=False).mean())
+        rs = at_last(avg_gain) / at_last(avg_loss)
+        table[f"rsi{rsi_period}"] = 100.0 - 100.0 / (1.0 + rs)
+        table["bb_mid"] = at_last(bb_mid)
+        table["bb_upper"] = table["bb_mid"] + bb_k * at_last(bb_std)
+        table["bb_lower"] = table["bb_mid"] - bb_k * at_last(bb_std)
+
+    for window in ma_windows:
+        ma = table[f"ma{window}"]
+        table[f"above_ma{window}"] = pd.array(
+            np.where(np.isnan(ma), None, last > ma), dtype="boolean"
+        )
+
+    result = pd.DataFrame(table, index=tickers)
+    return result[counts >= 2]
+
+
+def ma_position(table: pd.DataFrame) -> pd.Series:
+    """
+    Vị trí giá so với MA20 & MA50 cho cả bảng chỉ báo
+
+    Args:
+        table: Kết quả compute_indicator_table
+
+    Returns:
+        Series "above" (trên cả hai), "below" (dưới cả hai), "mixed"
+    """
+    above20 = table["above_ma20"].fillna(False).to_numpy(dtype=bool)
+    above50 = table["above_ma50"].fillna(False).to_numpy(dtype=bool)
+    position = np.select([above20 & above50, ~above20 & ~above50], ["above", "below"], "mixed")
+    return pd.Series(position, index=table.index)
+
+
+def indicator_snapshot(row: pd.Series) -> Dict:
+    """
+    Chuyển một dòng của bảng chỉ báo sang dict snapshot (định dạng build_snapshot)
+
+    Args:
+        row: Một dòng của compute_indicator_table
+
+    Returns:
+        Dict snapshot
+    """
+    def flag(value):
+        return None if pd.isna(value) else bool(value)
+
+    return {
+        "last": float(row["last"]),
+        "pct_d1": float(row["pct_d1"]),
+        "day_range": f"{row['day_low']:.2f} - {row['day_high']:.2f}",
+        "atr14": float(row["atr14"]),
+        "ma20": float(row["ma20"]),
+        "ma50": float(row["ma50"]),
+        "above_ma20": flag(row["above_ma20"]),
+        "above_ma50": flag(row["above_ma50"]),
+        "ema20": float(row["ema20"]),
+        "rsi14": float(row["rsi14"]),
+        "bb_upper": float(row["bb_upper"]),
+        "bb_lower": float(row["bb_lower"]),
+    }
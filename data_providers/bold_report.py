@@ -78,7 +78,7 @@ class BoldReportProvider:
         """
         def _fetch():
             return self._fetch_json("gold/price")
-        return get_cached_data(_fetch)
+        return get_cached_data(_fetch, _namespace="bold")
     
     def get_gold_flows_summary(self) -> Optional[Dict]:
         """
@@ -89,7 +89,7 @@ class BoldReportProvider:
         """
         def _fetch():
             return self._fetch_json("gold/flows/summary")
-        return get_cached_data(_fetch)
+        return get_cached_data(_fetch, _namespace="bold")
     
     def get_gold_flows_history(self) -> Optional[Dict]:
         """
@@ -100,7 +100,7 @@ class BoldReportProvider:
         """
         def _fetch():
             return self._fetch_json("gold/flows/all")
-        return get_cached_data(_fetch)
+        return get_cached_data(_fetch, _namespace="bold")
     
     def get_gold_holdings_summary(self) -> Optional[Dict]:
         """
@@ -111,7 +111,7 @@ class BoldReportProvider:
         """
         def _fetch():
             return self._fetch_json("gold/summary")
-        return get_cached_data(_fetch)
+        return get_cached_data(_fetch, _namespace="bold")
     
     def get_gold_funds_aum(self) -> Optional[Dict]:
         """
@@ -122,7 +122,7 @@ class BoldReportProvider:
         """
         def _fetch():
             return self._fetch_json("gold/funds/aum")
-        return get_cached_data(_fetch)
+        return get_cached_data(_fetch, _namespace="bold")
     
     # ==================== BITCOIN DATA ====================
     
@@ -135,7 +135,7 @@ class BoldReportProvider:
         """
         def _fetch():
             return self._fetch_json("bitcoin/price")
-        return get_cached_data(_fetch)
+        return get_cached_data(_fetch, _namespace="bold")
     
     def get_bitcoin_flows_summary(self) -> Optional[Dict]:
         """
@@ -146,7 +146,7 @@ class BoldReportProvider:
         """
         def _fetch():
             return self._fetch_json("bitcoin/flows/summary")
-        return get_cached_data(_fetch)
+        return get_cached_data(_fetch, _namespace="bold")
     
     def get_bitcoin_flows_history(self) -> Optional[Dict]:
         """
@@ -157,7 +157,7 @@ class BoldReportProvider:
         """
         def _fetch():
             return self._fetch_json("bitcoin/flows/all")
-        return get_cached_data(_fetch)
+        return get_cached_data(_fetch, _namespace="bold")
     
     def get_bitcoin_holdings_summary(self) -> Optional[Dict]:
         """
@@ -168,7 +168,7 @@ class BoldReportProvider:
         """
         def _fetch():
             return self._fetch_json("bitcoin/summary")
-        return get_cached_data(_fetch)
+        return get_cached_data(_fetch, _namespace="bold")
     
     def get_bitcoin_funds_aum(self) -> Optional[Dict]:
         """
@@ -179,7 +179,7 @@ class BoldReportProvider:
         """
         def _fetch():
             return self._fetch_json("bitcoin/funds/aum")
-        return get_cached_data(_fetch)
+        return get_cached_data(_fetch, _namespace="bold")
     
     # ==================== PERFORMANCE DATA ====================
     
@@ -192,7 +192,7 @@ class BoldReportProvider:
         """
         def _fetch():
             return self._fetch_json("performance/gold-bitcoin")
-        return get_cached_data(_fetch)
+        return get_cached_data(_fetch, _namespace="bold")
     
     def get_performance_bold_macro(self) -> Optional[Dict]:
         """
@@ -203,7 +203,7 @@ class BoldReportProvider:
         """
         def _fetch():
             return self._fetch_json("performance/bold-macro")
-        return get_cached_data(_fetch)
+        return get_cached_data(_fetch, _namespace="bold")
     
     # ==================== BOLD INDEX DATA ====================
     
@@ -216,7 +216,7 @@ class BoldReportProvider:
         """
         def _fetch():
             return self._fetch_json("bold/performance")
-        return get_cached_data(_fetch)
+        return get_cached_data(_fetch, _namespace="bold")
     
     def get_bold_weights(self) -> Optional[Dict]:
         """
@@ -227,7 +227,7 @@ class BoldReportProvider:
         """
         def _fetch():
             return self._fetch_json("bold/daily-weights")
-        return get_cached_data(_fetch)
+        return get_cached_data(_fetch, _namespace="bold")
     
     # ==================== COMBINED DATA ====================
     
@@ -240,7 +240,7 @@ class BoldReportProvider:
         """
         def _fetch():
             return self._fetch_json("combined/all")
-        return get_cached_data(_fetch)
+        return get_cached_data(_fetch, _namespace="bold")
     
     # ==================== HELPER METHODS ====================
     
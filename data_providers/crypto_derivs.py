@@ -0,0 +1,130 @@
+"""
+Crypto derivatives cho app: Funding Rate & Open Interest qua shared session cache
+(namespace "derivs") - các trang và cache warmer dùng chung một lần gọi API
+"""
+import logging
+import time
+from typing import Dict, List, Tuple
+
+from components.session_cache import get_cached_data
+from data_providers.derivatives_wrappers import (
+    DERIVS_DEADLINE,
+    CallResult,
+    DerivsClient,
+    FundingPoint,
+    OIPoint,
+    connection_stats,
+    native_symbol,
+)
+from data_providers.derivs_stream import STREAM_MAX_AGE, DerivsStream, get_derivs_stream, start_derivs_stream
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Symbols và sàn theo dõi mặc định (Trang 3)
+DERIVS_SYMBOLS = ("BTCUSDT", "ETHUSDT")
+DERIVS_EXCHANGES = ("binance", "bybit", "okx")
+
+
+def _fetch_derivs_snapshot(symbols: Tuple[str, ...], exchanges: Tuple[str, ...]) -> Dict[str, List]:
+    """
+    Gọi API các sàn lấy funding rate & open interest mới nhất - snapshot bulk mỗi sàn
+    một request, song song, giới hạn bởi DERIVS_DEADLINE: sàn chậm / lỗi chỉ mất phần
+    của nó, không chặn cả trang
+
+    Args:
+        symbols: Các cặp (VD: BTCUSDT)
+        exchanges: Các sàn (binance, bybit, okx, deribit)
+
+    Returns:
+        Dict {"funding": List[FundingPoint], "oi": List[OIPoint],
+              "failed": List[CallResult] - các lần gọi lỗi / quá hạn}
+    """
+    logger.info(f"🔄 Fetching derivatives snapshot: {len(symbols)} symbols x {len(exchanges)} exchanges")
+    started = time.monotonic()
+    client = DerivsClient(stream=get_derivs_stream(), stream_max_age=STREAM_MAX_AGE)
+
+    # 1 request / sàn cho cả universe perp, rồi gọi từng symbol cho phần bulk thiếu
+    # (VD: Binance không có OI dạng bulk)
+    rows, bulk_calls = client.bulk_snapshot(exchanges, symbols)
+    funding: List[FundingPoint] = [fp for fp in (row.to_funding() for row in rows) if fp]
+    oi: List[OIPoint] = [point for point in (row.to_oi() for row in rows) if point]
+
+    have = {(p.exchange.lower(), p.symbol, "funding") for p in funding}
+    have |= {(p.exchange.lower(), p.symbol, "oi") for p in oi}
+    missing: Dict[str, List[Tuple[str, str]]] = {"funding": [], "oi": []}
+    for symbol in symbols:
+        for exchange in exchanges:
+            for kind in missing:
+                if (exchange, native_symbol(exchange, symbol), kind) not in have:
+                    missing[kind].append((exchange, symbol))
+
+    results = list(bulk_calls)
+    for kind, pairs in missing.items():
+        if pairs:
+            remaining = max(DERIVS_DEADLINE - (time.monotonic() - started), 1.0)
+            calls = client.batch(pairs, kinds=(kind,), deadline=remaining)
+            results.extend(calls)
+            (funding if kind == "funding" else oi).extend(r.value for r in calls if r.ok)
+
+    failed: List[CallResult] = [r for r in results if r.status in ("error", "timeout")]
+    for r in failed:
+        # API không khả dụng (403, 451, timeout...) → bỏ qua sàn này
+        logger.warning(f"{r.kind} {r.exchange}/{r.symbol} {r.status}: {r.error}")
+
+    for host, st in connection_stats().items():
+        logger.info(f"🔌 {host}: {st['requests']} requests / {st['connections']} connections "
+                    f"({st['reuse_ratio']:.0%} reused)")
+    return {"funding": funding, "oi": oi, "failed": failed}
+
+
+def _overlay_stream(
+    snapshot: Dict[str, List],
+    stream: DerivsStream,
+    symbols: Tuple[str, ...],
+    exchanges: Tuple[str, ...]
+) -> Dict[str, List]:
+    """Thay giá trị REST trong snapshot bằng giá trị stream còn mới (không sửa bản trong cache)"""
+    funding = {(p.exchange.lower(), p.symbol): p for p in snapshot["funding"]}
+    oi = {(p.exchange.lower(), p.symbol): p for p in snapshot["oi"]}
+    live = 0
+    for symbol in symbols:
+        for exchange in exchanges:
+            snap = stream.latest(exchange, symbol, max_age=STREAM_MAX_AGE)
+            if snap is None:
+                continue
+            key = (exchange, snap.symbol)
+            if snap.funding_rate is not None:
+                funding[key] = snap.to_funding()
+                live += 1
+            if snap.open_interest is not None:
+                oi[key] = snap.to_oi()
+                live += 1
+    return {**snapshot, "funding": list(funding.values()), "oi": list(oi.values()), "live": live}
+
+
+def get_derivs_snapshot(
+    symbols: Tuple[str, ...] = DERIVS_SYMBOLS,
+    exchanges: Tuple[str, ...] = DERIVS_EXCHANGES
+) -> Dict[str, List]:
+    """
+    Funding rate & open interest mới nhất với SHARED cache (namespace "derivs",
+    refresh 24/7 theo NAMESPACE_POLICY). Khi bật stream (ADA_DERIVS_STREAM), giá trị
+    realtime từ WebSocket được đè lên snapshot REST.
+
+    Args:
+        symbols: Các cặp (VD: BTCUSDT)
+        exchanges: Các sàn
+
+    Returns:
+        Dict {"funding": List[FundingPoint], "oi": List[OIPoint], "failed": List[CallResult],
+              "live": số giá trị lấy từ stream}
+    """
+    snapshot = get_cached_data(
+        _fetch_derivs_snapshot, tuple(symbols), tuple(exchanges),
+        _namespace="derivs", _assets=symbols
+    )
+    stream = start_derivs_stream(DERIVS_SYMBOLS, DERIVS_EXCHANGES)
+    if stream is None:
+        return snapshot
+    return _overlay_stream(snapshot, stream, tuple(symbols), tuple(exchanges))
@@ -10,6 +10,11 @@ Free, low-latency wrappers for Funding Rate & Open Interest using *native* excha
 Design goals:
 - Zero external API providers (free, public endpoints)
 - Robust timeouts, retries, lightweight normalization
+- Pooled keep-alive HTTP sessions (one TCP/TLS handshake per host, not per call)
+- Concurrent batch calls with a global deadline and per-call status
+- Bulk "whole perp universe" snapshots: one request per exchange, not per symbol
+- Optional in-memory reads from the WebSocket stream (see derivs_stream.py)
+- Columnar NumPy batches for histories (columnar=True) instead of one object per row
 - Ready for Streamlit or any Python app
 
 Author: Generated by ChatGPT (Finance - Business Finance)
@@ -19,11 +24,17 @@ License: MIT
 from __future__ import annotations
 
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
 
+import numpy as np
+import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 
 
 # ----------------------------
@@ -32,6 +43,7 @@ import requests
 
 @dataclass
 class FundingPoint:
+    __slots__ = ("ts", "rate", "exchange", "symbol")
     ts: int                    # unix ms
     rate: float                # funding rate as decimal (e.g., 0.0001 = 0.01%)
     exchange: str
@@ -40,6 +52,7 @@ class FundingPoint:
 
 @dataclass
 class OIPoint:
+    __slots__ = ("ts", "open_interest", "exchange", "symbol", "meta")
     ts: int                    # unix ms
     open_interest: float       # contracts or coin units (exchange-specific); see 'meta'
     exchange: str
@@ -47,33 +60,363 @@ class OIPoint:
     meta: Dict[str, Any]       # carry native fields like valueInUsd if provided
 
 
+# Meta key of the open interest notional in USD, normalized across exchanges
+OI_VALUE_USD = "valueUsd"
+
+
+@dataclass
+class PerpSnapshot:
+    ts: int                            # unix ms (exchange snapshot time)
+    exchange: str
+    symbol: str                        # native instrument, e.g. "BTCUSDT", "BTC-USDT-SWAP", "BTC-PERPETUAL"
+    pair: str                          # unified pair across exchanges, e.g. "BTCUSDT" / "BTCUSD"
+    funding_rate: Optional[float]      # current funding rate as decimal (None if not in the bulk feed)
+    next_funding_ts: Optional[int]     # unix ms
+    open_interest: Optional[float]     # native units, see 'meta' (None if not in the bulk feed)
+    mark_price: Optional[float]
+    meta: Dict[str, Any]
+
+    def to_funding(self) -> Optional[FundingPoint]:
+        if self.funding_rate is None:
+            return None
+        return FundingPoint(ts=self.ts, rate=self.funding_rate, exchange=self.exchange, symbol=self.symbol)
+
+    def to_oi(self) -> Optional[OIPoint]:
+        if self.open_interest is None:
+            return None
+        return OIPoint(ts=self.ts, open_interest=self.open_interest, exchange=self.exchange,
+                       symbol=self.symbol, meta=dict(self.meta))
+
+
+@dataclass
+class CallResult:
+    exchange: str
+    symbol: str
+    kind: str                  # "funding" | "oi" | "snapshot" (bulk, symbol="*")
+    status: str                # "ok" | "empty" | "error" | "timeout"
+    value: Optional[Any] = None    # FundingPoint / OIPoint / List[PerpSnapshot] when status == "ok"
+    error: Optional[str] = None
+    elapsed: float = 0.0       # seconds (time spent until the deadline for "timeout")
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+# ----------------------------
+# Columnar batches (histories)
+# ----------------------------
+
+def _code_dtype(n: int) -> np.dtype:
+    """Smallest code dtype for n strings (same rule as pandas Categorical, so no recast)"""
+    return np.dtype(np.int8 if n < 127 else np.int16 if n < 32767 else np.int32)
+
+
+class _PointBatch:
+    """
+    Base for columnar point batches: int64 unix-ms `ts`, float64 value columns and
+    exchange/symbol stored as small integer codes into per-batch string tables.
+    Rows are sorted by ts. Arrays are shared, never copied, by slicing and to_frame().
+    """
+    __slots__ = ("ts", "columns", "exchange_codes", "exchanges", "symbol_codes", "symbols")
+    _VALUE = ""                # main value column
+    _POINT: Any = None
+
+    def __init__(self, ts: np.ndarray, columns: Dict[str, np.ndarray],
+                 exchange_codes: np.ndarray, exchanges: Tuple[str, ...],
+                 symbol_codes: np.ndarray, symbols: Tuple[str, ...]):
+        self.ts = ts
+        self.columns = columns
+        self.exchange_codes = exchange_codes
+        self.exchanges = exchanges
+        self.symbol_codes = symbol_codes
+        self.symbols = symbols
+
+    # --- Construction ---
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, np.int64), {cls._VALUE: np.empty(0, np.float64)},
+                   np.empty(0, np.int8), (), np.empty(0, np.int8), ())
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]], ts_key: str, fields: Dict[str, str],
+                  exchange: str, symbol: str):
+        """Build straight from exchange JSON rows ({column: json key}); missing/'' -> NaN"""
+        n = len(rows)
+        if not n:
+            return cls.empty()
+        ts = np.fromiter((int(r.get(ts_key)) for r in rows), np.int64, count=n)
+        columns = {
+            col: np.fromiter((float(r[key]) if r.get(key) not in (None, "") else np.nan for r in rows),
+                             np.float64, count=n)
+            for col, key in fields.items()
+        }
+        if (np.diff(ts) < 0).any():
+            order = np.argsort(ts, kind="stable")
+            ts = ts[order]
+            columns = {col: values[order] for col, values in columns.items()}
+        return cls(ts, columns, np.zeros(n, np.int8), (exchange,), np.zeros(n, np.int8), (symbol,))
+
+    @classmethod
+    def from_points(cls, points: Iterable[Any]):
+        points = list(points)
+        if not points:
+            return cls.empty()
+        points.sort(key=lambda p: p.ts)
+        exchanges: Dict[str, int] = {}
+        symbols: Dict[str, int] = {}
+        n = len(points)
+        ts = np.fromiter((p.ts for p in points), np.int64, count=n)
+        columns = cls._point_columns(points)
+        ex_codes = np.fromiter((exchanges.setdefault(p.exchange, len(exchanges)) for p in points), np.int32, count=n)
+        sym_codes = np.fromiter((symbols.setdefault(p.symbol, len(symbols)) for p in points), np.int32, count=n)
+        return cls(ts, columns, ex_codes.astype(_code_dtype(len(exchanges))), tuple(exchanges),
+                   sym_codes.astype(_code_dtype(len(symbols))), tuple(symbols))
+
+    @classmethod
+    def concat(cls, batches: Iterable[Any]):
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+        exchanges: Dict[str, int] = {}
+        symbols: Dict[str, int] = {}
+        ex_codes, sym_codes = [], []
+        for b in batches:
+            # Re-map each batch's local codes into the merged string tables
+            ex_map = np.array([exchanges.setdefault(e, len(exchanges)) for e in b.exchanges], np.int32)
+            sym_map = np.array([symbols.setdefault(s, len(symbols)) for s in b.symbols], np.int32)
+            ex_codes.append(ex_map[b.exchange_codes])
+            sym_codes.append(sym_map[b.symbol_codes])
+        names = [col for col in batches[0].columns if all(col in b.columns for b in batches)]
+        ts = np.concatenate([b.ts for b in batches])
+        order = np.argsort(ts, kind="stable")
+        return cls(ts[order], {col: np.concatenate([b.columns[col] for b in batches])[order] for col in names},
+                   np.concatenate(ex_codes)[order].astype(_code_dtype(len(exchanges))), tuple(exchanges),
+                   np.concatenate(sym_codes)[order].astype(_code_dtype(len(symbols))), tuple(symbols))
+
+    # --- Access ---
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            return self._point(int(item))
+        # slice / boolean mask / index array -> batch (slices are views)
+        return type(self)(self.ts[item], {col: v[item] for col, v in self.columns.items()},
+                          self.exchange_codes[item], self.exchanges, self.symbol_codes[item], self.symbols)
+
+    def __iter__(self):
+        return (self._point(i) for i in range(len(self)))
+
+    def __repr__(self) -> str:
+        return (f"{type(self).__name__}({len(self)} rows, exchanges={list(self.exchanges)}, "
+                f"symbols={len(self.symbols)}, {self.nbytes / 1024:.1f} KB)")
+
+    def to_points(self) -> List[Any]:
+        return list(self)
+
+    @property
+    def nbytes(self) -> int:
+        return (self.ts.nbytes + self.exchange_codes.nbytes + self.symbol_codes.nbytes
+                + sum(v.nbytes for v in self.columns.values()))
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        DataFrame over the batch arrays (no copy): DatetimeIndex 'ts' (UTC, tz-naive -
+        localizing would copy), value columns, exchange/symbol as Categorical on the codes.
+        """
+        index = pd.DatetimeIndex(self.ts.view("datetime64[ms]"), name="ts", copy=False)
+        data: Dict[str, Any] = dict(self.columns)
+        data["exchange"] = pd.Categorical.from_codes(self.exchange_codes, categories=list(self.exchanges))
+        data["symbol"] = pd.Categorical.from_codes(self.symbol_codes, categories=list(self.symbols))
+        return pd.DataFrame(data, index=index, copy=False)
+
+    @staticmethod
+    def _point_columns(points: List[Any]) -> Dict[str, np.ndarray]:
+        raise NotImplementedError
+
+    def _point(self, i: int) -> Any:
+        raise NotImplementedError
+
+
+class FundingBatch(_PointBatch):
+    """Funding history as columns: ts (unix ms) and rate (decimal)."""
+    __slots__ = ()
+    _VALUE = "rate"
+
+    @property
+    def rate(self) -> np.ndarray:
+        return self.columns["rate"]
+
+    @staticmethod
+    def _point_columns(points: List[FundingPoint]) -> Dict[str, np.ndarray]:
+        return {"rate": np.fromiter((p.rate for p in points), np.float64, count=len(points))}
+
+    def _point(self, i: int) -> FundingPoint:
+        return FundingPoint(ts=int(self.ts[i]), rate=float(self.rate[i]),
+                            exchange=self.exchanges[self.exchange_codes[i]],
+                            symbol=self.symbols[self.symbol_codes[i]])
+
+
+class OIBatch(_PointBatch):
+    """Open-interest history as columns: ts, open_interest, plus numeric meta columns."""
+    __slots__ = ()
+    _VALUE = "open_interest"
+
+    @property
+    def open_interest(self) -> np.ndarray:
+        return self.columns["open_interest"]
+
+    @staticmethod
+    def _point_columns(points: List[OIPoint]) -> Dict[str, np.ndarray]:
+        n = len(points)
+        columns = {"open_interest": np.fromiter((p.open_interest for p in points), np.float64, count=n)}
+        # Numeric meta fields become columns (missing -> NaN); non-numeric meta is dropped
+        keys = {k for p in points for k, v in p.meta.items() if isinstance(v, (int, float)) or v is None}
+        for key in sorted(keys):
+            columns[key] = np.fromiter(
+                (float(p.meta[key]) if p.meta.get(key) is not None else np.nan for p in points),
+                np.float64, count=n
+            )
+        return columns
+
+    def _point(self, i: int) -> OIPoint:
+        return OIPoint(ts=int(self.ts[i]), open_interest=float(self.open_interest[i]),
+                       exchange=self.exchanges[self.exchange_codes[i]],
+                       symbol=self.symbols[self.symbol_codes[i]],
+                       meta={col: float(v[i]) for col, v in self.columns.items() if col != "open_interest"})
+
+
 # ----------------------------
 # HTTP utils
 # ----------------------------
 
 DEFAULT_TIMEOUT = float(os.getenv("DERIVS_TIMEOUT", "15"))
 RETRIES = int(os.getenv("DERIVS_RETRIES", "2"))
+# Max keep-alive connections kept per host (also the max concurrent calls per host)
+DERIVS_POOL_SIZE = int(os.getenv("DERIVS_POOL_SIZE", "10"))
+# Batch calls: worker threads and overall deadline (seconds) for the whole batch
+DERIVS_MAX_WORKERS = int(os.getenv("DERIVS_MAX_WORKERS", "8"))
+DERIVS_DEADLINE = float(os.getenv("DERIVS_DEADLINE", "20"))
+
+# Absolute deadline (time.monotonic()) of the batch call running on this thread
+_call_ctx = threading.local()
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter that remembers each host's urllib3 pool to report connection reuse"""
+
+    def __init__(self, *args, **kwargs):
+        self._pools: Dict[str, Any] = {}
+        self._retired: Dict[str, Dict[str, int]] = {}
+        self._pools_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        conn = super().get_connection_with_tls_context(request, verify, proxies=proxies, cert=cert)
+        host = urlsplit(request.url).netloc
+        with self._pools_lock:
+            known = self._pools.get(host)
+            if known is not conn:
+                if known is not None:
+                    # Pool evicted by the PoolManager: keep its counters
+                    retired = self._retired.setdefault(host, {"requests": 0, "connections": 0})
+                    retired["requests"] += known.num_requests
+                    retired["connections"] += known.num_connections
+                self._pools[host] = conn
+        return conn
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._pools_lock:
+            out = {}
+            for host in set(self._pools) | set(self._retired):
+                retired = self._retired.get(host, {"requests": 0, "connections": 0})
+                pool = self._pools.get(host)
+                out[host] = {
+                    "requests": retired["requests"] + (pool.num_requests if pool else 0),
+                    "connections": retired["connections"] + (pool.num_connections if pool else 0),
+                }
+            return out
+
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def pooled_session(name: str, pool_size: int = DERIVS_POOL_SIZE) -> requests.Session:
+    """
+    Shared keep-alive session for one exchange client (created once per process).
+    Connections are reused across calls, client instances and threads.
+    """
+    with _sessions_lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = requests.Session()
+            adapter = _CountingAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=False)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[name] = session
+        return session
+
+
+def connection_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Per-host connection reuse across all pooled sessions:
+    {host: {"requests", "connections", "reused", "reuse_ratio"}}
+    (connections = TCP/TLS handshakes actually made)
+    """
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+    out: Dict[str, Dict[str, float]] = {}
+    for session in sessions:
+        for adapter in set(session.adapters.values()):
+            if not isinstance(adapter, _CountingAdapter):
+                continue
+            for host, st in adapter.stats().items():
+                agg = out.setdefault(host, {"requests": 0, "connections": 0})
+                agg["requests"] += st["requests"]
+                agg["connections"] += st["connections"]
+    for agg in out.values():
+        agg["reused"] = max(agg["requests"] - agg["connections"], 0)
+        agg["reuse_ratio"] = agg["reused"] / agg["requests"] if agg["requests"] else 0.0
+    return out
+
 
 def _request_json(
     method: str,
     url: str,
     params: Optional[Dict[str, Any]] = None,
     headers: Optional[Dict[str, str]] = None,
-    timeout: float = DEFAULT_TIMEOUT
+    timeout: float = DEFAULT_TIMEOUT,
+    session: Optional[requests.Session] = None
 ) -> Any:
-    """HTTP with basic retry/backoff; returns parsed JSON"""
+    """
+    HTTP with basic retry/backoff; returns parsed JSON (session=None -> one-off connection).
+    Inside a batch call, timeouts and retries are capped by the batch deadline.
+    """
+    http = session or requests
+    deadline = getattr(_call_ctx, "deadline", None)
     backoff = 0.8
     last_exc = None
     for i in range(RETRIES + 1):
+        call_timeout = timeout
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"batch deadline exceeded before {url}")
+            call_timeout = min(timeout, remaining)
         try:
-            resp = requests.request(method, url, params=params, headers=headers, timeout=timeout)
+            resp = http.request(method, url, params=params, headers=headers, timeout=call_timeout)
             resp.raise_for_status()
             return resp.json()
         except Exception as e:
             last_exc = e
-            if i == RETRIES:
+            delay = backoff * (2 ** i)
+            if i == RETRIES or (deadline is not None and time.monotonic() + delay >= deadline):
                 raise
-            time.sleep(backoff * (2 ** i))
+            time.sleep(delay)
     if last_exc:
         raise last_exc
 
@@ -101,6 +444,33 @@ def deribit_perp_symbol(symbol: str) -> str:
         sym = sym.replace("USDT","").replace("USD","")
     return f"{sym}-PERPETUAL"
 
+def native_symbol(exchange: str, symbol: str) -> str:
+    """Map a pair ('BTCUSDT') to the instrument name used by `exchange`"""
+    ex = exchange.lower()
+    if ex == "okx":
+        return okx_swap_symbol(symbol)
+    if ex == "deribit":
+        return deribit_perp_symbol(symbol)
+    return symbol.upper()
+
+def unified_pair(symbol: str) -> str:
+    """Map native instruments to one pair name: 'BTC-USDT-SWAP' -> 'BTCUSDT', 'BTC-PERPETUAL' -> 'BTCUSD',
+    'SOL_USDC-PERPETUAL' -> 'SOLUSDC'"""
+    sym = symbol.upper()
+    if sym.endswith("-SWAP"):
+        return sym[:-5].replace("-", "")
+    if sym.endswith("-PERPETUAL"):
+        sym = sym[:-10]
+        return sym.replace("_", "") if "_" in sym else f"{sym}USD"
+    return sym
+
+def _opt_float(value: Any) -> Optional[float]:
+    """Exchange string fields: '' / None -> None"""
+    return float(value) if value not in (None, "") else None
+
+def _opt_int(value: Any) -> Optional[int]:
+    return int(value) if value not in (None, "", "0", 0) else None
+
 
 # ----------------------------
 # Binance USDⓈ-M Futures
@@ -108,31 +478,28 @@ def deribit_perp_symbol(symbol: str) -> str:
 #  - Funding history: GET /fapi/v1/fundingRate
 #  - OI snapshot:    GET /fapi/v1/openInterest
 #  - OI timeseries:  GET /futures/data/openInterestHist
+#  - Bulk funding:   GET /fapi/v1/premiumIndex (no symbol -> every contract; no OI field)
 # Base: https://fapi.binance.com
 # ----------------------------
 
 class BinanceFutures:
-    def __init__(self, api_key: Optional[str] = None, base: str = "https://fapi.binance.com"):
+    def __init__(self, api_key: Optional[str] = None, base: str = "https://fapi.binance.com",
+                 session: Optional[requests.Session] = None):
         self.base = base.rstrip("/")
+        self.session = session or pooled_session("binance")
         self.api_key = api_key or os.getenv("BINANCE_API_KEY")
         self._hdr = {"X-MBX-APIKEY": self.api_key} if self.api_key else None
 
-    def funding_history(self, symbol: str, start_ms: Optional[int]=None, end_ms: Optional[int]=None, limit: int=1000) -> List[FundingPoint]:
+    def funding_history(self, symbol: str, start_ms: Optional[int]=None, end_ms: Optional[int]=None, limit: int=1000,
+                        columnar: bool=False) -> List[FundingPoint] | FundingBatch:
         url = f"{self.base}/fapi/v1/fundingRate"
         p = {"symbol": symbol.upper(), "limit": min(limit, 1000)}
         if start_ms: p["startTime"] = start_ms
         if end_ms:   p["endTime"]   = end_ms
-        j = _request_json("GET", url, params=p, headers=self._hdr)
-        out = []
-        for it in j:
-            # Binance returns fundingRate as string, e.g., "0.0001"
-            out.append(FundingPoint(
-                ts=int(it.get("fundingTime")),
-                rate=float(it.get("fundingRate")),
-                exchange="Binance",
-                symbol=symbol.upper()
-            ))
-        return out
+        j = _request_json("GET", url, params=p, headers=self._hdr, session=self.session)
+        # Binance returns fundingRate as string, e.g., "0.0001"
+        batch = FundingBatch.from_rows(j, "fundingTime", {"rate": "fundingRate"}, "Binance", symbol.upper())
+        return batch if columnar else batch.to_points()
 
     def funding_latest(self, symbol: str) -> Optional[FundingPoint]:
         arr = self.funding_history(symbol, limit=1)
@@ -141,7 +508,7 @@ class BinanceFutures:
     def open_interest_snapshot(self, symbol: str) -> Optional[OIPoint]:
         url = f"{self.base}/fapi/v1/openInterest"
         p = {"symbol": symbol.upper()}
-        j = _request_json("GET", url, params=p, headers=self._hdr)
+        j = _request_json("GET", url, params=p, headers=self._hdr, session=self.session)
         return OIPoint(
             ts=int(j.get("time")),
             open_interest=float(j.get("openInterest")),
@@ -150,21 +517,41 @@ class BinanceFutures:
             meta={}
         )
 
-    def open_interest_history(self, symbol: str, period: str="1h", limit: int=30, start_ms: Optional[int]=None, end_ms: Optional[int]=None) -> List[OIPoint]:
+    def open_interest_history(self, symbol: str, period: str="1h", limit: int=30, start_ms: Optional[int]=None, end_ms: Optional[int]=None,
+                              columnar: bool=False) -> List[OIPoint] | OIBatch:
         # Docs: /futures/data/openInterestHist with period in ["5m","15m","30m","1h","2h","4h","6h","12h","1d"]
         url = f"{self.base}/futures/data/openInterestHist"
         p = {"symbol": symbol.upper(), "period": period, "limit": min(limit, 500)}
         if start_ms: p["startTime"] = start_ms
         if end_ms:   p["endTime"]   = end_ms
-        j = _request_json("GET", url, params=p, headers=self._hdr)
-        out = []
+        j = _request_json("GET", url, params=p, headers=self._hdr, session=self.session)
+        batch = OIBatch.from_rows(
+            j, "timestamp",
+            {"open_interest": "sumOpenInterest", "sumOpenInterestValue": "sumOpenInterestValue",
+             OI_VALUE_USD: "sumOpenInterestValue"},
+            "Binance", symbol.upper()
+        )
+        return batch if columnar else batch.to_points()
+
+    def perp_snapshot_all(self) -> List[PerpSnapshot]:
+        # Binance has no bulk OI endpoint: open_interest is None, use open_interest_snapshot per symbol
+        url = f"{self.base}/fapi/v1/premiumIndex"
+        j = _request_json("GET", url, headers=self._hdr, session=self.session)
+        out: List[PerpSnapshot] = []
         for it in j:
-            out.append(OIPoint(
-                ts=int(it.get("timestamp")),
-                open_interest=float(it.get("sumOpenInterest")),
+            rate = _opt_float(it.get("lastFundingRate"))
+            if rate is None or "_" in it.get("symbol", ""):
+                continue  # delivery contracts (BTCUSDT_250627) have no funding
+            out.append(PerpSnapshot(
+                ts=int(it.get("time")),
                 exchange="Binance",
-                symbol=symbol.upper(),
-                meta={"sumOpenInterestValue": float(it.get("sumOpenInterestValue", "nan"))}
+                symbol=it["symbol"],
+                pair=it["symbol"],
+                funding_rate=rate,
+                next_funding_ts=_opt_int(it.get("nextFundingTime")),
+                open_interest=None,
+                mark_price=_opt_float(it.get("markPrice")),
+                meta={"indexPrice": _opt_float(it.get("indexPrice"))}
             ))
         return out
 
@@ -174,19 +561,22 @@ class BinanceFutures:
 # Docs:
 #  - Funding history: GET /v5/market/history-fund-rate (category=linear|inverse)
 #  - Open interest:   GET /v5/market/open-interest (category=linear|inverse, intervalTime=5min|15min|30min|1h|4h|1d)
+#  - Bulk snapshot:   GET /v5/market/tickers?category=linear (funding + OI for every contract)
 # Base: https://api.bybit.com
 # ----------------------------
 
 class BybitV5:
-    def __init__(self, base: str = "https://api.bybit.com"):
+    def __init__(self, base: str = "https://api.bybit.com", session: Optional[requests.Session] = None):
         self.base = base.rstrip("/")
+        self.session = session or pooled_session("bybit")
 
     @staticmethod
     def _category_from_symbol(symbol: str) -> str:
         # Heuristic: USDT margined -> linear; coin margined '...USD' -> inverse
         return "linear" if symbol.upper().endswith("USDT") else "inverse"
 
-    def funding_history(self, symbol: str, limit: int=200, start_ms: Optional[int]=None, end_ms: Optional[int]=None) -> List[FundingPoint]:
+    def funding_history(self, symbol: str, limit: int=200, start_ms: Optional[int]=None, end_ms: Optional[int]=None,
+                        columnar: bool=False) -> List[FundingPoint] | FundingBatch:
         url = f"{self.base}/v5/market/history-fund-rate"
         p = {
             "category": self._category_from_symbol(symbol),
@@ -195,25 +585,18 @@ class BybitV5:
         }
         if start_ms: p["startTime"] = start_ms
         if end_ms:   p["endTime"]   = end_ms
-        j = _request_json("GET", url, params=p)
+        j = _request_json("GET", url, params=p, session=self.session)
         rows = (j.get("result", {}) or {}).get("list", []) or []
-        out: List[FundingPoint] = []
-        for it in rows:
-            out.append(FundingPoint(
-                ts=int(it.get("fundingRateTimestamp")),
-                rate=float(it.get("fundingRate")),
-                exchange="Bybit",
-                symbol=symbol.upper()
-            ))
-        out.sort(key=lambda x: x.ts)
-        return out
+        batch = FundingBatch.from_rows(rows, "fundingRateTimestamp", {"rate": "fundingRate"}, "Bybit", symbol.upper())
+        return batch if columnar else batch.to_points()
 
     def funding_latest(self, symbol: str) -> Optional[FundingPoint]:
         arr = self.funding_history(symbol, limit=1)
         return arr[-1] if arr else None
 
     def open_interest_history(self, symbol: str, interval: str="1h", limit: int=50,
-                              start_ms: Optional[int]=None, end_ms: Optional[int]=None) -> List[OIPoint]:
+                              start_ms: Optional[int]=None, end_ms: Optional[int]=None,
+                              columnar: bool=False) -> List[OIPoint] | OIBatch:
         url = f"{self.base}/v5/market/open-interest"
         p = {
             "category": self._category_from_symbol(symbol),
@@ -223,41 +606,60 @@ class BybitV5:
         }
         if start_ms: p["startTime"] = start_ms
         if end_ms:   p["endTime"]   = end_ms
-        j = _request_json("GET", url, params=p)
+        j = _request_json("GET", url, params=p, session=self.session)
         rows = (j.get("result", {}) or {}).get("list", []) or []
-        out: List[OIPoint] = []
-        for it in rows:
-            out.append(OIPoint(
-                ts=int(it.get("openInterestTimestamp")),
-                open_interest=float(it.get("openInterest")),
-                exchange="Bybit",
-                symbol=symbol.upper(),
-                meta={}
-            ))
-        out.sort(key=lambda x: x.ts)
-        return out
+        batch = OIBatch.from_rows(rows, "openInterestTimestamp", {"open_interest": "openInterest"}, "Bybit", symbol.upper())
+        return batch if columnar else batch.to_points()
 
     def open_interest_snapshot(self, symbol: str) -> Optional[OIPoint]:
         arr = self.open_interest_history(symbol, interval="5min", limit=1)
         return arr[-1] if arr else None
 
+    def perp_snapshot_all(self, category: str = "linear") -> List[PerpSnapshot]:
+        url = f"{self.base}/v5/market/tickers"
+        j = _request_json("GET", url, params={"category": category}, session=self.session)
+        ts = int(j.get("time") or time.time() * 1000)
+        rows = (j.get("result", {}) or {}).get("list", []) or []
+        out: List[PerpSnapshot] = []
+        for it in rows:
+            rate = _opt_float(it.get("fundingRate"))
+            if rate is None:
+                continue  # dated futures have no funding
+            # linear: openInterestValue is USD(T); inverse: openInterest itself is in USD
+            value_usd = _opt_float(it.get("openInterestValue" if category == "linear" else "openInterest"))
+            out.append(PerpSnapshot(
+                ts=ts,
+                exchange="Bybit",
+                symbol=it["symbol"],
+                pair=it["symbol"],
+                funding_rate=rate,
+                next_funding_ts=_opt_int(it.get("nextFundingTime")),
+                open_interest=_opt_float(it.get("openInterest")),
+                mark_price=_opt_float(it.get("markPrice")),
+                meta={"openInterestValue": _opt_float(it.get("openInterestValue")), OI_VALUE_USD: value_usd}
+            ))
+        return out
+
 
 # ----------------------------
 # OKX v5 (Public)
 # Docs:
 #  - Current funding: GET /api/v5/public/funding-rate?instId=BTC-USDT-SWAP
 #  - Open interest:   GET /api/v5/public/open-interest?instType=SWAP&instId=BTC-USDT-SWAP
+#  - Bulk snapshot:   GET /api/v5/public/open-interest?instType=SWAP (every swap)
+#                     + GET /api/v5/public/funding-rate?instId=ANY (every swap)
 # Base: https://www.okx.com
 # ----------------------------
 
 class OKXV5:
-    def __init__(self, base: str = "https://www.okx.com"):
+    def __init__(self, base: str = "https://www.okx.com", session: Optional[requests.Session] = None):
         self.base = base.rstrip("/")
+        self.session = session or pooled_session("okx")
 
     def funding_current(self, symbol: str) -> Optional[FundingPoint]:
         inst_id = okx_swap_symbol(symbol)
         url = f"{self.base}/api/v5/public/funding-rate"
-        j = _request_json("GET", url, params={"instId": inst_id})
+        j = _request_json("GET", url, params={"instId": inst_id}, session=self.session)
         data = (j.get("data") or [])
         if not data:
             return None
@@ -274,7 +676,7 @@ class OKXV5:
         inst_id = okx_swap_symbol(symbol)
         url = f"{self.base}/api/v5/public/open-interest"
         p = {"instType": "SWAP", "instId": inst_id}
-        j = _request_json("GET", url, params=p)
+        j = _request_json("GET", url, params=p, session=self.session)
         data = (j.get("data") or [])
         if not data:
             return None
@@ -284,20 +686,50 @@ class OKXV5:
         meta = {"oiCcy": float(row.get("oiCcy")) if row.get("oiCcy") is not None else None}
         return OIPoint(ts=ts, open_interest=oi, exchange="OKX", symbol=inst_id, meta=meta)
 
+    def perp_snapshot_all(self) -> List[PerpSnapshot]:
+        url = f"{self.base}/api/v5/public/open-interest"
+        oi_rows = (_request_json("GET", url, params={"instType": "SWAP"}, session=self.session).get("data") or [])
+        url = f"{self.base}/api/v5/public/funding-rate"
+        try:
+            j = _request_json("GET", url, params={"instId": "ANY"}, session=self.session)
+            funding = {row["instId"]: row for row in (j.get("data") or [])}
+        except requests.RequestException:
+            funding = {}  # keep the OI rows; funding_rate stays None (use funding_current per symbol)
+        out: List[PerpSnapshot] = []
+        for it in oi_rows:
+            inst_id = it["instId"]
+            fr = funding.get(inst_id, {})
+            out.append(PerpSnapshot(
+                ts=int(it.get("ts") or time.time() * 1000),
+                exchange="OKX",
+                symbol=inst_id,
+                pair=unified_pair(inst_id),
+                funding_rate=_opt_float(fr.get("fundingRate")),
+                next_funding_ts=_opt_int(fr.get("nextFundingTime")),
+                open_interest=_opt_float(it.get("oi")),
+                mark_price=None,
+                meta={"oiCcy": _opt_float(it.get("oiCcy")), "oiUsd": _opt_float(it.get("oiUsd")),
+                      OI_VALUE_USD: _opt_float(it.get("oiUsd"))}
+            ))
+        return out
+
 
 # ----------------------------
 # Deribit v2 (public, HTTP GET JSON-RPC)
 # Docs:
-#  - Funding history:  GET /api/v2/public/get_funding_rate_history?instrument_name=BTC-PERPETUAL&start_timestamp=...&end_timestamp=...
+#  - Funding history:  GET /api/v2/public/get_funding_rate_history?instrument_name=BTC-PERPETUAL&start_timestamp=...&end_timestamp=...  (field: interest_8h)
 #  - OI snapshot:      GET /api/v2/public/ticker?instrument_name=BTC-PERPETUAL  (field: open_interest)
+#  - Bulk snapshot:    GET /api/v2/public/get_book_summary_by_currency?currency=BTC&kind=future (one call per currency)
 # Base: https://www.deribit.com
 # ----------------------------
 
 class DeribitV2:
-    def __init__(self, base: str = "https://www.deribit.com"):
+    def __init__(self, base: str = "https://www.deribit.com", session: Optional[requests.Session] = None):
         self.base = base.rstrip("/")
+        self.session = session or pooled_session("deribit")
 
-    def funding_history(self, symbol: str, start_ms: Optional[int]=None, end_ms: Optional[int]=None, countback_hours: int=168) -> List[FundingPoint]:
+    def funding_history(self, symbol: str, start_ms: Optional[int]=None, end_ms: Optional[int]=None, countback_hours: int=168,
+                        columnar: bool=False) -> List[FundingPoint] | FundingBatch:
         inst = deribit_perp_symbol(symbol)
         url = f"{self.base}/api/v2/public/get_funding_rate_history"
         if end_ms is None:
@@ -305,18 +737,10 @@ class DeribitV2:
         if start_ms is None:
             start_ms = end_ms - countback_hours * 3600 * 1000
         p = {"instrument_name": inst, "start_timestamp": start_ms, "end_timestamp": end_ms}
-        j = _request_json("GET", url, params=p)
+        j = _request_json("GET", url, params=p, session=self.session)
         rows = (j.get("result") or [])
-        out: List[FundingPoint] = []
-        for it in rows:
-            out.append(FundingPoint(
-                ts=int(it.get("timestamp")),
-                rate=float(it.get("funding_rate")),
-                exchange="Deribit",
-                symbol=inst
-            ))
-        out.sort(key=lambda x: x.ts)
-        return out
+        batch = FundingBatch.from_rows(rows, "timestamp", {"rate": "interest_8h"}, "Deribit", inst)
+        return batch if columnar else batch.to_points()
 
     def funding_latest(self, symbol: str) -> Optional[FundingPoint]:
         arr = self.funding_history(symbol, countback_hours=12)
@@ -325,7 +749,7 @@ class DeribitV2:
     def open_interest_snapshot(self, symbol: str) -> Optional[OIPoint]:
         inst = deribit_perp_symbol(symbol)
         url = f"{self.base}/api/v2/public/ticker"
-        j = _request_json("GET", url, params={"instrument_name": inst})
+        j = _request_json("GET", url, params={"instrument_name": inst}, session=self.session)
         row = (j.get("result") or {})
         oi = row.get("open_interest")
         ts = row.get("timestamp")
@@ -333,21 +757,68 @@ class DeribitV2:
             return None
         return OIPoint(ts=int(ts), open_interest=float(oi), exchange="Deribit", symbol=inst, meta={})
 
+    def perp_snapshot_all(self, currencies: Sequence[str] = ("BTC", "ETH", "USDC")) -> List[PerpSnapshot]:
+        # Deribit groups instruments by settlement currency (USDC = linear alt perps)
+        url = f"{self.base}/api/v2/public/get_book_summary_by_currency"
+        out: List[PerpSnapshot] = []
+        for ccy in currencies:
+            j = _request_json("GET", url, params={"currency": ccy, "kind": "future"}, session=self.session)
+            for it in (j.get("result") or []):
+                inst = it.get("instrument_name", "")
+                if not inst.endswith("-PERPETUAL"):
+                    continue
+                oi = _opt_float(it.get("open_interest"))
+                mark = _opt_float(it.get("mark_price"))
+                # inverse perps quote OI in USD; USDC linear perps in base coin
+                if ccy != "USDC":
+                    value_usd = oi
+                else:
+                    value_usd = oi * mark if oi is not None and mark is not None else None
+                out.append(PerpSnapshot(
+                    ts=int(it.get("creation_timestamp") or time.time() * 1000),
+                    exchange="Deribit",
+                    symbol=inst,
+                    pair=unified_pair(inst),
+                    funding_rate=_opt_float(it.get("funding_8h")),
+                    next_funding_ts=None,
+                    open_interest=oi,
+                    mark_price=mark,
+                    meta={"current_funding": _opt_float(it.get("current_funding")), OI_VALUE_USD: value_usd}
+                ))
+        return out
+
 
 # ----------------------------
 # Convenience facade
 # ----------------------------
 
 class DerivsClient:
-    """Unified access across exchanges with a simple interface."""
-    def __init__(self, binance_api_key: Optional[str] = None):
+    """
+    Unified access across exchanges with a simple interface.
+
+    With a running `stream` (data_providers.derivs_stream.DerivsStream), latest funding /
+    OI reads are served from its in-memory state when fresher than `stream_max_age`
+    seconds, and fall back to REST otherwise.
+    """
+    def __init__(self, binance_api_key: Optional[str] = None, stream: Optional[Any] = None,
+                 stream_max_age: float = 30.0):
         self.binance = BinanceFutures(api_key=binance_api_key)
         self.bybit = BybitV5()
         self.okx = OKXV5()
         self.deribit = DeribitV2()
+        self.stream = stream
+        self.stream_max_age = stream_max_age
+
+    def _from_stream(self, exchange: str, symbol: str) -> Optional[PerpSnapshot]:
+        if self.stream is None:
+            return None
+        return self.stream.latest(exchange, symbol, max_age=self.stream_max_age)
 
     # --- Funding ---
     def funding_latest(self, exchange: str, symbol: str) -> Optional[FundingPoint]:
+        snap = self._from_stream(exchange, symbol)
+        if snap is not None and snap.funding_rate is not None:
+            return snap.to_funding()
         ex = exchange.lower()
         if ex == "binance":
             return self.binance.funding_latest(symbol)
@@ -359,7 +830,8 @@ class DerivsClient:
             return self.deribit.funding_latest(symbol)
         raise ValueError("Unsupported exchange")
 
-    def funding_history(self, exchange: str, symbol: str, **kwargs) -> List[FundingPoint]:
+    def funding_history(self, exchange: str, symbol: str, **kwargs) -> List[FundingPoint] | FundingBatch:
+        # columnar=True -> FundingBatch (NumPy columns) instead of a list of FundingPoint
         ex = exchange.lower()
         if ex == "binance":
             return self.binance.funding_history(symbol, **kwargs)
@@ -367,13 +839,17 @@ class DerivsClient:
             return self.bybit.funding_history(symbol, **kwargs)
         if ex == "okx":
             fp = self.okx.funding_current(symbol)
-            return [fp] if fp else []
+            points = [fp] if fp else []
+            return FundingBatch.from_points(points) if kwargs.get("columnar") else points
         if ex == "deribit":
             return self.deribit.funding_history(symbol, **kwargs)
         raise ValueError("Unsupported exchange")
 
     # --- Open Interest ---
     def oi_snapshot(self, exchange: str, symbol: str) -> Optional[OIPoint]:
+        snap = self._from_stream(exchange, symbol)
+        if snap is not None and snap.open_interest is not None:
+            return snap.to_oi()
         ex = exchange.lower()
         if ex == "binance":
             return self.binance.open_interest_snapshot(symbol)
@@ -385,7 +861,8 @@ class DerivsClient:
             return self.deribit.open_interest_snapshot(symbol)
         raise ValueError("Unsupported exchange")
 
-    def oi_history(self, exchange: str, symbol: str, **kwargs) -> List[OIPoint]:
+    def oi_history(self, exchange: str, symbol: str, **kwargs) -> List[OIPoint] | OIBatch:
+        # columnar=True -> OIBatch (NumPy columns) instead of a list of OIPoint
         ex = exchange.lower()
         if ex == "binance":
             return self.binance.open_interest_history(symbol, **kwargs)
@@ -393,12 +870,124 @@ class DerivsClient:
             return self.bybit.open_interest_history(symbol, **kwargs)
         if ex == "okx":
             snap = self.okx.open_interest_snapshot(symbol)
-            return [snap] if snap else []
-        if ex == "deribit":
+        elif ex == "deribit":
             snap = self.deribit.open_interest_snapshot(symbol)
-            return [snap] if snap else []
+        else:
+            raise ValueError("Unsupported exchange")
+        points = [snap] if snap else []
+        return OIBatch.from_points(points) if kwargs.get("columnar") else points
+
+    # --- Bulk (whole perp universe, one request per exchange) ---
+    def perp_snapshot_all(self, exchange: str) -> List[PerpSnapshot]:
+        ex = exchange.lower()
+        if ex == "binance":
+            return self.binance.perp_snapshot_all()
+        if ex == "bybit":
+            return self.bybit.perp_snapshot_all()
+        if ex == "okx":
+            return self.okx.perp_snapshot_all()
+        if ex == "deribit":
+            return self.deribit.perp_snapshot_all()
         raise ValueError("Unsupported exchange")
 
+    def bulk_snapshot(
+        self,
+        exchanges: Iterable[str] = ("binance", "bybit", "okx", "deribit"),
+        symbols: Optional[Iterable[str]] = None,
+        deadline: float = DERIVS_DEADLINE
+    ) -> Tuple[List[PerpSnapshot], List[CallResult]]:
+        """
+        Funding + OI for every perpetual of each exchange, exchanges fetched concurrently.
+
+        `symbols` (pairs like 'BTCUSDT') keeps only the matching instrument of each
+        exchange (same mapping as the per-symbol methods). Returns the rows plus one
+        CallResult (kind="snapshot", symbol="*") per exchange for status/errors.
+        """
+        exchanges = [ex.lower() for ex in exchanges]
+        results = self._run_calls(
+            [(ex, "*", "snapshot") for ex in exchanges],
+            lambda ex, _sym, _kind: self.perp_snapshot_all(ex) or None,
+            deadline, len(exchanges)
+        )
+        wanted = None
+        if symbols is not None:
+            symbols = list(symbols)
+            wanted = {ex: {native_symbol(ex, sym) for sym in symbols} for ex in exchanges}
+        rows = [
+            row
+            for ex, r in zip(exchanges, results) if r.ok
+            for row in r.value
+            if wanted is None or row.symbol in wanted[ex]
+        ]
+        return rows, results
+
+    # --- Batch (concurrent) ---
+    def batch(
+        self,
+        pairs: Iterable[Tuple[str, str]],
+        kinds: Sequence[str] = ("funding", "oi"),
+        deadline: float = DERIVS_DEADLINE,
+        max_workers: int = DERIVS_MAX_WORKERS
+    ) -> List[CallResult]:
+        """
+        Run funding_latest / oi_snapshot for many (exchange, symbol) pairs concurrently.
+
+        Never raises for a single call: every (pair, kind) gets a CallResult, in input
+        order. Calls still running at `deadline` seconds are reported as "timeout"
+        and the batch returns immediately with whatever finished (partial results).
+        """
+        fetchers = {"funding": self.funding_latest, "oi": self.oi_snapshot}
+        unknown = set(kinds) - set(fetchers)
+        if unknown:
+            raise ValueError(f"Unsupported kinds: {sorted(unknown)}")
+        calls = [(ex, sym, kind) for ex, sym in pairs for kind in kinds]
+        return self._run_calls(calls, lambda ex, sym, kind: fetchers[kind](ex, sym), deadline, max_workers)
+
+    @staticmethod
+    def _run_calls(
+        calls: List[Tuple[str, str, str]],
+        fetch: Callable[[str, str, str], Any],
+        deadline: float,
+        max_workers: int
+    ) -> List[CallResult]:
+        """Run fetch(exchange, symbol, kind) for each call on a bounded pool under one deadline"""
+        if not calls:
+            return []
+
+        started = time.monotonic()
+        deadline_at = started + deadline
+
+        def run(exchange: str, symbol: str, kind: str) -> CallResult:
+            _call_ctx.deadline = deadline_at
+            t0 = time.monotonic()
+            try:
+                value = fetch(exchange, symbol, kind)
+                status = "ok" if value is not None else "empty"
+                return CallResult(exchange, symbol, kind, status, value=value, elapsed=time.monotonic() - t0)
+            except Exception as e:
+                status = "timeout" if time.monotonic() >= deadline_at else "error"
+                return CallResult(exchange, symbol, kind, status, error=f"{type(e).__name__}: {e}",
+                                  elapsed=time.monotonic() - t0)
+            finally:
+                _call_ctx.deadline = None
+
+        pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(calls))),
+                                  thread_name_prefix="derivs")
+        try:
+            futures = [pool.submit(run, *call) for call in calls]
+            wait(futures, timeout=max(deadline_at - time.monotonic(), 0))
+        finally:
+            # Don't wait for stragglers: they stop at their next deadline check
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        results = []
+        for (ex, sym, kind), fut in zip(calls, futures):
+            if fut.done() and not fut.cancelled():
+                results.append(fut.result())
+            else:
+                results.append(CallResult(ex, sym, kind, "timeout", error=f"deadline {deadline:g}s exceeded",
+                                          elapsed=time.monotonic() - started))
+        return results
 
 if __name__ == "__main__":
     # Manual smoke test (requires internet)
@@ -413,3 +1002,9 @@ if __name__ == "__main__":
     print("Bybit OI snapshot:", c.oi_snapshot("bybit", sym))
     print("OKX OI snapshot:", c.oi_snapshot("okx", sym))
     print("Deribit OI snapshot:", c.oi_snapshot("deribit", sym))
+
+    for r in c.batch([(ex, sym) for ex in ("binance", "bybit", "okx", "deribit")]):
+        print(f"Batch {r.kind:<7} {r.exchange:<8} {r.status:<7} {r.elapsed:.2f}s", r.error or "")
+
+    rows, calls = c.bulk_snapshot()
+    print(f"Bulk snapshot: {len(rows)} perps from {sum(r.ok for r in calls)}/{len(calls)} exchanges")
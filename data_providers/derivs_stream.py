@@ -0,0 +1,437 @@
+"""
+Derivatives stream - mark price, funding rate & open interest realtime qua WebSocket
+Một thread nền (asyncio) giữ kết nối tới feed public của Binance, Bybit, OKX,
+Deribit; giá trị mới nhất của mỗi (sàn, symbol) nằm trong RAM (PerpSnapshot) kèm
+lịch sử ngắn trong ring buffer. DerivsClient(stream=...) đọc thẳng từ RAM
+(~µs) thay vì gọi REST; mất kết nối → tự reconnect với exponential backoff.
+
+Feed:
+- Binance:  <symbol>@markPrice@1s (mark, funding, next funding; không có OI qua WS)
+- Bybit:    tickers.<symbol> (snapshot + delta: mark, funding, OI)
+- OKX:      mark-price / funding-rate / open-interest của <instId>
+- Deribit:  ticker.<instrument>.100ms (mark, funding_8h, OI)
+
+URL của từng sàn ghi đè được (urls=...) để chạy với WebSocket server giả lập local.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import replace
+from typing import Any, Deque, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from data_providers.derivatives_wrappers import PerpSnapshot, native_symbol, unified_pair
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Số tick giữ lại cho mỗi (sàn, symbol)
+STREAM_HISTORY = int(os.getenv("DERIVS_STREAM_HISTORY", "600"))
+
+# Giá trị stream cũ hơn ngần này (giây) coi như không có → DerivsClient quay về REST
+STREAM_MAX_AGE = float(os.getenv("DERIVS_STREAM_MAX_AGE", "30"))
+
+# Reconnect backoff (giây): base * 2^n, tối đa max, có jitter
+RECONNECT_BASE = 1.0
+RECONNECT_MAX = 60.0
+
+# Bật stream cho app (Trang 3) - mặc định tắt: mỗi replica giữ 1 kết nối / sàn
+STREAM_ENABLED = os.getenv("ADA_DERIVS_STREAM", "off").lower() in ("1", "on", "true", "yes")
+
+STREAM_EXCHANGES = ("binance", "bybit", "okx", "deribit")
+
+
+class StreamTick(NamedTuple):
+    """Một điểm trong ring buffer (trạng thái đã gộp sau mỗi update)"""
+    ts: int                            # unix ms (thời điểm của sàn)
+    mark_price: Optional[float]
+    funding_rate: Optional[float]
+    open_interest: Optional[float]
+
+
+def _num(value: Any) -> Optional[float]:
+    return float(value) if value not in (None, "") else None
+
+
+def _int(value: Any) -> Optional[int]:
+    return int(value) if value not in (None, "", "0", 0) else None
+
+
+# Update của feed: (symbol native, ts ms, {field: value}) - chỉ các field có trong message
+Update = Tuple[str, int, Dict[str, Any]]
+
+
+class _Feed:
+    """Mô tả feed WebSocket của một sàn: URL, message subscribe, heartbeat, parser"""
+    exchange = ""
+    label = ""
+    default_url = ""
+    heartbeat: Optional[str] = None    # message ping của ứng dụng (ngoài ping WebSocket)
+    heartbeat_interval = 20.0
+
+    def url(self, base: str, symbols: Sequence[str]) -> str:
+        return base
+
+    def subscriptions(self, symbols: Sequence[str]) -> List[str]:
+        return []
+
+    def parse(self, message: Any) -> Iterable[Update]:
+        raise NotImplementedError
+
+
+class _BinanceFeed(_Feed):
+    exchange, label = "binance", "Binance"
+    default_url = "wss://fstream.binance.com"
+
+    def url(self, base: str, symbols: Sequence[str]) -> str:
+        # Combined stream: subscribe qua URL
+        return f"{base.rstrip('/')}/stream?streams=" + "/".join(f"{s.lower()}@markPrice@1s" for s in symbols)
+
+    def parse(self, message: Any) -> Iterable[Update]:
+        data = message.get("data") if isinstance(message, dict) else None
+        if not data or data.get("e") != "markPriceUpdate":
+            return []
+        return [(data["s"], int(data["E"]), {
+            "mark_price": _num(data.get("p")),
+            "funding_rate": _num(data.get("r")),
+            "next_funding_ts": _int(data.get("T")),
+        })]
+
+
+class _BybitFeed(_Feed):
+    exchange, label = "bybit", "Bybit"
+    default_url = "wss://stream.bybit.com/v5/public/linear"
+    heartbeat = json.dumps({"op": "ping"})
+
+    def subscriptions(self, symbols: Sequence[str]) -> List[str]:
+        return [json.dumps({"op": "subscribe", "args": [f"tickers.{s}" for s in symbols]})]
+
+    def parse(self, message: Any) -> Iterable[Update]:
+        if not isinstance(message, dict) or not str(message.get("topic", "")).startswith("tickers."):
+            return []
+        data = message.get("data") or {}
+        # Delta chỉ chứa field thay đổi
+        fields = {}
+        for key, name, conv in (("markPrice", "mark_price", _num), ("fundingRate", "funding_rate", _num),
+                                ("nextFundingTime", "next_funding_ts", _int), ("openInterest", "open_interest", _num)):
+            if key in data:
+                fields[name] = conv(data[key])
+        return [(data.get("symbol") or message["topic"][8:], int(message.get("ts") or time.time() * 1000), fields)]
+
+
+class _OKXFeed(_Feed):
+    exchange, label = "okx", "OKX"
+    default_url = "wss://ws.okx.com:8443/ws/v5/public"
+    heartbeat = "ping"
+    heartbeat_interval = 25.0
+
+    def subscriptions(self, symbols: Sequence[str]) -> List[str]:
+        args = [{"channel": channel, "instId": s}
+                for s in symbols for channel in ("mark-price", "funding-rate", "open-interest")]
+        return [json.dumps({"op": "subscribe", "args": args})]
+
+    def parse(self, message: Any) -> Iterable[Update]:
+        if not isinstance(message, dict) or "data" not in message:
+            return []
+        channel = (message.get("arg") or {}).get("channel")
+        updates = []
+        for row in message["data"]:
+            ts = int(row.get("ts") or time.time() * 1000)
+            if channel == "mark-price":
+                fields = {"mark_price": _num(row.get("markPx"))}
+            elif channel == "funding-rate":
+                fields = {"funding_rate": _num(row.get("fundingRate")),
+                          "next_funding_ts": _int(row.get("nextFundingTime"))}
+            elif channel == "open-interest":
+                fields = {"open_interest": _num(row.get("oi"))}
+            else:
+                continue
+            updates.append((row["instId"], ts, fields))
+        return updates
+
+
+class _DeribitFeed(_Feed):
+    exchange, label = "deribit", "Deribit"
+    default_url = "wss://www.deribit.com/ws/api/v2"
+
+    def subscriptions(self, symbols: Sequence[str]) -> List[str]:
+        return [json.dumps({
+            "jsonrpc": "2.0", "id": 1, "method": "public/subscribe",
+            "params": {"channels": [f"ticker.{s}.100ms" for s in symbols]},
+        })]
+
+    def parse(self, message: Any) -> Iterable[Update]:
+        if not isinstance(message, dict) or message.get("method") != "subscription":
+            return []
+        data = (message.get("params") or {}).get("data") or {}
+        if "instrument_name" not in data:
+            return []
+        return [(data["instrument_name"], int(data.get("timestamp") or time.time() * 1000), {
+            "mark_price": _num(data.get("mark_price")),
+            "funding_rate": _num(data.get("funding_8h")),
+            "open_interest": _num(data.get("open_interest")),
+        })]
+
+
+FEEDS: Dict[str, _Feed] = {feed.exchange: feed for feed in (_BinanceFeed(), _BybitFeed(), _OKXFeed(), _DeribitFeed())}
+
+
+class DerivsStream:
+    """
+    Thread nền giữ kết nối WebSocket tới các sàn và trạng thái mới nhất trong RAM
+
+    Đọc (latest / history / snapshot) không chặn và không chờ mạng: latest() là
+    một lần tra dict. PerpSnapshot trả về là bất biến theo quy ước (mỗi update
+    tạo object mới) - không sửa object nhận được.
+    """
+
+    def __init__(
+        self,
+        symbols: Sequence[str],
+        exchanges: Sequence[str] = STREAM_EXCHANGES,
+        history: int = STREAM_HISTORY,
+        urls: Optional[Dict[str, str]] = None
+    ):
+        """
+        Args:
+            symbols: Các cặp (VD: BTCUSDT) - tự đổi sang instrument của từng sàn
+            exchanges: Các sàn (binance, bybit, okx, deribit)
+            history: Số tick giữ lại cho mỗi (sàn, symbol)
+            urls: Ghi đè URL WebSocket theo sàn (VD: server giả lập ws://127.0.0.1:8765)
+
+        Raises:
+            ValueError: Nếu có sàn không hỗ trợ
+        """
+        unknown = set(ex.lower() for ex in exchanges) - set(FEEDS)
+        if unknown:
+            raise ValueError(f"Unsupported exchanges: {sorted(unknown)}")
+        self.exchanges = tuple(ex.lower() for ex in exchanges)
+        self.symbols = {ex: [native_symbol(ex, s) for s in symbols] for ex in self.exchanges}
+        self.urls = {ex: (urls or {}).get(ex, FEEDS[ex].default_url) for ex in self.exchanges}
+        self.history_size = history
+
+        self._latest: Dict[Tuple[str, str], PerpSnapshot] = {}
+        self._history: Dict[Tuple[str, str], Deque[StreamTick]] = {}
+        self._status: Dict[str, Dict[str, Any]] = {
+            ex: {"connected": False, "reconnects": 0, "messages": 0, "last_message": None, "error": None}
+            for ex in self.exchanges
+        }
+        self._write_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    # ---------- Vòng đời ----------
+
+    def start(self) -> "DerivsStream":
+        """Khởi động thread nền (không làm gì nếu đang chạy)"""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name="derivs-stream", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        logger.info(f"Derivs stream started: {', '.join(self.exchanges)} x {len(self.symbols[self.exchanges[0]])} symbols")
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        """Đóng kết nối và dừng thread nền"""
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait_for_data(self, timeout: float = 10.0) -> bool:
+        """Chờ đến khi mọi (sàn, symbol) có ít nhất một update"""
+        expected = {(ex, s) for ex in self.exchanges for s in self.symbols[ex]}
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if expected <= self._latest.keys():
+                return True
+            time.sleep(0.05)
+        return expected <= self._latest.keys()
+
+    # ---------- Đọc (từ RAM) ----------
+
+    def latest(self, exchange: str, symbol: str, max_age: Optional[float] = None) -> Optional[PerpSnapshot]:
+        """
+        Trạng thái mới nhất của một symbol
+
+        Args:
+            exchange: Sàn
+            symbol: Cặp (BTCUSDT) hoặc instrument native của sàn
+            max_age: Bỏ qua giá trị cũ hơn ngần này giây (None = không giới hạn)
+
+        Returns:
+            PerpSnapshot hoặc None nếu chưa có / quá cũ
+        """
+        ex = exchange.lower()
+        snap = self._latest.get((ex, symbol)) or self._latest.get((ex, native_symbol(ex, symbol)))
+        if snap is None or (max_age is not None and snap.meta["received_at"] < time.time() - max_age):
+            return None
+        return snap
+
+    def history(self, exchange: str, symbol: str) -> List[StreamTick]:
+        """
+        Lịch sử ngắn (cũ → mới) của một symbol, tối đa `history` tick
+
+        Returns:
+            List StreamTick
+        """
+        ex = exchange.lower()
+        ring = self._history.get((ex, symbol)) or self._history.get((ex, native_symbol(ex, symbol)))
+        if ring is None:
+            return []
+        with self._write_lock:
+            return list(ring)
+
+    def snapshot(self, max_age: Optional[float] = None) -> List[PerpSnapshot]:
+        """Trạng thái mới nhất của mọi (sàn, symbol) đang theo dõi"""
+        cutoff = None if max_age is None else time.time() - max_age
+        return [s for s in list(self._latest.values()) if cutoff is None or s.meta["received_at"] >= cutoff]
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Tình trạng kết nối theo sàn
+
+        Returns:
+            Dict sàn -> {connected, reconnects, messages, last_message, error}
+        """
+        return {ex: dict(st) for ex, st in self._status.items()}
+
+    # ---------- Ghi (thread của stream) ----------
+
+    def _apply(self, exchange: str, symbol: str, ts: int, fields: Dict[str, Any]):
+        """Gộp update (có thể chỉ một phần field) vào trạng thái và ring buffer"""
+        key = (exchange, symbol)
+        received_at = time.time()
+        with self._write_lock:
+            prev = self._latest.get(key)
+            if prev is None:
+                prev = PerpSnapshot(
+                    ts=ts, exchange=FEEDS[exchange].label, symbol=symbol, pair=unified_pair(symbol),
+                    funding_rate=None, next_funding_ts=None, open_interest=None, mark_price=None,
+                    meta={}
+                )
+            # None trong update = field không đổi (VD: funding rỗng của hợp đồng không phải perp)
+            changes = {k: v for k, v in fields.items() if v is not None}
+            snap = replace(prev, ts=max(ts, prev.ts), meta={"received_at": received_at, "source": "stream"}, **changes)
+            self._latest[key] = snap
+            ring = self._history.get(key)
+            if ring is None:
+                ring = self._history[key] = deque(maxlen=self.history_size)
+            ring.append(StreamTick(snap.ts, snap.mark_price, snap.funding_rate, snap.open_interest))
+
+    def _run(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._ready.set()
+        tasks = [asyncio.create_task(self._consume(ex)) for ex in self.exchanges]
+        await self._stop.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _consume(self, exchange: str):
+        """Một kết nối / sàn: subscribe, đọc message, reconnect với backoff khi lỗi"""
+        from websockets.asyncio.client import connect
+
+        feed = FEEDS[exchange]
+        status = self._status[exchange]
+        symbols = self.symbols[exchange]
+        url = feed.url(self.urls[exchange], symbols)
+        attempt = 0
+        while not self._stop.is_set():
+            try:
+                async with connect(url, open_timeout=10, ping_interval=20, max_queue=1024) as ws:
+                    for message in feed.subscriptions(symbols):
+                        await ws.send(message)
+                    status.update(connected=True, error=None)
+                    heartbeat = asyncio.create_task(self._heartbeat(ws, feed)) if feed.heartbeat else None
+                    try:
+                        async for raw in ws:
+                            attempt = 0  # nhận được dữ liệu → reset backoff
+                            try:
+                                message = json.loads(raw)
+                            except ValueError:
+                                continue  # pong dạng text
+                            for symbol, ts, fields in feed.parse(message):
+                                self._apply(exchange, symbol, ts, fields)
+                            status["messages"] += 1
+                            status["last_message"] = time.time()
+                    finally:
+                        if heartbeat:
+                            heartbeat.cancel()
+                # Server đóng kết nối bình thường → reconnect
+                raise ConnectionError("connection closed by server")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                status.update(connected=False, error=f"{type(e).__name__}: {e}")
+                if self._stop.is_set():
+                    break
+                delay = min(RECONNECT_MAX, RECONNECT_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+                attempt += 1
+                status["reconnects"] += 1
+                logger.warning(f"Derivs stream {exchange}: {e} - reconnecting in {delay:.1f}s")
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        status["connected"] = False
+
+    @staticmethod
+    async def _heartbeat(ws, feed: _Feed):
+        while True:
+            await asyncio.sleep(feed.heartbeat_interval)
+            await ws.send(feed.heartbeat)
+
+
+_derivs_stream: Optional[DerivsStream] = None
+_derivs_stream_lock = threading.Lock()
+
+
+def start_derivs_stream(
+    symbols: Sequence[str],
+    exchanges: Sequence[str] = STREAM_EXCHANGES
+) -> Optional[DerivsStream]:
+    """
+    Khởi động derivatives stream một lần cho cả process (gọi lại nhiều lần an toàn)
+
+    Args:
+        symbols: Các cặp theo dõi
+        exchanges: Các sàn
+
+    Returns:
+        DerivsStream, hoặc None nếu bị tắt (ADA_DERIVS_STREAM) / thiếu websockets
+    """
+    global _derivs_stream
+    if not STREAM_ENABLED:
+        return None
+    with _derivs_stream_lock:
+        if _derivs_stream is None:
+            try:
+                import websockets  # noqa: F401
+            except ImportError:
+                logger.warning("websockets not installed, derivs stream disabled")
+                return None
+            _derivs_stream = DerivsStream(symbols, exchanges)
+        _derivs_stream.start()
+    return _derivs_stream
+
+
+def get_derivs_stream() -> Optional[DerivsStream]:
+    """Stream đang chạy (None nếu chưa khởi động)"""
+    return _derivs_stream
@@ -0,0 +1,308 @@
+"""
+Funding store - backfill lịch sử funding rate và lưu cục bộ dạng Parquet
+Mỗi sàn được phân trang theo con trỏ thời gian với giới hạn page của sàn đó
+(Binance 1000 dòng, Bybit 200 dòng, Deribit theo cửa sổ giờ). Dữ liệu được
+phân vùng {root}/funding/{exchange}/{symbol}/{YYYY-MM}.parquet; các lần backfill
+sau chỉ tải phần đuôi mới (sau điểm cuối đã lưu).
+
+CLI (chạy từ thư mục gốc của repo):
+    python -m data_providers.funding_store backfill --exchange binance --symbol BTCUSDT [--days 365]
+    python -m data_providers.funding_store show --exchange binance --symbol BTCUSDT
+"""
+import argparse
+import glob
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_providers.derivatives_wrappers import DerivsClient, FundingBatch, FundingPoint, native_symbol
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Thư mục gốc của store
+FUNDING_STORE_DIR = os.getenv("ADA_FUNDING_STORE", ".data")
+
+# Lần backfill đầu tiên (chưa có dữ liệu) lấy lùi bao nhiêu ngày
+BACKFILL_DAYS = int(os.getenv("ADA_FUNDING_BACKFILL_DAYS", "365"))
+
+# Số dòng tối đa mỗi page theo sàn (giới hạn của API)
+PAGE_LIMITS = {"binance": 1000, "bybit": 200}
+
+# Sàn phân trang lùi (page mới nhất trước): gom đủ cả khoảng rồi mới ghi, để backfill
+# bị ngắt không để lại lỗ hổng giữa dữ liệu đã lưu
+NEWEST_FIRST = {"bybit"}
+
+# Deribit không phân trang theo số dòng: mỗi request là một cửa sổ thời gian
+DERIBIT_WINDOW_HOURS = 720
+
+# Nghỉ giữa các page (giây) để không chạm rate limit
+PAGE_PAUSE = 0.2
+
+_SCHEMA = pa.schema([("ts", pa.int64()), ("rate", pa.float64())])
+
+
+def iter_funding_pages(
+    client: DerivsClient,
+    exchange: str,
+    symbol: str,
+    start_ms: int,
+    end_ms: int
+) -> Iterator[FundingBatch]:
+    """
+    Phân trang lịch sử funding của một symbol trong [start_ms, end_ms]
+
+    Binance: con trỏ startTime tiến dần (page tăng dần theo thời gian). Bybit: API
+    trả về các điểm MỚI nhất trong khoảng → con trỏ endTime lùi dần. Deribit: các
+    cửa sổ DERIBIT_WINDOW_HOURS liên tiếp.
+
+    Args:
+        client: DerivsClient
+        exchange: binance, bybit, deribit
+        symbol: Cặp (VD: BTCUSDT)
+        start_ms: Mốc đầu (unix ms)
+        end_ms: Mốc cuối (unix ms)
+
+    Yields:
+        Mỗi page là một FundingBatch (tăng dần theo ts, có thể rỗng ở page cuối)
+
+    Raises:
+        ValueError: Nếu sàn không có API lịch sử funding
+    """
+    ex = exchange.lower()
+    if ex == "binance":
+        limit = PAGE_LIMITS["binance"]
+        cursor = start_ms
+        while cursor <= end_ms:
+            page = client.binance.funding_history(symbol, start_ms=cursor, end_ms=end_ms, limit=limit, columnar=True)
+            yield page
+            if len(page) < limit:
+                return
+            cursor = int(page.ts[-1]) + 1
+            time.sleep(PAGE_PAUSE)
+    elif ex == "bybit":
+        limit = PAGE_LIMITS["bybit"]
+        cursor = end_ms
+        while cursor >= start_ms:
+            page = client.bybit.funding_history(symbol, limit=limit, start_ms=start_ms, end_ms=cursor, columnar=True)
+            yield page
+            if len(page) < limit:
+                return
+            cursor = int(page.ts[0]) - 1
+            time.sleep(PAGE_PAUSE)
+    elif ex == "deribit":
+        window = DERIBIT_WINDOW_HOURS * 3600 * 1000
+        cursor = start_ms
+        while cursor <= end_ms:
+            stop = min(cursor + window - 1, end_ms)
+            page = client.deribit.funding_history(symbol, start_ms=cursor, end_ms=stop, columnar=True)
+            yield page[(page.ts >= cursor) & (page.ts <= stop)]
+            cursor = stop + 1
+            time.sleep(PAGE_PAUSE)
+    else:
+        raise ValueError(f"No funding history API for exchange '{exchange}'")
+
+
+class FundingStore:
+    """
+    Lịch sử funding rate trên disk, phân vùng theo sàn / symbol / tháng
+
+    Mỗi file Parquet gồm hai cột ts (unix ms) và rate (decimal), sắp xếp theo ts,
+    không trùng ts. Ghi file theo kiểu atomic (file tạm + rename).
+    """
+
+    def __init__(self, root: str = FUNDING_STORE_DIR):
+        self.root = root
+
+    def _dir(self, exchange: str, symbol: str) -> str:
+        ex = exchange.lower()
+        return os.path.join(self.root, "funding", ex, native_symbol(ex, symbol))
+
+    def _files(self, exchange: str, symbol: str) -> List[str]:
+        return sorted(glob.glob(os.path.join(self._dir(exchange, symbol), "*.parquet")))
+
+    def write(self, exchange: str, symbol: str, points: Union[FundingBatch, List[FundingPoint]]) -> int:
+        """
+        Gộp các điểm vào store (ghi đè điểm trùng ts)
+
+        Args:
+            exchange: Sàn
+            symbol: Cặp (VD: BTCUSDT)
+            points: FundingBatch (hoặc list FundingPoint)
+
+        Returns:
+            Số điểm mới (chưa có trong store)
+        """
+        batch = points if isinstance(points, FundingBatch) else FundingBatch.from_points(points)
+        if not len(batch):
+            return 0
+        frame = pd.DataFrame({"ts": batch.ts, "rate": batch.rate}, copy=False)
+        frame["month"] = np.datetime_as_string(batch.ts.view("datetime64[ms]").astype("datetime64[M]"), unit="M")
+        directory = self._dir(exchange, symbol)
+        os.makedirs(directory, exist_ok=True)
+
+        added = 0
+        for month, part in frame.groupby("month"):
+            path = os.path.join(directory, f"{month}.parquet")
+            part = part[["ts", "rate"]]
+            before = 0
+            if os.path.exists(path):
+                existing = pq.read_table(path).to_pandas()
+                before = len(existing)
+                part = pd.concat([existing, part], ignore_index=True)
+            part = part.drop_duplicates("ts", keep="last").sort_values("ts")
+            added += len(part) - before
+
+            tmp_path = f"{path}.tmp"
+            pq.write_table(pa.Table.from_pandas(part, schema=_SCHEMA, preserve_index=False),
+                           tmp_path, compression="zstd")
+            os.replace(tmp_path, path)
+        return added
+
+    def bounds(self, exchange: str, symbol: str) -> Optional[Tuple[int, int]]:
+        """
+        Điểm đầu / cuối đã lưu
+
+        Returns:
+            (ts đầu, ts cuối) unix ms, hoặc None nếu chưa có dữ liệu
+        """
+        files = self._files(exchange, symbol)
+        if not files:
+            return None
+        first = pq.read_table(files[0], columns=["ts"]).column("ts")
+        last = pq.read_table(files[-1], columns=["ts"]).column("ts")
+        return int(first[0].as_py()), int(last[-1].as_py())
+
+    def load(
+        self,
+        exchange: str,
+        symbol: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """
+        Đọc lịch sử funding từ store (chỉ đọc các tháng cần thiết)
+
+        Args:
+            exchange: Sàn
+            symbol: Cặp (VD: BTCUSDT)
+            start: Mốc đầu (UTC, None = từ đầu)
+            end: Mốc cuối (UTC, None = đến cuối)
+
+        Returns:
+            DataFrame cột rate, index DatetimeIndex UTC (rỗng nếu không có dữ liệu)
+        """
+        files = self._files(exchange, symbol)
+        if start is not None:
+            files = [f for f in files if os.path.basename(f)[:7] >= start.strftime("%Y-%m")]
+        if end is not None:
+            files = [f for f in files if os.path.basename(f)[:7] <= end.strftime("%Y-%m")]
+        if not files:
+            return pd.DataFrame({"rate": pd.Series(dtype="float64")},
+                                index=pd.DatetimeIndex([], tz="UTC", name="ts"))
+
+        frame = pa.concat_tables([pq.read_table(f) for f in files]).to_pandas()
+        frame.index = pd.to_datetime(frame.pop("ts"), unit="ms", utc=True)
+        if start is not None:
+            frame = frame[frame.index >= pd.Timestamp(start)]
+        if end is not None:
+            frame = frame[frame.index <= pd.Timestamp(end)]
+        return frame
+
+    def backfill(
+        self,
+        exchange: str,
+        symbol: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        client: Optional[DerivsClient] = None
+    ) -> int:
+        """
+        Tải lịch sử funding còn thiếu và ghi vào store
+
+        Đã có dữ liệu → chỉ tải phần đuôi sau điểm cuối (và phần đầu nếu `start`
+        sớm hơn điểm đầu). Mỗi page được ghi ngay (sàn NEWEST_FIRST: sau cả khoảng):
+        backfill bị ngắt giữa chừng chạy lại sẽ tiếp tục từ chỗ đã dừng.
+
+        Args:
+            exchange: binance, bybit, deribit
+            symbol: Cặp (VD: BTCUSDT)
+            start: Mốc đầu (UTC, None = BACKFILL_DAYS ngày trước nếu store rỗng)
+            end: Mốc cuối (UTC, None = hiện tại)
+            client: DerivsClient (None = tạo mới)
+
+        Returns:
+            Số điểm mới đã ghi
+        """
+        client = client or DerivsClient()
+        end_ms = int((end or datetime.now(timezone.utc)).timestamp() * 1000)
+        stored = self.bounds(exchange, symbol)
+
+        if stored is None:
+            start_ms = int((start or datetime.now(timezone.utc) - timedelta(days=BACKFILL_DAYS)).timestamp() * 1000)
+            ranges = [(start_ms, end_ms)]
+        else:
+            first, last = stored
+            ranges = [(last + 1, end_ms)]
+            if start is not None and int(start.timestamp() * 1000) < first:
+                ranges.insert(0, (int(start.timestamp() * 1000), first - 1))
+
+        added = 0
+        for range_start, range_end in ranges:
+            if range_start > range_end:
+                continue
+            pending: List[FundingBatch] = []
+            for page in iter_funding_pages(client, exchange, symbol, range_start, range_end):
+                # Điểm không có rate (field API đổi tên / bị thiếu) không được ghi vào store
+                valid = page[~np.isnan(page.rate)]
+                if len(valid) < len(page):
+                    logger.warning(f"Funding backfill {exchange}/{symbol}: skipped {len(page) - len(valid)}/{len(page)} points without rate")
+                page = valid
+                if exchange.lower() in NEWEST_FIRST:
+                    pending.append(page)
+                else:
+                    added += self.write(exchange, symbol, page)
+            added += self.write(exchange, symbol, FundingBatch.concat(pending))
+
+        logger.info(f"Funding backfill {exchange}/{symbol}: {added} new points")
+        return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill lịch sử funding rate vào store Parquet")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser("backfill", help="Tải phần lịch sử còn thiếu")
+    backfill.add_argument("--exchange", required=True, choices=["binance", "bybit", "deribit"])
+    backfill.add_argument("--symbol", required=True)
+    backfill.add_argument("--days", type=int, help="Lấy lùi bao nhiêu ngày (mặc định: chỉ phần đuôi mới)")
+    backfill.add_argument("--root", default=FUNDING_STORE_DIR)
+
+    show = commands.add_parser("show", help="Tóm tắt dữ liệu đã lưu")
+    show.add_argument("--exchange", required=True)
+    show.add_argument("--symbol", required=True)
+    show.add_argument("--root", default=FUNDING_STORE_DIR)
+
+    args = parser.parse_args()
+    store = FundingStore(args.root)
+    if args.command == "backfill":
+        start = datetime.now(timezone.utc) - timedelta(days=args.days) if args.days else None
+        print(f"{store.backfill(args.exchange, args.symbol, start=start)} new points")
+    else:
+        frame = store.load(args.exchange, args.symbol)
+        if frame.empty:
+            print("No data")
+            return
+        print(f"{len(frame)} points {frame.index[0]:%Y-%m-%d %H:%M} → {frame.index[-1]:%Y-%m-%d %H:%M} UTC, "
+              f"mean {frame['rate'].mean() * 100:.4f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,50 @@
 Data provider cho thông tin chi tiết theo thị trường (Trang 2)
 Cung cấp snapshot, drivers, trade plans cho từng asset class
 """
+import os
+import time
 import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timezone
 import streamlit as st
 import logging
-from typing import Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from functools import partial
+from typing import Dict, List, Optional, Tuple
 from schemas import MarketDetail, TradePlan, EquityTop10, EquityItem
+from components.arrow_frames import arrow_cache_data
+from components.bar_store import BAR_REFRESH_SECONDS, get_bar_store
+from components.market_state import FACTOR_MIN, adaptive_ttl, ttl_window
+from components.refresh_policy import MarketHoursOnly
+from components.session_cache import get_cached_data, on_invalidate
+from data_providers.analytics import compact_valid, compute_indicator_table, indicator_snapshot
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Batched OHLCV panel: số ticker mỗi chunk và số chunk chạy song song
+PANEL_CHUNK_SIZE = 25
+PANEL_MAX_WORKERS = 8
+OHLCV_FIELDS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+# Movers scan trên cả universe (500+ mã): nhiều worker hơn, chunk nhỏ hơn,
+# và tổng thời gian tải (cold cache) không vượt quá budget
+SCAN_MAX_WORKERS = int(os.getenv("ADA_SCAN_MAX_WORKERS", "16"))
+SCAN_BUDGET_SECONDS = float(os.getenv("ADA_SCAN_BUDGET_SECONDS", "20"))
+DEADLINE_GRACE_SECONDS = 3.0
+
+# Số entry tối đa của cache OHLC theo ticker / panel (st.cache_data không tự giới hạn)
+OHLC_CACHE_MAX_ENTRIES = int(os.getenv("ADA_OHLC_CACHE_MAX_ENTRIES", "64"))
+
+# TTL gốc (giây) của cache OHLC khi biến động bình thường - TTL thực tế co giãn
+# theo market_state; cache giữ entry tới TTL dài nhất có thể
+OHLC_BASE_TTL = 600
+_OHLC_MAX_TTL = int(OHLC_BASE_TTL / FACTOR_MIN)
+
+# Top 10 cổ phiếu Mỹ: refresh mỗi 30 phút khi phiên US mở, giữ nguyên ngoài giờ
+TOP10_POLICY = MarketHoursOnly("US", 1800)
+
 
 def calculate_atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
     """
@@ -35,10 +67,158 @@ def calculate_atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int
     return tr.rolling(period).mean()
 
 
-@st.cache_data(ttl=600, show_spinner=False)
+def _normalize_index(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    Đưa index về naive datetime để ghép nhiều ticker khác múi giờ
+    (daily: giữ ngày giao dịch local, intraday: quy về UTC)
+    """
+    if getattr(df.index, "tz", None) is None:
+        return df
+    if interval.endswith(("d", "wk", "mo")):
+        df.index = df.index.tz_localize(None)
+    else:
+        df.index = df.index.tz_convert("UTC").tz_localize(None)
+    return df
+
+
+def _download_chunk(
+    tickers: List[str],
+    period: str,
+    interval: str,
+    start: Optional[pd.Timestamp] = None,
+    deadline: Optional[float] = None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Tải OHLCV cho một chunk ticker
+    
+    Dùng yf.Ticker.history thay vì yf.download vì yf.download (bản cũ) dùng
+    state global, không an toàn khi nhiều chunk chạy song song.
+    
+    Args:
+        tickers: Danh sách ticker trong chunk
+        period: Khoảng thời gian (bỏ qua nếu có start)
+        interval: Khoảng cách dữ liệu
+        start: Chỉ tải từ thời điểm này (delta refresh)
+        deadline: Mốc time.monotonic() phải dừng (các ticker chưa tải bị bỏ qua)
+        
+    Returns:
+        Dict ticker -> DataFrame OHLCV (rỗng nếu ticker không có bar mới)
+    """
+    if start is not None:
+        range_kwargs = {"start": start.date() if interval.endswith(("d", "wk", "mo")) else start}
+    else:
+        range_kwargs = {"period": period}
+    
+    frames = {}
+    for ticker in tickers:
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        try:
+            df = yf.Ticker(ticker).history(
+                interval=interval,
+                auto_adjust=False,
+                actions=False,
+                **range_kwargs
+            )
+            if df is None or df.empty:
+                frames[ticker] = pd.DataFrame(columns=OHLCV_FIELDS)
+                continue
+            df = _normalize_index(df, interval)
+            frames[ticker] = df[[c for c in OHLCV_FIELDS if c in df.columns]]
+        except Exception as e:
+            logger.warning(f"Error fetching {ticker} in batch: {e}")
+    return frames
+
+
+def _download_panel(
+    tickers: List[str],
+    period: str,
+    interval: str,
+    start: Optional[pd.Timestamp] = None,
+    chunk_size: int = PANEL_CHUNK_SIZE,
+    max_workers: int = PANEL_MAX_WORKERS,
+    deadline: Optional[float] = None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Chia tickers thành chunk và tải song song
+    
+    Khi có deadline: mỗi chunk tự dừng trước ticker tiếp theo và trả về phần đã
+    tải xong; request treo quá DEADLINE_GRACE_SECONDS thì bị bỏ qua.
+    
+    Returns:
+        Dict ticker -> DataFrame OHLCV (không gồm ticker bị bỏ qua vì deadline/lỗi)
+    """
+    chunks = [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+    logger.info(f"Downloading OHLC for {len(tickers)} tickers in {len(chunks)} chunks")
+    
+    frames: Dict[str, pd.DataFrame] = {}
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks))))
+    try:
+        futures = [
+            pool.submit(_download_chunk, chunk, period, interval, start, deadline)
+            for chunk in chunks
+        ]
+        # Chunk tự dừng khi hết deadline, chỉ chờ thêm request đang chạy dở
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic()) + DEADLINE_GRACE_SECONDS
+        for future in as_completed(futures, timeout=timeout):
+            try:
+                frames.update(future.result())
+            except Exception as e:
+                logger.error(f"Error fetching OHLC chunk: {e}")
+    except FuturesTimeout:
+        logger.warning(f"OHLC download hit deadline: {len(frames)}/{len(tickers)} tickers fetched")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return frames
+
+
+def load_ohlc_frames(
+    tickers: List[str],
+    period: str = "6mo",
+    interval: str = "1d",
+    budget_seconds: Optional[float] = None,
+    max_workers: int = PANEL_MAX_WORKERS,
+    max_age: Optional[int] = None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Lấy OHLCV qua bar store trên disk: chỉ tải phần còn thiếu từ yfinance
+    
+    Args:
+        tickers: Danh sách mã tài sản
+        period: Khoảng thời gian
+        interval: Khoảng cách dữ liệu
+        budget_seconds: Thời gian tối đa cho phần tải network (None = không giới hạn)
+        max_workers: Số chunk tải song song
+        max_age: Số giây bars trên disk còn được coi là mới, nên bằng TTL / chu kỳ
+            refresh của caller (None = BAR_REFRESH_SECONDS)
+        
+    Returns:
+        Dict ticker -> DataFrame OHLCV
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return {}
+    
+    deadline = None if budget_seconds is None else time.monotonic() + budget_seconds
+    downloader = partial(_download_panel, max_workers=max_workers, deadline=deadline)
+    try:
+        return get_bar_store().sync(
+            tickers, period, interval, downloader,
+            max_age=BAR_REFRESH_SECONDS if max_age is None else max_age
+        )
+    except Exception as e:
+        # Bar store lỗi (disk, lock...) → tải thẳng từ network
+        logger.error(f"Bar store unavailable, downloading directly: {e}")
+        frames = downloader(tickers, period, interval)
+        return {t: df for t, df in frames.items() if not df.empty}
+
+
 def fetch_ohlc(ticker: str, period: str = "6mo", interval: str = "1d") -> pd.DataFrame:
     """
-    Fetch dữ liệu OHLC từ yfinance
+    Fetch dữ liệu OHLC (qua bar store, chỉ tải phần còn thiếu)
+    
+    Cache với TTL co giãn theo biến động của ticker (gốc OHLC_BASE_TTL), lưu dạng
+    Arrow IPC: mỗi lần hit là view read-only, không copy dữ liệu
     
     Args:
         ticker: Mã tài sản
@@ -48,21 +228,21 @@ def fetch_ohlc(ticker: str, period: str = "6mo", interval: str = "1d") -> pd.Dat
     Returns:
         DataFrame OHLC
     """
+    ttl = adaptive_ttl(OHLC_BASE_TTL, ticker, key=f"ohlc:{ticker}")
+    return _fetch_ohlc_cached(ticker, period, interval, ttl, ttl_window(ttl))
+
+
+@arrow_cache_data(ttl=_OHLC_MAX_TTL, max_entries=OHLC_CACHE_MAX_ENTRIES)
+def _fetch_ohlc_cached(ticker: str, period: str, interval: str, ttl: int, window: str) -> pd.DataFrame:
+    """fetch_ohlc trong một cửa sổ TTL (`window` chỉ để tạo cache key, bar store mới trong `ttl` giây)"""
     try:
-        logger.info(f"Fetching OHLC for {ticker}")
-        df = yf.download(
-            ticker,
-            period=period,
-            interval=interval,
-            auto_adjust=False,
-            progress=False
-        )
+        df = load_ohlc_frames([ticker], period, interval, max_age=ttl).get(ticker)
         
-        if df.empty:
+        if df is None or df.empty:
             logger.warning(f"No data for {ticker}")
             return pd.DataFrame()
         
-        logger.info(f"Fetched {len(df)} rows for {ticker}")
+        logger.info(f"Loaded {len(df)} rows for {ticker}")
         return df
         
     except Exception as e:
@@ -70,10 +250,170 @@ def fetch_ohlc(ticker: str, period: str = "6mo", interval: str = "1d") -> pd.Dat
         return pd.DataFrame()
 
 
+def frames_to_panel(frames: Dict[str, pd.DataFrame], order: List[str]) -> pd.DataFrame:
+    """
+    Ghép các DataFrame OHLCV riêng lẻ thành một panel
+    
+    Args:
+        frames: Dict ticker -> DataFrame OHLCV
+        order: Thứ tự ticker mong muốn
+        
+    Returns:
+        DataFrame với MultiIndex columns (Price, Ticker)
+    """
+    ordered = [t for t in order if t in frames]
+    if not ordered:
+        return pd.DataFrame()
+    panel = pd.concat([frames[t] for t in ordered], axis=1, keys=ordered)
+    panel = panel.swaplevel(axis=1).sort_index(axis=1)
+    panel.columns.names = ["Price", "Ticker"]
+    return panel
+
+
+def fetch_ohlc_panel(
+    tickers: List[str],
+    period: str = "1mo",
+    interval: str = "1d",
+    budget_seconds: Optional[float] = None,
+    max_workers: int = PANEL_MAX_WORKERS
+) -> pd.DataFrame:
+    """
+    Fetch OHLCV cho nhiều ticker cùng lúc (bar store + chunk tải song song)
+    
+    Cache với TTL co giãn theo mức biến động toàn thị trường (gốc OHLC_BASE_TTL),
+    lưu dạng Arrow IPC: mỗi lần hit là view read-only, không copy dữ liệu
+    
+    Args:
+        tickers: Danh sách mã tài sản
+        period: Khoảng thời gian
+        interval: Khoảng cách dữ liệu
+        budget_seconds: Thời gian tối đa cho phần tải network (None = không giới hạn)
+        max_workers: Số chunk tải song song
+        
+    Returns:
+        DataFrame panel với MultiIndex columns (field, ticker),
+        VD: panel["Close"] là DataFrame giá đóng cửa theo từng ticker
+    """
+    ttl = adaptive_ttl(OHLC_BASE_TTL, key=f"ohlc_panel:{len(tickers)} tickers")
+    return _fetch_ohlc_panel_cached(tickers, period, interval, budget_seconds, max_workers, ttl, ttl_window(ttl))
+
+
+@arrow_cache_data(ttl=_OHLC_MAX_TTL, max_entries=OHLC_CACHE_MAX_ENTRIES)
+def _fetch_ohlc_panel_cached(
+    tickers: List[str],
+    period: str,
+    interval: str,
+    budget_seconds: Optional[float],
+    max_workers: int,
+    ttl: int,
+    window: str
+) -> pd.DataFrame:
+    """fetch_ohlc_panel trong một cửa sổ TTL (`window` chỉ để tạo cache key, bar store mới trong `ttl` giây)"""
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return pd.DataFrame()
+    
+    logger.info(f"Fetching OHLC panel for {len(tickers)} tickers")
+    frames = load_ohlc_frames(tickers, period, interval, budget_seconds, max_workers, max_age=ttl)
+    
+    if not frames:
+        logger.warning("No data for OHLC panel")
+        return pd.DataFrame()
+    
+    panel = frames_to_panel(frames, tickers)
+    logger.info(f"Fetched OHLC panel: {len(panel)} rows x {len(frames)} tickers")
+    return panel
+
+
+def _invalidate_ohlc(asset: Optional[str] = None):
+    """Bỏ cache OHLC của Streamlit và buộc bar store sync lại (asset = None → tất cả)"""
+    _fetch_ohlc_cached.clear()
+    _fetch_ohlc_panel_cached.clear()
+    get_bar_store().expire(None if asset is None else [asset])
+
+
+on_invalidate("prices", _invalidate_ohlc)
+
+
+def rank_movers(panel: pd.DataFrame, vol_window: int = 20) -> pd.DataFrame:
+    """
+    Tính %thay đổi phiên gần nhất và vol ratio cho toàn bộ panel (vectorized)
+    
+    Args:
+        panel: OHLCV panel từ fetch_ohlc_panel
+        vol_window: Cửa sổ trung bình volume
+        
+    Returns:
+        DataFrame index=ticker, columns=[last, pct_change, vol_ratio]
+    """
+    if panel.empty or "Close" not in panel.columns.get_level_values(0):
+        return pd.DataFrame(columns=["last", "pct_change", "vol_ratio"])
+    
+    close = panel["Close"]
+    volume = panel["Volume"].reindex(columns=close.columns) if "Volume" in panel else None
+    
+    close_values = close.to_numpy(dtype=float)
+    compact, counts = compact_valid(close_values)
+    cols = np.arange(compact.shape[1])
+    has_two = counts >= 2
+    
+    last = np.full(len(cols), np.nan)
+    prev = np.full(len(cols), np.nan)
+    last[has_two] = compact[counts[has_two] - 1, cols[has_two]]
+    prev[has_two] = compact[counts[has_two] - 2, cols[has_two]]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct_change = (last / prev - 1.0) * 100.0
+    
+    vol_ratio = np.ones(len(cols))
+    if volume is not None:
+        # Volume lấy theo đúng các phiên có giá Close
+        vol_values = np.where(
+            np.isnan(close_values), np.nan, np.nan_to_num(volume.to_numpy(dtype=float))
+        )
+        vol_compact, _ = compact_valid(vol_values)
+        csum = np.vstack([np.zeros(len(cols)), np.cumsum(np.nan_to_num(vol_compact), axis=0)])
+        enough = counts >= vol_window
+        end = counts[enough]
+        avg = (csum[end, cols[enough]] - csum[end - vol_window, cols[enough]]) / vol_window
+        last_vol = vol_compact[end - 1, cols[enough]]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vol_ratio[enough] = np.where(avg > 0, last_vol / avg, 1.0)
+    
+    stats = pd.DataFrame(
+        {"last": last, "pct_change": pct_change, "vol_ratio": vol_ratio},
+        index=close.columns
+    )
+    return stats[has_two & np.isfinite(pct_change)]
+
+
+def top_k_movers(stats: pd.DataFrame, k: int = 10, column: str = "pct_change") -> pd.DataFrame:
+    """
+    Lấy k dòng có giá trị `column` lớn nhất (partial selection, không sort cả universe)
+    
+    Args:
+        stats: Kết quả rank_movers
+        k: Số dòng cần lấy
+        column: Cột xếp hạng
+        
+    Returns:
+        DataFrame k dòng, sắp xếp giảm dần theo `column`
+    """
+    values = stats[column].to_numpy(dtype=float)
+    if len(values) > k:
+        idx = np.argpartition(-values, k - 1)[:k]
+    else:
+        idx = np.arange(len(values))
+    idx = idx[np.argsort(-values[idx], kind="stable")]
+    return stats.iloc[idx]
+
+
 def build_snapshot(df: pd.DataFrame) -> Dict:
     """
     Xây dựng snapshot từ OHLC data
     
+    Dùng chung indicator engine với bảng chỉ báo nhiều tài sản
+    (compute_indicator_table) để hai đường tính luôn khớp nhau.
+    
     Args:
         df: DataFrame OHLC
         
@@ -84,31 +424,10 @@ def build_snapshot(df: pd.DataFrame) -> Dict:
         if df.empty or len(df) < 2:
             return {}
         
-        last = df["Close"].iloc[-1].item()
-        prev_close = df["Close"].iloc[-2].item()
-        pct_d1 = ((last / prev_close) - 1) * 100
-        
-        day_low = df["Low"].iloc[-1].item()
-        day_high = df["High"].iloc[-1].item()
-        
-        atr = calculate_atr(df["High"], df["Low"], df["Close"], period=14)
-        atr_val = atr.iloc[-1].item() if not atr.empty else np.nan
-        
-        ma20 = df["Close"].rolling(20).mean().iloc[-1].item() if len(df) >= 20 else np.nan
-        ma50 = df["Close"].rolling(50).mean().iloc[-1].item() if len(df) >= 50 else np.nan
-        
-        snapshot = {
-            "last": last,
-            "pct_d1": pct_d1,
-            "day_range": f"{day_low:.2f} - {day_high:.2f}",
-            "atr14": atr_val,
-            "ma20": ma20,
-            "ma50": ma50,
-            "above_ma20": last > ma20 if not np.isnan(ma20) else None,
-            "above_ma50": last > ma50 if not np.isnan(ma50) else None
-        }
-        
-        return snapshot
+        table = compute_indicator_table(frames_to_panel({"_": df}, ["_"]))
+        if table.empty:
+            return {}
+        return indicator_snapshot(table.iloc[0])
         
     except Exception as e:
         logger.error(f"Error building snapshot: {e}")
@@ -227,11 +546,13 @@ def build_detail(asset: str) -> MarketDetail:
     """
     logger.info(f"Building detail for {asset}")
     
-    # Fetch OHLC
-    df = fetch_ohlc(asset, period="6mo", interval="1d")
-    
-    # Build snapshot
-    snapshot = build_snapshot(df)
+    # Snapshot: lấy từ bảng chỉ báo dùng chung, chỉ fetch riêng nếu asset không được theo dõi
+    from data_providers.price_panel import get_indicator_table  # tránh circular import
+    table = get_indicator_table([asset])
+    if not table.empty:
+        snapshot = indicator_snapshot(table.iloc[0])
+    else:
+        snapshot = build_snapshot(fetch_ohlc(asset, period="6mo", interval="1d"))
     
     # Get news
     updates = get_mock_news(asset)
@@ -267,6 +588,10 @@ def build_detail(asset: str) -> MarketDetail:
 
 # ============== US EQUITIES SPECIFIC ==============
 
+# Wikipedia chặn User-Agent mặc định của urllib
+WIKI_HEADERS = {"User-Agent": "Mozilla/5.0 (Agent-Ada market dashboard)"}
+
+
 @st.cache_data(ttl=86400, show_spinner=False)  # Cache 24h
 def get_sp500_tickers() -> List[str]:
     """
@@ -278,9 +603,9 @@ def get_sp500_tickers() -> List[str]:
     try:
         logger.info("Fetching S&P 500 tickers from Wikipedia")
         url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-        tables = pd.read_html(url)
+        tables = pd.read_html(url, match="Symbol", storage_options=WIKI_HEADERS)
         df = tables[0]
-        tickers = df["Symbol"].tolist()
+        tickers = df["Symbol"].astype(str).tolist()
         
         # Clean tickers (remove dots)
         tickers = [t.replace(".", "-") for t in tickers]
@@ -330,6 +655,62 @@ def get_nasdaq_large_caps() -> List[str]:
     return nasdaq_tickers
 
 
+@st.cache_data(ttl=86400, show_spinner=False)  # Cache 24h
+def get_nasdaq100_tickers() -> List[str]:
+    """
+    Lấy danh sách thành phần NASDAQ-100 từ Wikipedia
+    
+    Returns:
+        List tickers (fallback: get_nasdaq_large_caps)
+    """
+    try:
+        logger.info("Fetching NASDAQ-100 tickers from Wikipedia")
+        url = "https://en.wikipedia.org/wiki/Nasdaq-100"
+        tables = pd.read_html(url, match="Ticker", storage_options=WIKI_HEADERS)
+        df = next(t for t in tables if "Ticker" in t.columns)
+        tickers = [t.replace(".", "-") for t in df["Ticker"].astype(str).tolist()]
+        
+        logger.info(f"Fetched {len(tickers)} NASDAQ-100 tickers")
+        return tickers
+        
+    except Exception as e:
+        logger.error(f"Error fetching NASDAQ-100 tickers: {e}")
+        return get_nasdaq_large_caps()
+
+
+# Universe cho movers scan: tên hiển thị -> hàm lấy danh sách tickers
+EQUITY_UNIVERSES = {
+    "S&P 500": get_sp500_tickers,
+    "NASDAQ-100": get_nasdaq100_tickers,
+}
+WATCHLIST_UNIVERSE = "Watchlist"
+# Universe mặc định của trang và của cache warmer (phải trùng để warm đúng cache key)
+DEFAULT_EQUITY_UNIVERSE = "S&P 500"
+
+
+def get_universe_tickers(universe: str, watchlist: Optional[Tuple[str, ...]] = None) -> List[str]:
+    """
+    Danh sách tickers của một universe
+    
+    Args:
+        universe: Tên trong EQUITY_UNIVERSES hoặc WATCHLIST_UNIVERSE
+        watchlist: Tickers tùy chọn (dùng khi universe = WATCHLIST_UNIVERSE)
+        
+    Returns:
+        List tickers (chuẩn hoá chữ hoa, bỏ trùng)
+    """
+    if universe == WATCHLIST_UNIVERSE:
+        tickers = watchlist or ()
+    elif universe in EQUITY_UNIVERSES:
+        tickers = EQUITY_UNIVERSES[universe]()
+    else:
+        logger.warning(f"Unknown universe '{universe}', using NASDAQ large caps")
+        tickers = get_nasdaq_large_caps()
+    
+    cleaned = (t.strip().upper() for t in tickers)
+    return list(dict.fromkeys(t for t in cleaned if t))
+
+
 def calculate_stock_score(ticker: str, pct_change: float, vol_ratio: float, has_news: bool = False) -> float:
     """
     Tính điểm xếp hạng cổ phiếu
@@ -392,104 +773,96 @@ def _get_fallback_top10() -> list[EquityItem]:
     return items
 
 
-@st.cache_data(ttl=1800, show_spinner=False)  # 30 min cache
-def build_top10_equities(universe: str = "NASDAQ Large-Cap", max_tickers: int = 30) -> EquityTop10:
+def _equity_idea(pct_change: float) -> str:
+    """Tạo idea dựa trên % thay đổi"""
+    if pct_change > 5:
+        return "Tăng đột biến - cảnh báo profit-taking"
+    elif pct_change > 3:
+        return "Momentum mạnh - theo dõi pullback"
+    elif pct_change > 1:
+        return "Tăng nhẹ - xu hướng tích cực"
+    elif pct_change > 0:
+        return "Tăng yếu - consolidation"
+    return "Điều chỉnh - chờ entry"
+
+
+def build_top10_equities(
+    universe: str = DEFAULT_EQUITY_UNIVERSE,
+    max_tickers: Optional[int] = None,
+    watchlist: Optional[Tuple[str, ...]] = None,
+    budget_seconds: float = SCAN_BUDGET_SECONDS
+) -> EquityTop10:
+    """
+    Top 10 cổ phiếu tăng mạnh nhất với SHARED session cache (namespace "prices",
+    refresh theo TOP10_POLICY) - cache warmer tính trước trước mỗi lần refresh
+    
+    Args:
+        universe: Tên universe (EQUITY_UNIVERSES hoặc WATCHLIST_UNIVERSE)
+        max_tickers: Giới hạn số ticker (None = toàn bộ universe)
+        watchlist: Tickers khi universe = WATCHLIST_UNIVERSE
+        budget_seconds: Thời gian tải tối đa khi cache nguội
+        
+    Returns:
+        EquityTop10 object
+    """
+    return get_cached_data(
+        _build_top10_equities, universe, max_tickers, watchlist, budget_seconds,
+        _namespace="prices", _policy=TOP10_POLICY
+    )
+
+
+def _build_top10_equities(
+    universe: str,
+    max_tickers: Optional[int],
+    watchlist: Optional[Tuple[str, ...]],
+    budget_seconds: float
+) -> EquityTop10:
     """
     Xây dựng Top 10 cổ phiếu tăng mạnh nhất trong phiên gần nhất
     
-    Universe: Các cổ phiếu vốn hóa lớn và phổ biến trên NASDAQ
+    Universe: S&P 500, NASDAQ-100 hoặc watchlist tùy chọn (quét toàn bộ)
     Xếp hạng: Top 10 cổ phiếu có % tăng cao nhất trong phiên gần nhất
     
     Args:
-        universe: Universe name
-        max_tickers: Giới hạn số ticker để tránh timeout (default 30, giảm từ 100)
+        universe: Tên universe (EQUITY_UNIVERSES hoặc WATCHLIST_UNIVERSE)
+        max_tickers: Giới hạn số ticker (None = toàn bộ universe)
+        watchlist: Tickers khi universe = WATCHLIST_UNIVERSE
+        budget_seconds: Thời gian tải tối đa khi cache nguội
         
     Returns:
         EquityTop10 object
     """
-    logger.info("Building Top 10 strongest NASDAQ equities...")
-    
-    # Lấy danh sách NASDAQ large-caps (giới hạn để tránh timeout)
-    all_tickers = get_nasdaq_large_caps()
-    tickers = all_tickers[:max_tickers]  # Chỉ lấy top 30 ticker đầu (most liquid)
+    logger.info(f"Building Top 10 strongest equities ({universe})...")
     
-    logger.info(f"Using {len(tickers)} tickers (from {len(all_tickers)} total) to avoid timeout")
+    all_tickers = get_universe_tickers(universe, watchlist)
+    tickers = all_tickers[:max_tickers] if max_tickers else all_tickers
     
-    items = []
-    
-    # Fetch giá cho tất cả tickers (batch download nhanh hơn)
-    logger.info(f"Fetching prices for {len(tickers)} NASDAQ tickers...")
-    
-    processed_count = 0
-    error_count = 0
-    
-    for ticker in tickers:
-        try:
-            df = fetch_ohlc(ticker, period="1mo", interval="1d")
-            processed_count += 1
-            
-            if processed_count % 10 == 0:
-                logger.info(f"Processed {processed_count}/{len(tickers)} tickers, found {len(items)} valid...")
-            
-            if df is None or (isinstance(df, pd.DataFrame) and df.empty) or len(df) < 2:
-                continue
-            
-            last = df["Close"].iloc[-1].item()
-            prev = df["Close"].iloc[-2].item()
-            pct_change = ((last / prev) - 1) * 100
-            
-            # Tính vol ratio
-            if len(df) >= 20:
-                vol_20d_avg = df["Volume"].tail(20).mean()
-                last_vol = df["Volume"].iloc[-1].item()
-                # Ensure vol_20d_avg is scalar
-                if isinstance(vol_20d_avg, pd.Series):
-                    vol_20d_avg = vol_20d_avg.item() if len(vol_20d_avg) == 1 else vol_20d_avg.iloc[0]
-                vol_ratio = last_vol / vol_20d_avg if vol_20d_avg > 0 else 1.0
-            else:
-                vol_ratio = 1.0
-            
-            # Simple score = pct_change (chỉ xếp hạng theo % tăng)
-            score = pct_change
-            
-            # Tạo idea dựa trên % thay đổi
-            if pct_change > 5:
-                idea = "Tăng đột biến - cảnh báo profit-taking"
-            elif pct_change > 3:
-                idea = "Momentum mạnh - theo dõi pullback"
-            elif pct_change > 1:
-                idea = "Tăng nhẹ - xu hướng tích cực"
-            elif pct_change > 0:
-                idea = "Tăng yếu - consolidation"
-            else:
-                idea = "Điều chỉnh - chờ entry"
-            
-            item = EquityItem(
-                ticker=ticker,
-                last=last,
-                pct_change=pct_change,
-                vol_ratio=vol_ratio,
-                catalyst="Market momentum",
-                source_url=f"https://finance.yahoo.com/quote/{ticker}",
-                idea=idea,
-                score=score
-            )
-            
-            items.append(item)
-            
-        except Exception as e:
-            error_count += 1
-            if error_count <= 5:  # Chỉ log 5 lỗi đầu
-                logger.warning(f"Error processing {ticker}: {e}")
-            continue
+    # Một panel OHLCV cho cả universe (chunk chạy song song, có latency budget)
+    logger.info(f"Fetching OHLC panel for {len(tickers)} {universe} tickers...")
+    panel = fetch_ohlc_panel(
+        tickers, period="1mo", interval="1d",
+        budget_seconds=budget_seconds, max_workers=SCAN_MAX_WORKERS
+    )
     
-    # Sắp xếp theo % tăng giảm (descending)
-    items.sort(key=lambda x: x.pct_change, reverse=True)
+    # Xếp hạng vectorized trên toàn panel, chỉ chọn top-k
+    stats = rank_movers(panel)
+    top = top_k_movers(stats, k=10)
     
-    logger.info(f"Total processed: {processed_count}, errors: {error_count}, valid items: {len(items)}")
+    logger.info(f"Total tickers: {len(tickers)}, valid: {len(stats)}")
     
-    # Lấy top 10 tăng mạnh nhất
-    top_items = items[:10]
+    top_items = [
+        EquityItem(
+            ticker=ticker,
+            last=float(row["last"]),
+            pct_change=float(row["pct_change"]),
+            vol_ratio=float(row["vol_ratio"]),
+            catalyst="Market momentum",
+            source_url=f"https://finance.yahoo.com/quote/{ticker}",
+            idea=_equity_idea(row["pct_change"]),
+            score=float(row["pct_change"])  # Simple score = pct_change (chỉ xếp hạng theo % tăng)
+        )
+        for ticker, row in top.iterrows()
+    ]
     
     # FALLBACK: Nếu không có data, dùng mock data
     if not top_items:
@@ -498,6 +871,8 @@ def build_top10_equities(universe: str = "NASDAQ Large-Cap", max_tickers: int =
         method_note = "⚠️ FALLBACK: Dữ liệu mẫu (yfinance API unavailable)"
     else:
         method_note = "Top 10 cổ phiếu tăng mạnh nhất trong phiên gần nhất (theo %d/d)"
+        if len(stats) < len(tickers):
+            method_note += f" - đã quét {len(stats)}/{len(tickers)} mã"
     
     result = EquityTop10(
         universe=universe,
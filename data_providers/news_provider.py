@@ -7,7 +7,8 @@ from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Optional
 import logging
 from components.session_cache import (
-    get_cached_data
+    get_cached_data,
+    on_invalidate
 )
 
 logging.basicConfig(level=logging.INFO)
@@ -112,7 +113,7 @@ class NewsProvider:
             return []
         
         # Dùng shared cache - tự động handle session-based invalidation
-        return get_cached_data(_fetch)
+        return get_cached_data(_fetch, _namespace="news")
     
     def _fetch_newsapi(self, hours_back: int, max_items: int) -> List[Dict]:
         """Fetch từ NewsAPI.org"""
@@ -343,3 +344,6 @@ def get_market_news(hours_back: int = 48, max_items: int = 10) -> List[Dict]:
     """
     provider = NewsProvider()
     return provider.get_news(hours_back, max_items)
+
+
+on_invalidate("news", lambda asset: get_market_news.clear())
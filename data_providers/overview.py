@@ -2,7 +2,6 @@
 Data provider cho tổng quan thị trường (Trang 1)
 Cung cấp dữ liệu điểm nhấn, vĩ mô, lịch kinh tế, tâm lý rủi ro
 """
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timezone, timedelta
@@ -15,6 +14,8 @@ from components.session_cache import (
     get_market_data_cache_key,
     get_cached_data
 )
+from data_providers.price_panel import get_close_panel, market_ttl, PANEL_POLICY
+from data_providers.analytics import compute_return_matrix
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -39,54 +40,6 @@ TICKER_DISPLAY_NAMES = {
 }
 
 
-def fetch_prices(tickers: List[str], period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
-    """
-    Fetch giá từ yfinance với session-based SHARED cache
-    Cache được share giữa tất cả users - chỉ user đầu tiên fetch
-    
-    Args:
-        tickers: Danh sách mã tài sản
-        period: Khoảng thời gian (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max)
-        interval: Khoảng cách dữ liệu (1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo)
-        
-    Returns:
-        DataFrame với giá Close
-    """
-    # Định nghĩa fetch function
-    def _fetch():
-        logger.info(f"🔄 Fetching fresh market data (new session or first user)")
-        logger.info(f"Fetching prices for {len(tickers)} tickers: period={period}, interval={interval}")
-        
-        data = yf.download(
-            tickers=tickers,
-            period=period,
-            interval=interval,
-            auto_adjust=False,
-            progress=False,
-            threads=True
-        )
-        
-        # Xử lý MultiIndex columns nếu có nhiều tickers
-        if isinstance(data.columns, pd.MultiIndex):
-            data = data["Close"]
-        
-        logger.info(f"Successfully fetched {len(data)} rows - will be cached for entire session")
-        return data
-    
-    # Dùng shared cache - tự động handle session-based invalidation
-    try:
-        return get_cached_data(_fetch)
-    except Exception as e:
-        logger.error(f"Error fetching prices: {e}")
-        st.warning(f"⚠️ Không thể tải dữ liệu giá: {e}")
-        return pd.DataFrame()
-        
-    except Exception as e:
-        logger.error(f"Error fetching prices: {e}")
-        st.warning(f"⚠️ Không thể tải dữ liệu giá: {e}")
-        return pd.DataFrame()
-
-
 def calculate_period_return(prices: pd.Series, days: int) -> float:
     """
     Tính % thay đổi trong một khoảng thời gian
@@ -132,52 +85,82 @@ def calculate_zscore(series: pd.Series, window: int = 20) -> float:
         return np.nan
 
 
-@st.cache_data(ttl=600, show_spinner=False)
+def _compute_cross_asset_returns() -> pd.DataFrame:
+    """
+    Tính returns D1/WTD/MTD + z-score cho CORE_ASSETS từ panel dùng chung
+    
+    Returns:
+        DataFrame index=ticker (xem compute_return_matrix)
+    """
+    return compute_return_matrix(get_close_panel(CORE_ASSETS))
+
+
+def get_cross_asset_returns() -> pd.DataFrame:
+    """
+    Returns D1/WTD/MTD + z-score cho CORE_ASSETS, tính vectorized một lần mỗi bucket
+    của PANEL_POLICY (CORE_ASSETS gồm cả BTC-USD giao dịch 24/7)
+    Dùng chung cho snapshot (Trang 1) và heatmap (Trang 3)
+    
+    Returns:
+        DataFrame index=ticker (xem compute_return_matrix) - KHÔNG được sửa trực tiếp
+    """
+    try:
+        return get_cached_data(
+            _compute_cross_asset_returns,
+            _namespace="prices", _policy=PANEL_POLICY, _assets=CORE_ASSETS,
+            _ttl=market_ttl()
+        )
+    except Exception as e:
+        logger.error(f"Error computing cross-asset returns: {e}")
+        return pd.DataFrame()
+
+
 def get_market_snapshot() -> Dict:
     """
-    Lấy snapshot thị trường hiện tại
+    Lấy snapshot thị trường hiện tại (shared session cache, namespace "prices",
+    refresh theo PANEL_POLICY, TTL trong phiên co giãn theo biến động)
+    
+    Returns:
+        Dict chứa giá hiện tại, % thay đổi D1, WTD, MTD, z-scores
+    """
+    return get_cached_data(
+        _build_market_snapshot,
+        _namespace="prices", _policy=PANEL_POLICY, _assets=CORE_ASSETS,
+        _ttl=market_ttl()
+    )
+
+
+def _build_market_snapshot() -> Dict:
+    """
+    Tạo snapshot thị trường từ bảng returns của CORE_ASSETS
     
     Returns:
         Dict chứa giá hiện tại, % thay đổi D1, WTD, MTD, z-scores
     """
     try:
-        prices = fetch_prices(CORE_ASSETS, period="3mo", interval="1d")
+        returns = get_cross_asset_returns()
         
-        if prices.empty:
+        if returns.empty:
             return {}
         
         snapshot = {}
         
         for ticker in CORE_ASSETS:
-            try:
-                if ticker not in prices.columns:
-                    continue
-                
-                ticker_prices = prices[ticker].dropna()
-                
-                if len(ticker_prices) < 2:
-                    continue
-                
-                last_price = float(ticker_prices.iloc[-1])
-                d1_return = calculate_period_return(ticker_prices, 1)
-                wtd_return = calculate_period_return(ticker_prices, 5)
-                mtd_return = calculate_period_return(ticker_prices, 22)
-                zscore = calculate_zscore(ticker_prices, window=20)
-                
-                # Use display name if available
-                display_ticker = TICKER_DISPLAY_NAMES.get(ticker, ticker)
-                
-                snapshot[display_ticker] = {
-                    "last": last_price,
-                    "d1": d1_return,
-                    "wtd": wtd_return,
-                    "mtd": mtd_return,
-                    "zscore": zscore
-                }
-                
-            except Exception as e:
-                logger.warning(f"Error processing {ticker}: {e}")
+            if ticker not in returns.index:
                 continue
+            
+            row = returns.loc[ticker]
+            
+            # Use display name if available
+            display_ticker = TICKER_DISPLAY_NAMES.get(ticker, ticker)
+            
+            snapshot[display_ticker] = {
+                "last": float(row["last"]),
+                "d1": float(row["d1"]),
+                "wtd": float(row["wtd"]),
+                "mtd": float(row["mtd"]),
+                "zscore": float(row["zscore"])
+            }
         
         logger.info(f"Market snapshot created with {len(snapshot)} assets")
         return snapshot
@@ -363,7 +346,6 @@ def build_overview(tz_name: str = "Asia/Ho_Chi_Minh") -> MarketOverview:
     return overview
 
 
-@st.cache_data(ttl=600, show_spinner=False)
 def get_cross_asset_table() -> pd.DataFrame:
     """
     Tạo bảng cross-asset với D1/WTD/MTD
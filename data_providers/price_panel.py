@@ -0,0 +1,260 @@
+"""
+Price panel dùng chung cho tất cả các trang
+Tải union của mọi symbol đang theo dõi MỘT lần mỗi bucket refresh, ở period
+rộng nhất, các consumer (snapshot, build_detail, heatmap, bảng kỹ thuật) chỉ lấy slice
+Bảng chỉ báo kỹ thuật cũng được tính một lần trên cả panel
+
+Crypto giao dịch 24/7 nên được tải riêng theo chu kỳ co giãn theo biến động
+(CRYPTO_POLICY), các thị trường còn lại theo phiên (MARKET_POLICY) cộng TTL
+trong phiên co giãn theo VIX / z-score (market_ttl); panel gộp refresh khi một
+trong hai nhóm đổi bucket (PANEL_POLICY)
+Mỗi panel mới được đưa vào components.market_state để cập nhật hệ số biến động
+"""
+import os
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from components.market_state import adaptive_ttl, update_market_state
+from components.refresh_policy import Composite, RefreshPolicy, SessionBound, VolatilityAdaptive
+from components.session_cache import get_cached_data, get_current_session
+from data_providers.analytics import compute_indicator_table, compute_return_matrix, compute_vol_ratio
+from data_providers.market_details import (
+    load_ohlc_frames,
+    frames_to_panel,
+    FX_MAJORS, CRYPTO_MAJORS, OIL_TICKERS, GLOBAL_INDICES
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Period rộng nhất mà các consumer cần (build_detail: 6mo, snapshot: 3mo)
+PANEL_PERIOD = "6mo"
+PANEL_INTERVAL = "1d"
+
+# Refresh policy theo nhóm tài sản (crypto: chu kỳ co giãn theo biến động của BTC)
+CRYPTO_POLICY = VolatilityAdaptive(
+    base_seconds=int(os.getenv("ADA_CRYPTO_REFRESH_SECONDS", "900")), asset="BTC-USD"
+)
+MARKET_POLICY = SessionBound()
+PANEL_POLICY = Composite((MARKET_POLICY, CRYPTO_POLICY))
+
+# TTL gốc (giây) trong phiên của dữ liệu thị trường khi biến động bình thường
+MARKET_INTRADAY_TTL = int(os.getenv("ADA_MARKET_INTRADAY_TTL", "1800"))
+
+# id() của panel gần nhất đã đưa vào market_state
+_market_state_panel: Optional[int] = None
+
+
+def tracked_symbols() -> List[str]:
+    """
+    Union của tất cả danh sách tài sản đang theo dõi (giữ thứ tự, bỏ trùng)
+
+    Returns:
+        List tickers
+    """
+    # Import tại chỗ để tránh circular import (overview import module này)
+    from data_providers.overview import CORE_ASSETS
+
+    groups = [CORE_ASSETS, FX_MAJORS, CRYPTO_MAJORS, OIL_TICKERS, GLOBAL_INDICES]
+    return list(dict.fromkeys(t for group in groups for t in group))
+
+
+def market_ttl() -> Optional[int]:
+    """
+    TTL trong phiên của dữ liệu thị trường (panel, bảng suy ra từ panel)
+
+    Returns:
+        MARKET_INTRADAY_TTL co giãn theo hệ số biến động toàn thị trường,
+        None ngoài giờ giao dịch (giữ nguyên tới phiên kế tiếp)
+    """
+    if get_current_session()[0] == "Off-Market":
+        return None
+    return adaptive_ttl(MARKET_INTRADAY_TTL, key="prices:markets")
+
+
+def panel_groups() -> Dict[str, Tuple[List[str], RefreshPolicy]]:
+    """
+    Chia symbols đang theo dõi thành các nhóm có refresh policy riêng
+
+    Returns:
+        Dict tên nhóm -> (tickers, policy)
+    """
+    symbols = tracked_symbols()
+    crypto = [t for t in symbols if t in CRYPTO_MAJORS or t.endswith("-USD")]
+    markets = [t for t in symbols if t not in crypto]
+    return {
+        "markets": (markets, MARKET_POLICY),
+        "crypto": (crypto, CRYPTO_POLICY),
+    }
+
+
+def group_max_age(group: str) -> Optional[int]:
+    """
+    Số giây bars của nhóm trong bar store còn được coi là mới
+
+    Theo đúng chu kỳ refresh của nhóm để bucket mới luôn đọc được bars mới
+
+    Args:
+        group: Tên nhóm trong panel_groups()
+
+    Returns:
+        Chu kỳ hiện tại của CRYPTO_POLICY (crypto), market_ttl() (thị trường),
+        None = mặc định của bar store
+    """
+    if group == "crypto":
+        return CRYPTO_POLICY.interval()
+    return market_ttl()
+
+
+def _load_group_frames(group: str, tickers: Tuple[str, ...], period: str, interval: str) -> Dict[str, pd.DataFrame]:
+    """
+    Tải OHLCV cho một nhóm symbols
+
+    Args:
+        group: Tên nhóm trong panel_groups()
+        tickers: Các ticker của nhóm
+        period: Khoảng thời gian
+        interval: Khoảng cách dữ liệu
+
+    Returns:
+        Dict ticker -> DataFrame OHLCV
+    """
+    logger.info(f"🔄 Loading {len(tickers)} symbols for price panel ({period}, {interval})")
+    return load_ohlc_frames(list(tickers), period=period, interval=interval, max_age=group_max_age(group))
+
+
+def _load_price_panel(period: str, interval: str) -> pd.DataFrame:
+    """
+    Ghép panel OHLCV cho toàn bộ symbols từ dữ liệu đã cache của từng nhóm
+
+    Args:
+        period: Khoảng thời gian
+        interval: Khoảng cách dữ liệu
+
+    Returns:
+        DataFrame với MultiIndex columns (Price, Ticker)
+    """
+    symbols = tracked_symbols()
+    logger.info(f"🔄 Building shared price panel for {len(symbols)} symbols ({period}, {interval})")
+
+    frames: Dict[str, pd.DataFrame] = {}
+    for group, (tickers, policy) in panel_groups().items():
+        if tickers:
+            frames.update(get_cached_data(
+                _load_group_frames, group, tuple(tickers), period, interval,
+                _namespace="prices", _policy=policy, _assets=tickers,
+                _ttl=market_ttl() if group == "markets" else None
+            ))
+
+    panel = frames_to_panel(frames, symbols)
+    if panel.empty:
+        logger.warning("Price panel is empty")
+        return panel
+
+    logger.info(f"Price panel ready: {len(panel)} rows x {panel.columns.get_level_values(1).nunique()} symbols")
+    return panel
+
+
+def _refresh_market_state(panel: pd.DataFrame):
+    """Cập nhật market_state từ panel (chỉ khi panel đổi so với lần trước)"""
+    global _market_state_panel
+    if panel.empty or id(panel) == _market_state_panel:
+        return
+    _market_state_panel = id(panel)
+
+    close = panel["Close"]
+    matrix = compute_return_matrix(close)
+    if matrix.empty:
+        return
+    vix = matrix["last"].get("^VIX")
+    factor = update_market_state(
+        matrix["zscore"].to_dict(), compute_vol_ratio(close).to_dict(),
+        vix=None if vix is None else float(vix)
+    )
+    logger.info(f"Market state updated: volatility factor {factor:.2f}" + (f" (VIX {vix:.1f})" if vix is not None else ""))
+
+
+def get_price_panel() -> pd.DataFrame:
+    """
+    Lấy panel OHLCV dùng chung của bucket refresh hiện tại
+
+    Shared session cache (namespace "prices", PANEL_POLICY): SHARE cùng một object
+    giữa tất cả users; khi sang bucket mới trả panel cũ trong lúc tải lại nền.
+    Chỉ nhóm đổi bucket mới được tải lại (crypto mỗi chu kỳ, thị trường mỗi phiên
+    hoặc khi hết market_ttl()).
+
+    Returns:
+        DataFrame với MultiIndex columns (Price, Ticker) - KHÔNG được sửa trực tiếp
+    """
+    try:
+        panel = get_cached_data(
+            _load_price_panel, PANEL_PERIOD, PANEL_INTERVAL,
+            _namespace="prices", _policy=PANEL_POLICY, _assets=tracked_symbols(),
+            _ttl=market_ttl()
+        )
+    except Exception as e:
+        logger.error(f"Error building price panel: {e}")
+        return pd.DataFrame()
+
+    try:
+        _refresh_market_state(panel)
+    except Exception as e:
+        logger.warning(f"Market state update failed: {e}")
+    return panel
+
+
+def get_close_panel(tickers: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Slice giá Close từ panel dùng chung
+
+    Args:
+        tickers: Chỉ lấy các ticker này (None = tất cả)
+
+    Returns:
+        DataFrame giá Close (columns = tickers có dữ liệu)
+    """
+    panel = get_price_panel()
+    if panel.empty:
+        return pd.DataFrame()
+
+    close = panel["Close"]
+    if tickers is not None:
+        close = close[[t for t in tickers if t in close.columns]]
+    return close.dropna(how="all")
+
+
+def _load_indicator_table() -> pd.DataFrame:
+    """
+    Tính bảng chỉ báo cho toàn bộ panel (một lần mỗi bucket, qua shared cache)
+
+    Returns:
+        DataFrame chỉ báo (index = ticker)
+    """
+    return compute_indicator_table(get_price_panel())
+
+
+def get_indicator_table(tickers: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Bảng chỉ báo kỹ thuật (ATR, SMA/EMA, RSI, Bollinger, vị trí MA) cho các ticker
+
+    Args:
+        tickers: Chỉ lấy các ticker này, giữ thứ tự (None = tất cả)
+
+    Returns:
+        DataFrame index = ticker (bỏ các ticker không có dữ liệu) - KHÔNG được sửa trực tiếp
+    """
+    try:
+        table = get_cached_data(
+            _load_indicator_table,
+            _namespace="prices", _policy=PANEL_POLICY, _assets=tracked_symbols(),
+            _ttl=market_ttl()
+        )
+    except Exception as e:
+        logger.error(f"Error computing indicator table: {e}")
+        return pd.DataFrame()
+
+    if tickers is None or table.empty:
+        return table
+    return table.loc[[t for t in tickers if t in table.index]]
@@ -14,11 +14,13 @@ from components.session_badge import render_session_bar, get_active_session_ttl
 
 logger = logging.getLogger(__name__)
 from components.timestamp import render_timestamp
+from components.session_cache import invalidate_cache, is_data_fresh, session_label
+from components.cache_warmer import start_cache_warmer
 from components.copy import copy_section, copy_page_content
 from components.exporters import show_export_options
 from data_providers.overview import build_overview, get_cross_asset_table
 from data_providers.news_provider import NewsProvider
-from data_providers.ai_analyst import get_ada_analyst
+from data_providers.ai_analyst import get_ada_analyst, get_overview_commentary
 
 # Cấu hình trang
 st.set_page_config(
@@ -27,6 +29,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Warm cache nền trước mỗi lần mở phiên (idempotent)
+start_cache_warmer()
+
 # CSS
 st.markdown("""
 <style>
@@ -65,7 +70,8 @@ with st.spinner("Đang tải dữ liệu thị trường..."):
 render_timestamp(
     datetime.fromisoformat(overview.last_updated),
     tz_name,
-    overview.session
+    overview.session,
+    is_fresh=is_data_fresh("prices", "news")
 )
 
 st.markdown("---")
@@ -286,28 +292,9 @@ st.markdown("## 🎯 Quan điểm đầu ngày")
 
 st.markdown("### Nhận định của Ada")
 
-# Get AI-powered analysis
+# Get AI-powered analysis (một lần mỗi phiên, dùng chung cho mọi user)
 with st.spinner("Ada đang tổng hợp thông tin và phân tích thị trường..."):
-    # Fetch news
-    news_provider = NewsProvider()
-    news_items = news_provider.get_news(hours_back=24, max_items=10)
-    
-    # Get AI analyst
-    ada_analyst = get_ada_analyst()
-    
-    # Get VIX, SPX, DXY from snapshot
-    vix_level = overview.market_snapshot.get("^VIX", {}).get("last", 20)
-    spx_change = overview.market_snapshot.get("^GSPC", {}).get("d1", 0)
-    dxy_level = overview.risk_sentiment.get("dxy", 100)
-    
-    # Generate AI analysis
-    ai_analysis = ada_analyst.generate_market_overview_analysis(
-        snapshot=overview.market_snapshot,
-        news=news_items,
-        vix_level=vix_level,
-        spx_change=spx_change,
-        dxy_level=dxy_level
-    )
+    ai_analysis = get_overview_commentary()
     
     # Display analysis
     st.markdown(ai_analysis)
@@ -363,5 +350,6 @@ with st.sidebar:
     """)
     
     if st.button("🔄 Làm mới dữ liệu"):
-        st.cache_data.clear()
+        # Chỉ làm mới dữ liệu trang này hiển thị (giá, tin tức và nhận định AI) của phiên hiện tại
+        invalidate_cache("prices", "news", "ai", session=session_label())
         st.rerun()
@@ -1,6 +1,6 @@
 """
 Trang 2: Thông tin chi tiết theo thị trường
-Tabs: US Equities, Vàng, FX Majors, Crypto, Dầu, Chỉ số, ETF Flows
+Tabs: Vàng, FX Majors, Crypto, Dầu, Chỉ số, ETF Flows, US Equities
 """
 import streamlit as st
 from datetime import datetime, timezone
@@ -9,12 +9,18 @@ import sys
 sys.path.insert(0, '..')
 
 from components.timestamp import render_timestamp
+from components.session_cache import invalidate_cache, is_data_fresh, session_label
+from components.cache_warmer import start_cache_warmer
 from components.copy import copy_section, copy_page_content
 from components.exporters import show_export_options
 from data_providers.market_details import (
     build_detail,
+    build_top10_equities,
+    EQUITY_UNIVERSES, WATCHLIST_UNIVERSE, DEFAULT_EQUITY_UNIVERSE,
     FX_MAJORS, CRYPTO_MAJORS, OIL_TICKERS, GLOBAL_INDICES
 )
+from data_providers.price_panel import get_indicator_table
+from data_providers.analytics import ma_position
 from data_providers.ai_analyst import get_ada_analyst
 from data_providers.news_provider import NewsProvider
 from data_providers.bold_report import BoldReportProvider
@@ -27,6 +33,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Warm cache nền trước mỗi lần mở phiên (idempotent)
+start_cache_warmer()
+
 # CSS
 st.markdown("""
 <style>
@@ -113,7 +122,8 @@ tabs = st.tabs([
     "₿ Crypto",
     "🛢️ Dầu",
     "📈 Chỉ số",
-    "💰 ETF Flows"
+    "💰 ETF Flows",
+    "🇺🇸 US Equities"
 ])
 
 
@@ -209,7 +219,8 @@ def render_asset_detail(asset: str, detail, key_prefix: str):
     render_timestamp(
         datetime.fromisoformat(detail.last_updated),
         tz_name,
-        "Asia"
+        "Asia",
+        is_fresh=is_data_fresh("prices")
     )
     
     # (A) SNAPSHOT
@@ -475,23 +486,15 @@ with tabs[1]:
     
     # Overview tất cả FX Majors
     with st.expander("📊 Overview tất cả FX Majors"):
-        fx_overview = []
-        for fx in FX_MAJORS:
-            try:
-                detail = build_detail(fx)
-                snap = detail.snapshot
-                if snap:
-                    fx_overview.append({
-                        "Pair": fx,
-                        "Last": f"{snap.get('last', 0):.4f}",
-                        "%D1": f"{snap.get('pct_d1', 0):+.2f}%",
-                        "ATR(14)": f"{snap.get('atr14', 0):.4f}"
-                    })
-            except:
-                continue
+        fx_table = get_indicator_table(FX_MAJORS)
         
-        if fx_overview:
-            fx_df = pd.DataFrame(fx_overview)
+        if not fx_table.empty:
+            fx_df = pd.DataFrame({
+                "Pair": fx_table.index,
+                "Last": fx_table["last"].map("{:.4f}".format).values,
+                "%D1": fx_table["pct_d1"].map("{:+.2f}%".format).values,
+                "ATR(14)": fx_table["atr14"].map("{:.4f}".format).values
+            })
             st.dataframe(fx_df, width="stretch", hide_index=True)
 
 
@@ -508,23 +511,15 @@ with tabs[2]:
     
     # Overview tất cả Crypto
     with st.expander("📊 Overview tất cả Crypto"):
-        crypto_overview = []
-        for crypto in CRYPTO_MAJORS:
-            try:
-                detail = build_detail(crypto)
-                snap = detail.snapshot
-                if snap:
-                    crypto_overview.append({
-                        "Crypto": crypto,
-                        "Last": f"${snap.get('last', 0):,.2f}",
-                        "%D1": f"{snap.get('pct_d1', 0):+.2f}%",
-                        "ATR(14)": f"{snap.get('atr14', 0):.2f}"
-                    })
-            except:
-                continue
+        crypto_table = get_indicator_table(CRYPTO_MAJORS)
         
-        if crypto_overview:
-            crypto_df = pd.DataFrame(crypto_overview)
+        if not crypto_table.empty:
+            crypto_df = pd.DataFrame({
+                "Crypto": crypto_table.index,
+                "Last": crypto_table["last"].map("${:,.2f}".format).values,
+                "%D1": crypto_table["pct_d1"].map("{:+.2f}%".format).values,
+                "ATR(14)": crypto_table["atr14"].map("{:.2f}".format).values
+            })
             st.dataframe(crypto_df, width="stretch", hide_index=True)
 
 
@@ -573,34 +568,16 @@ with tabs[4]:
     
     # Overview tất cả chỉ số
     with st.expander("📊 Overview tất cả chỉ số"):
-        indices_overview = []
-        for idx in GLOBAL_INDICES:
-            try:
-                detail = build_detail(idx)
-                snap = detail.snapshot
-                if snap:
-                    above_ma20 = snap.get('above_ma20', None)
-                    above_ma50 = snap.get('above_ma50', None)
-                    
-                    status = ""
-                    if above_ma20 and above_ma50:
-                        status = "🟢 Bullish"
-                    elif not above_ma20 and not above_ma50:
-                        status = "🔴 Bearish"
-                    else:
-                        status = "🟡 Mixed"
-                    
-                    indices_overview.append({
-                        "Index": idx,
-                        "Last": f"{snap.get('last', 0):,.2f}",
-                        "%D1": f"{snap.get('pct_d1', 0):+.2f}%",
-                        "Status": status
-                    })
-            except:
-                continue
+        indices_table = get_indicator_table(GLOBAL_INDICES)
         
-        if indices_overview:
-            indices_df = pd.DataFrame(indices_overview)
+        if not indices_table.empty:
+            status_labels = {"above": "🟢 Bullish", "below": "🔴 Bearish", "mixed": "🟡 Mixed"}
+            indices_df = pd.DataFrame({
+                "Index": indices_table.index,
+                "Last": indices_table["last"].map("{:,.2f}".format).values,
+                "%D1": indices_table["pct_d1"].map("{:+.2f}%".format).values,
+                "Status": ma_position(indices_table).map(status_labels).values
+            })
             st.dataframe(indices_df, width="stretch", hide_index=True)
 
 
@@ -747,6 +724,50 @@ with tabs[5]:
             st.warning("Không thể tải dữ liệu so sánh. API có thể đang bảo trì.")
 
 
+# ============== TAB 7: US EQUITIES (TOP 10 MOVERS) ==============
+with tabs[6]:
+    st.markdown("## 🇺🇸 Top 10 cổ phiếu tăng mạnh nhất")
+    
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        universe_options = list(EQUITY_UNIVERSES) + [WATCHLIST_UNIVERSE]
+        universe = st.selectbox(
+            "Universe:",
+            universe_options,
+            index=universe_options.index(DEFAULT_EQUITY_UNIVERSE),
+            key="equity_universe"
+        )
+    watchlist = None
+    with col2:
+        if universe == WATCHLIST_UNIVERSE:
+            watchlist_text = st.text_input(
+                "Watchlist (phân cách bằng dấu phẩy):",
+                value="AAPL, MSFT, NVDA, AMZN, GOOGL, META, TSLA",
+                key="equity_watchlist"
+            )
+            watchlist = tuple(t.strip().upper() for t in watchlist_text.split(",") if t.strip())
+    
+    with st.spinner(f"Đang quét {universe}..."):
+        top10 = build_top10_equities(universe=universe, watchlist=watchlist)
+    
+    st.caption(f"📌 {top10.method}")
+    
+    if top10.items:
+        top10_df = pd.DataFrame([
+            {
+                "Ticker": item.ticker,
+                "Last": f"{item.last:,.2f}",
+                "%D1": f"{item.pct_change:+.2f}%",
+                "Vol Ratio": f"{item.vol_ratio:.2f}x",
+                "Idea": item.idea
+            }
+            for item in top10.items
+        ])
+        st.dataframe(top10_df, width="stretch", hide_index=True)
+    
+    render_timestamp(datetime.fromisoformat(top10.last_updated), tz_name)
+
+
 # Sidebar
 with st.sidebar:
     st.markdown("### ℹ️ Thông tin trang")
@@ -765,5 +786,6 @@ with st.sidebar:
     """)
     
     if st.button("🔄 Làm mới dữ liệu"):
-        st.cache_data.clear()
+        # Chỉ làm mới dữ liệu trang này hiển thị (giá, tin tức và ETF flows) của phiên hiện tại
+        invalidate_cache("prices", "news", "bold", session=session_label())
         st.rerun()
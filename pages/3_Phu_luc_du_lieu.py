@@ -10,11 +10,15 @@ import sys
 sys.path.insert(0, '..')
 
 from components.timestamp import render_timestamp
+from components.session_cache import invalidate_cache, is_data_fresh, session_label
+from components.cache_warmer import start_cache_warmer
 from components.copy import copy_section, copy_page_content
 from components.exporters import show_export_options
-from data_providers.overview import get_cross_asset_table, CORE_ASSETS, fetch_prices
-from data_providers.market_details import fetch_ohlc, build_snapshot
-from data_providers.derivatives_wrappers import DerivsClient
+from data_providers.overview import get_cross_asset_table, get_cross_asset_returns, CORE_ASSETS
+from data_providers.price_panel import get_indicator_table
+from data_providers.analytics import ma_position
+from data_providers.crypto_derivs import get_derivs_snapshot
+from data_providers.derivatives_wrappers import FundingBatch, OIBatch, OI_VALUE_USD, connection_stats
 
 # Cấu hình trang
 st.set_page_config(
@@ -23,6 +27,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Warm cache nền trước mỗi lần mở phiên (idempotent)
+start_cache_warmer()
+
 # CSS
 st.markdown("""
 <style>
@@ -49,7 +56,7 @@ st.title("📈 Phụ lục dữ liệu & bảng biểu (Quốc tế)")
 tz_name = st.session_state.get("timezone", "Asia/Ho_Chi_Minh")
 now_utc = datetime.now(timezone.utc)
 
-render_timestamp(now_utc, tz_name, "Asia")
+render_timestamp(now_utc, tz_name, "Asia", is_fresh=is_data_fresh("prices"))
 
 st.markdown("---")
 
@@ -127,36 +134,16 @@ st.markdown("## 🔥 Heatmap biến động cross-asset")
 st.info("📊 Hiển thị % thay đổi theo các khung thời gian: D1, WTD, MTD")
 
 with st.spinner("Đang tạo heatmap..."):
-    # Load data
-    prices = fetch_prices(CORE_ASSETS, period="3mo", interval="1d")
+    # Returns tính sẵn (vectorized, dùng chung với bảng chỉ số Trang 1)
+    returns = get_cross_asset_returns()
     
-    if not prices.empty:
-        heatmap_data = []
-        
-        for asset in CORE_ASSETS:
-            if asset not in prices.columns:
-                continue
-            
-            asset_prices = prices[asset].dropna()
-            
-            if len(asset_prices) < 2:
-                continue
-            
-            # D1
-            d1 = ((asset_prices.iloc[-1] / asset_prices.iloc[-2]) - 1) * 100
-            
-            # WTD (5 days)
-            wtd = ((asset_prices.iloc[-1] / asset_prices.iloc[-6]) - 1) * 100 if len(asset_prices) >= 6 else np.nan
-            
-            # MTD (22 days)
-            mtd = ((asset_prices.iloc[-1] / asset_prices.iloc[-23]) - 1) * 100 if len(asset_prices) >= 23 else np.nan
-            
-            heatmap_data.append({
-                "Asset": asset,
-                "D1 (%)": d1,
-                "WTD (%)": wtd,
-                "MTD (%)": mtd
-            })
+    if not returns.empty:
+        # Khung nào thiếu lịch sử → NaN (theo NaN mask của engine)
+        heat = returns[["d1", "wtd", "mtd"]].where(
+            returns[["d1_valid", "wtd_valid", "mtd_valid"]].to_numpy()
+        )
+        heat.columns = ["D1 (%)", "WTD (%)", "MTD (%)"]
+        heatmap_data = heat.rename_axis("Asset").reset_index().to_dict("records")
         
         heatmap_df = pd.DataFrame(heatmap_data)
         
@@ -206,39 +193,23 @@ st.markdown("## 📊 Bảng kỹ thuật nhanh")
 st.info("Hiển thị: Last, %D1, Range, ATR(14), MA20, MA50")
 
 with st.spinner("Đang tính toán chỉ báo kỹ thuật..."):
+    # Một lần tính trên cả panel thay vì build_snapshot cho từng asset
+    indicators = get_indicator_table(CORE_ASSETS)
     technical_data = []
     
-    for asset in CORE_ASSETS:
-        try:
-            df = fetch_ohlc(asset, period="6mo", interval="1d")
-            
-            if df.empty or len(df) < 2:
-                continue
-            
-            snapshot = build_snapshot(df)
-            
-            if not snapshot:
-                continue
-            
-            technical_data.append({
-                "Asset": asset,
-                "Last": f"{snapshot.get('last', 0):.2f}",
-                "%D1": f"{snapshot.get('pct_d1', 0):+.2f}%",
-                "Range": snapshot.get('day_range', 'N/A'),
-                "ATR(14)": f"{snapshot.get('atr14', 0):.2f}",
-                "MA20": f"{snapshot.get('ma20', 0):.2f}",
-                "MA50": f"{snapshot.get('ma50', 0):.2f}",
-                "MA Status": "🟢" if snapshot.get('above_ma20') and snapshot.get('above_ma50') 
-                           else "🔴" if not snapshot.get('above_ma20') and not snapshot.get('above_ma50')
-                           else "🟡"
-            })
-            
-        except Exception as e:
-            st.warning(f"Lỗi khi xử lý {asset}: {e}")
-            continue
-    
-    if technical_data:
-        technical_df = pd.DataFrame(technical_data)
+    if not indicators.empty:
+        technical_df = pd.DataFrame({
+            "Asset": indicators.index,
+            "Last": indicators["last"].map("{:.2f}".format).values,
+            "%D1": indicators["pct_d1"].map("{:+.2f}%".format).values,
+            "Range": (indicators["day_low"].map("{:.2f}".format)
+                      + " - " + indicators["day_high"].map("{:.2f}".format)).values,
+            "ATR(14)": indicators["atr14"].map("{:.2f}".format).values,
+            "MA20": indicators["ma20"].map("{:.2f}".format).values,
+            "MA50": indicators["ma50"].map("{:.2f}".format).values,
+            "MA Status": ma_position(indicators).map({"above": "🟢", "below": "🔴", "mixed": "🟡"}).values
+        })
+        technical_data = technical_df.to_dict("records")
         st.dataframe(technical_df, width="stretch", hide_index=True)
         
         st.caption("📌 🟢 = Above MA20 & MA50 | 🔴 = Below MA20 & MA50 | 🟡 = Mixed")
@@ -266,13 +237,10 @@ st.markdown("## ₿ Crypto Funding Rate & Open Interest")
 
 st.info("📊 Dữ liệu Funding Rate và Open Interest từ các sàn chính (Binance, Bybit, OKX, Deribit)")
 
-# Initialize derivatives client
+# Funding & OI của các sàn (shared cache, một lần gọi cho cả hai tab)
 try:
-    derivs_client = DerivsClient()
-    
-    # Crypto symbols to track
-    crypto_symbols = ["BTCUSDT", "ETHUSDT"]
-    exchanges = ["binance", "bybit", "okx"]
+    with st.spinner("Đang tải dữ liệu derivatives..."):
+        derivs = get_derivs_snapshot()
     
     # Tab cho Funding Rate và OI
     funding_tab, oi_tab = st.tabs(["📈 Funding Rate", "📊 Open Interest"])
@@ -281,27 +249,22 @@ try:
         st.markdown("### Funding Rate hiện tại")
         st.caption("Funding rate dương → Long trả Short | Funding rate âm → Short trả Long")
         
-        funding_data = []
-        
-        for symbol in crypto_symbols:
-            for exchange in exchanges:
-                try:
-                    fp = derivs_client.funding_latest(exchange, symbol)
-                    if fp:
-                        funding_data.append({
-                            "Exchange": fp.exchange,
-                            "Symbol": fp.symbol,
-                            "Funding Rate": f"{fp.rate * 100:.4f}%",
-                            "Annual Rate": f"{fp.rate * 100 * 365 * 3:.2f}%",  # 3 times per day
-                            "Timestamp": pd.to_datetime(fp.ts, unit='ms').strftime('%Y-%m-%d %H:%M:%S'),
-                            "Status": "🟢 Longs trả" if fp.rate > 0 else "🔴 Shorts trả" if fp.rate < 0 else "⚪ Neutral"
-                        })
-                except Exception as e:
-                    # Bỏ qua im lặng nếu API không khả dụng (403, 451, timeout, etc.)
-                    continue
+        # Batch dạng cột → DataFrame không copy, format vectorized
+        funding_raw = FundingBatch.from_points(derivs["funding"]).to_frame()
+        funding_df = pd.DataFrame({
+            "Exchange": funding_raw["exchange"].astype(str).to_numpy(),
+            "Symbol": funding_raw["symbol"].astype(str).to_numpy(),
+            "Funding Rate": (funding_raw["rate"] * 100).map("{:.4f}%".format).to_numpy(),
+            "Annual Rate": (funding_raw["rate"] * 100 * 365 * 3).map("{:.2f}%".format).to_numpy(),  # 3 times per day
+            "Timestamp": funding_raw.index.strftime('%Y-%m-%d %H:%M:%S'),
+            "Status": np.select(
+                [funding_raw["rate"] > 0, funding_raw["rate"] < 0],
+                ["🟢 Longs trả", "🔴 Shorts trả"], "⚪ Neutral"
+            )
+        })
+        funding_data = funding_df.to_dict("records")
         
         if funding_data:
-            funding_df = pd.DataFrame(funding_data)
             st.dataframe(funding_df, width="stretch", hide_index=True)
             
             # Analysis
@@ -336,26 +299,18 @@ try:
         st.markdown("### Open Interest hiện tại")
         st.caption("Open Interest = Tổng số hợp đồng futures đang mở")
         
-        oi_data = []
-        
-        for symbol in crypto_symbols:
-            for exchange in exchanges:
-                try:
-                    oi = derivs_client.oi_snapshot(exchange, symbol)
-                    if oi:
-                        oi_data.append({
-                            "Exchange": oi.exchange,
-                            "Symbol": oi.symbol,
-                            "Open Interest": f"{oi.open_interest:,.2f}",
-                            "Timestamp": pd.to_datetime(oi.ts, unit='ms').strftime('%Y-%m-%d %H:%M:%S'),
-                            "Value (USD)": f"${oi.meta.get('sumOpenInterestValue', 0):,.0f}" if 'sumOpenInterestValue' in oi.meta else "N/A"
-                        })
-                except Exception as e:
-                    # Bỏ qua im lặng nếu API không khả dụng (403, 451, timeout, etc.)
-                    continue
+        oi_raw = OIBatch.from_points(derivs["oi"]).to_frame()
+        oi_value = oi_raw.get(OI_VALUE_USD, pd.Series(np.nan, index=oi_raw.index))
+        oi_df = pd.DataFrame({
+            "Exchange": oi_raw["exchange"].astype(str).to_numpy(),
+            "Symbol": oi_raw["symbol"].astype(str).to_numpy(),
+            "Open Interest": oi_raw["open_interest"].map("{:,.2f}".format).to_numpy(),
+            "Timestamp": oi_raw.index.strftime('%Y-%m-%d %H:%M:%S'),
+            "Value (USD)": oi_value.map(lambda v: "N/A" if pd.isna(v) else f"${v:,.0f}").to_numpy()
+        })
+        oi_data = oi_df.to_dict("records")
         
         if oi_data:
-            oi_df = pd.DataFrame(oi_data)
             st.dataframe(oi_df, width="stretch", hide_index=True)
             
             st.markdown("#### Giải thích")
@@ -381,6 +336,24 @@ try:
         else:
             st.info("📊 Không có dữ liệu Open Interest từ các sàn (có thể do API giới hạn hoặc bảo trì)")
 
+    if derivs.get("live"):
+        st.caption(f"⚡ {derivs['live']} giá trị realtime qua WebSocket (còn lại từ REST snapshot)")
+
+    # Các lần gọi lỗi / quá hạn (kết quả còn lại vẫn hiển thị)
+    failed_calls = derivs.get("failed", [])
+    if failed_calls:
+        st.caption("⚠️ Không lấy được: " + ", ".join(
+            f"{r.kind} {r.exchange}/{r.symbol} ({r.status})" for r in failed_calls
+        ))
+
+    # Keep-alive: số kết nối TCP/TLS thực sự mở so với số request tới mỗi sàn
+    conn_stats = connection_stats()
+    if conn_stats:
+        st.caption("🔌 Kết nối: " + " | ".join(
+            f"{host} {info['requests']} req / {info['connections']} conn ({info['reuse_ratio']:.0%} reuse)"
+            for host, info in sorted(conn_stats.items())
+        ))
+
 except Exception as e:
     # Bỏ qua im lặng - không hiển thị lỗi khi API không khả dụng
     pass
@@ -479,7 +452,8 @@ with st.sidebar:
         )
     
     if st.button("🔄 Làm mới dữ liệu"):
-        st.cache_data.clear()
+        # Chỉ làm mới dữ liệu trang này hiển thị (giá và derivatives) của phiên hiện tại
+        invalidate_cache("prices", "derivs", session=session_label())
         st.rerun()
 
 # Footer